@@ -48,7 +48,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'tracker.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Collected static files, ahead of sessions and auth
+    'tracker.middleware.StaticFilesMiddleware',
+    # Pages and API responses, for clients that accept gzip
+    'tracker.middleware.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,7 +67,8 @@ ROOT_URLCONF = 'backlog_tracker.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The stock backend plus render timing for RequestMetricsMiddleware
+        'BACKEND': 'tracker.metrics.DjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -87,6 +94,120 @@ DATABASES = {
     }
 }
 
+# Production SQLite profile, enabled with DJANGO_DB_PROFILE=production.
+# WAL lets readers carry on while one worker writes; synchronous=NORMAL is
+# safe under WAL and skips an fsync per commit. Write transactions start
+# with BEGIN IMMEDIATE so they queue on the busy timeout instead of
+# failing with "database is locked" when a read lock can't be upgraded.
+# Connections are kept open between requests (CONN_MAX_AGE) and checked
+# before reuse.
+
+SQLITE_PRODUCTION_PROFILE = {
+    'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 600)),
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA mmap_size=268435456',  # 256 MiB
+            'PRAGMA cache_size=-65536',  # 64 MiB
+            'PRAGMA temp_store=MEMORY',
+        ]),
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,  # busy_timeout, in seconds
+    },
+}
+
+if os.environ.get('DJANGO_DB_PROFILE') == 'production':
+    DATABASES['default'].update(SQLITE_PRODUCTION_PROFILE)
+
+# Read replicas
+#
+# DJANGO_DB_REPLICAS lists SQLite files (comma-separated) that serve the
+# read-only library views: list and search, export, stats and the JSON
+# API (see tracker.replicas). Writes always go to default. Each file is a
+# copy of default refreshed by `python manage.py sync_replicas --interval
+# N`; a user who changed their library within TRACKER_REPLICA_PIN_SECONDS
+# reads from default, so keep it above the sync interval plus the time a
+# sync takes.
+
+for number, name in enumerate(filter(None, os.environ.get('DJANGO_DB_REPLICAS', '').split(',')), 1):
+    replica_options = {
+        key: value for key, value in DATABASES['default'].get('OPTIONS', {}).items()
+        if key != 'transaction_mode'
+    }
+    replica_options['init_command'] = ';'.join(
+        filter(None, [replica_options.get('init_command'), 'PRAGMA query_only=ON'])
+    )
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': name.strip(),
+        'OPTIONS': replica_options,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+TRACKER_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+TRACKER_REPLICA_PIN_SECONDS = int(os.environ.get('DJANGO_REPLICA_PIN_SECONDS', 15))
+
+DATABASE_ROUTERS = ['tracker.replicas.ReplicaRouter']
+
+
+# Async views
+#
+# Under ASGI (backlog_tracker.asgi), serve the library list, add, edit and
+# delete pages from tracker.async_views instead of the class-based views,
+# so they run on the event loop without a thread per request. Enable with
+# DJANGO_ASYNC_VIEWS=1; leave off under WSGI, where the sync views are
+# cheaper.
+
+TRACKER_ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS', '') in ('1', 'true', 'yes')
+
+
+# Entry counts
+#
+# The library list and the Library admin cache their totals, so turning
+# pages doesn't count the rows again. Set DJANGO_COUNT_ESTIMATE_ABOVE to
+# stop counting after that many rows: larger results show "N+" pages and
+# carry on by cursor. Off (exact totals) by default.
+
+TRACKER_COUNT_ESTIMATE_ABOVE = int(os.environ.get('DJANGO_COUNT_ESTIMATE_ABOVE', 0)) or None
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# tracker.reference keeps the lookup tables in process memory and checks a
+# version stamp stored here. Each user's data version (tracker.caching) is
+# kept here too, and with it everything keyed on it: rendered list pages,
+# entry totals, facet counts, the API's ETag / Last-Modified and replica
+# pinning. Every worker process has to share this cache, or an edit made
+# through one worker leaves the others serving stale pages.
+#
+# LocMemCache belongs to one process, so it only suits runserver and the
+# tests. DJANGO_CACHE_DIR (BASE_DIR / 'cache' under the production
+# profile) switches to a file-based cache shared by every worker on the
+# host; for several hosts, point CACHES at Memcached or Redis. `manage.py
+# check --deploy` reports a process-local cache as an error.
+
+cache_dir = os.environ.get('DJANGO_CACHE_DIR') or (
+    BASE_DIR / 'cache' if os.environ.get('DJANGO_DB_PROFILE') == 'production' else None
+)
+
+if cache_dir:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -124,6 +245,22 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# `python manage.py collectstatic` fingerprints every file and writes .gz
+# (and, with the Brotli package installed, .br) copies into STATIC_ROOT,
+# which tracker.middleware.StaticFilesMiddleware serves with immutable
+# caching. See tracker.staticfiles.
+
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'tracker.staticfiles.CompressedManifestStorage',
+    },
+}
+
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "library_list"
 LOGOUT_REDIRECT_URL = "login"
@@ -146,5 +283,12 @@ LOGGING = {
             "level": "ERROR",
             "propagate": False,
         },
+        # One line per request from tracker.middleware.RequestMetricsMiddleware;
+        # quiet under DEBUG unless TRACKER_METRICS_LOG_LEVEL=INFO
+        "tracker.metrics": {
+            "handlers": ["console"],
+            "level": os.environ.get("TRACKER_METRICS_LOG_LEVEL", "WARNING" if DEBUG else "INFO"),
+            "propagate": False,
+        },
     },
 }
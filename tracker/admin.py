@@ -1,8 +1,37 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR
+
+from . import caching
 from .models import Platform, Game, Edition, Status, Library
+from .pagination import CachedCountPaginator
 
 admin.site.register(Platform)
 admin.site.register(Game)
 admin.site.register(Edition)
 admin.site.register(Status)
-admin.site.register(Library)
\ No newline at end of file
+
+
+@admin.register(Library)
+class LibraryAdmin(admin.ModelAdmin):
+    # Entries span every user, so the count is cached under the library
+    # version and the changelist's filters, and the unfiltered total isn't
+    # counted separately. With an estimated count, narrow the list with the
+    # search or filters to page past the counted entries.
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    list_select_related = ("user", "edition__game", "status")
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        querystring = caching.normalized_querystring(request.GET, ignore=(PAGE_VAR, ORDER_VAR))
+        count_key = ":".join([
+            "tracker:admin_count",
+            str(caching.library_version()),
+            hashlib.md5(querystring.encode(), usedforsecurity=False).hexdigest(),
+        ])
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            count_key=count_key, estimate_above=settings.TRACKER_COUNT_ESTIMATE_ABOVE,
+        )
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class TrackerConfig(AppConfig):
     name = 'tracker'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import checks, metrics, signals  # noqa: F401
+
+        connection_created.connect(metrics.install, dispatch_uid="tracker.metrics.install")
@@ -0,0 +1,202 @@
+"""
+Async versions of the library list, create, update and delete views, for
+running under ASGI without a thread hop per request. urls.py serves them
+instead of the class-based views when settings.TRACKER_ASYNC_VIEWS is on.
+
+They share their querysets, context and form handling with tracker.views.
+Queries go through Django's async ORM; work that only exists in sync form
+(building the list context with its facet counts, form validation
+against the choice querysets, saving an entry with its m2m links and
+signal handlers, rendering templates that may reload the reference
+tables) runs in one sync_to_async call each.
+
+Those calls and the async ORM's own queries share Django's one sync
+thread, so a request's lookups run one after another, as they do in the
+sync views. What ASGI saves is a thread per waiting client.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.loader import get_template, render_to_string
+
+from . import caching, readmodel
+from .forms import LibraryForm
+from .models import Library
+from .pagination import InvalidCursor, KeysetPage, keyset_page
+from .replicas import replica_reads
+from .views import (
+    STREAM_CHUNK_SIZE, STREAM_PAGE_SIZES, STREAM_ROWS_MARKER,
+    attach_edition, library_list_context, library_ordering, library_paginator,
+    library_rows, own_entries, requested_page_size,
+)
+
+LIST_TEMPLATE = "library_list.html"
+FORM_TEMPLATE = "library_form.html"
+DELETE_TEMPLATE = "library_confirm_delete.html"
+
+
+def async_login_required(view):
+    """login_required for async views: resolves the user without blocking."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        # Templates and context processors read request.user synchronously
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _page(request, queryset, ordering):
+    """The requested page of rows: a keyset page or a numbered Page."""
+    per_page = requested_page_size(request.GET)
+    after, before = request.GET.get("after"), request.GET.get("before")
+    if after or before:
+        try:
+            return await sync_to_async(keyset_page)(
+                queryset, ordering, per_page, after=after, before=before
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+
+    paginator = library_paginator(request, queryset, per_page)
+    # count is a cached_property, filled from the cache or the database
+    await sync_to_async(lambda: paginator.count)()
+    try:
+        page = paginator.page(request.GET.get("page") or 1)
+    except InvalidPage:
+        raise Http404("Invalid page.")
+    page.object_list = [row async for row in page.object_list]
+    return page
+
+
+@async_login_required
+@replica_reads
+async def library_list(request):
+    ordering = library_ordering(request.GET)
+    # Building it can query (the first title search checks for the FTS
+    # table), so not on the event loop
+    queryset = await sync_to_async(library_rows)(request.user, request.GET)
+
+    if request.GET.get("page_size") in STREAM_PAGE_SIZES:
+        return await _stream_all_rows(request, queryset, ordering)
+
+    key = caching.page_key(request)
+    content = await cache.aget(key)
+    if content is not None:
+        caching.record_hit()
+        response = HttpResponse(content)
+        response["X-Page-Cache"] = "hit"
+        return response
+    caching.record_miss()
+
+    page = await _page(request, queryset, ordering)
+    response = HttpResponse(await sync_to_async(_render_list)(request, page, ordering))
+    await cache.aset(key, response.content, caching.PAGE_CACHE_TIMEOUT)
+    response["X-Page-Cache"] = "miss"
+    return response
+
+
+def _render_list(request, page, ordering):
+    rows = page.object_list
+    context = {
+        "libraries": rows,
+        "object_list": rows,
+        "page_obj": page,
+        "paginator": getattr(page, "paginator", None),
+        "is_paginated": (
+            page.has_next or page.has_previous if isinstance(page, KeysetPage)
+            else page.has_other_pages()
+        ),
+        **library_list_context(request, page, ordering),
+    }
+    return render_to_string(LIST_TEMPLATE, context, request)
+
+
+def _render_stream_frame(request, ordering):
+    """The list page around its rows, as (head, tail)."""
+    context = {
+        "libraries": [],
+        "object_list": [],
+        "streaming": True,
+        **library_list_context(request, None, ordering),
+    }
+    head, tail = render_to_string(LIST_TEMPLATE, context, request).split(STREAM_ROWS_MARKER, 1)
+    return head, tail
+
+
+async def _stream_all_rows(request, queryset, ordering):
+    head, tail = await sync_to_async(_render_stream_frame)(request, ordering)
+    render_rows = sync_to_async(get_template("library_rows.html").render)
+
+    async def rows():
+        yield head
+        chunk = []
+        async for row in queryset.aiterator(chunk_size=STREAM_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield await render_rows({"libraries": chunk})
+                chunk = []
+        if chunk:
+            yield await render_rows({"libraries": chunk})
+        yield tail
+
+    return StreamingHttpResponse(rows(), content_type="text/html; charset=utf-8")
+
+
+def _save(form, user):
+    with transaction.atomic(), readmodel.deferred():
+        attach_edition(form, user)
+        form.save()
+
+
+async def _form_view(request, instance=None, initial=None):
+    if request.method == "POST":
+        form = await sync_to_async(LibraryForm)(request.POST, instance=instance)
+        if await sync_to_async(form.is_valid)():
+            await sync_to_async(_save)(form, request.user)
+            return redirect("library_list")
+    else:
+        form = await sync_to_async(LibraryForm)(instance=instance, initial=initial)
+    # Rendering the choice fields reads their querysets
+    return HttpResponse(await sync_to_async(render_to_string)(FORM_TEMPLATE, {"form": form}, request))
+
+
+async def _own_entry(entries, pk):
+    try:
+        return await entries.aget(pk=pk)
+    except Library.DoesNotExist:
+        raise Http404("No library entry found.")
+
+
+@async_login_required
+async def library_create(request):
+    return await _form_view(request)
+
+
+@async_login_required
+async def library_update(request, pk):
+    entries = own_entries(request.user).prefetch_related("mediums", "subscription_services")
+    library = await _own_entry(entries, pk)
+    edition = library.edition
+    initial = {"title": edition.game.title, "edition_name": edition.name}
+    if edition.release_date:
+        initial["release_date"] = edition.release_date
+    return await _form_view(request, instance=library, initial=initial)
+
+
+@async_login_required
+async def library_delete(request, pk):
+    library = await _own_entry(own_entries(request.user), pk)
+    if request.method == "POST":
+        await library.adelete()
+        return redirect("library_list")
+    return HttpResponse(render_to_string(DELETE_TEMPLATE, {"object": library}, request))
@@ -0,0 +1,151 @@
+"""
+As-you-type title suggestions for the add/edit form.
+
+Suggestions are games whose title key (tracker.fields.normalize_key)
+starts with what was typed, read from the unique title_key index with a
+range scan that stops after `limit` rows, so the cost doesn't depend on
+how many games there are. When fewer than `limit` titles start with the
+text, games with a word starting with it ("witcher" for "The Witcher 3")
+fill the rest from the FTS index (tracker.search). Each suggestion lists
+the game's editions.
+
+Results are cached under a catalog version stamp, replaced whenever a
+game or edition is added, renamed or deleted, so a new title shows up on
+the next keystroke. Concurrent requests for the same text in one process
+share a single lookup instead of each querying the database.
+"""
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from . import search
+from .fields import normalize_key
+from .models import Edition, Game
+
+VERSION_KEY = "tracker:autocomplete:version"
+RESULT_TIMEOUT = 300  # seconds
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+
+# Sorts after every character, so key <= title_key < key + PREFIX_END
+# holds exactly the keys starting with `key`
+PREFIX_END = "\U0010ffff"
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _set_new_version():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def bump_version():
+    """Drop every cached suggestion, now and again on commit."""
+    _set_new_version()
+    transaction.on_commit(_set_new_version)
+
+
+# --- Lookups ---
+
+def prefix_matches(key, limit, using="default"):
+    """[(pk, title)] of the first `limit` games whose title key starts with `key`."""
+    games = Game.objects.using(using)
+    if connections[using].vendor == "sqlite":
+        # LIKE can't use the index on SQLite; a range over it can
+        games = games.filter(title_key__gte=key, title_key__lt=key + PREFIX_END)
+    else:
+        games = games.filter(title_key__startswith=key)
+    return list(games.order_by("title_key").values_list("pk", "title")[:limit])
+
+
+def lookup(text, limit=DEFAULT_LIMIT, using="default"):
+    """Suggestions for `text`, straight from the database."""
+    key = normalize_key(text)
+    if not key:
+        return []
+    games = prefix_matches(key, limit, using)
+    if len(games) < limit:
+        found = {pk for pk, _ in games}
+        games += [
+            (pk, title)
+            for pk, title in search.first_matches(text, limit + len(games), using)
+            if pk not in found
+        ][:limit - len(games)]
+
+    editions = defaultdict(list)
+    rows = (
+        Edition.objects.using(using)
+        .filter(game_id__in=[pk for pk, _ in games])
+        .order_by("name")
+        .values_list("game_id", "name")
+    )
+    for game_id, name in rows:
+        editions[game_id].append(name)
+    return [{"id": pk, "title": title, "editions": editions[pk]} for pk, title in games]
+
+
+# --- Request coalescing ---
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def _coalesced(key, text, limit):
+    """
+    lookup(text), with callers asking for the same key at once sharing one
+    run.
+    """
+    with _calls_lock:
+        call = _calls.get((key, limit))
+        leader = call is None
+        if leader:
+            call = _calls[key, limit] = _Call()
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = lookup(text, limit)
+    except Exception as exc:
+        call.error = exc
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key, limit]
+        call.done.set()
+    return call.result
+
+
+def suggest(text, limit=DEFAULT_LIMIT):
+    """Cached, coalesced suggestions for `text`."""
+    key = normalize_key(text)
+    if not key:
+        return []
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    cache_key = f"tracker:autocomplete:{current_version()}:{limit}:{digest}"
+    result = cache.get(cache_key)
+    if result is None:
+        # the word-match fallback searches what was typed, not the key
+        result = _coalesced(key, text, limit)
+        cache.set(cache_key, result, RESULT_TIMEOUT)
+    return result
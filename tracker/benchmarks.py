@@ -0,0 +1,303 @@
+"""
+Benchmark harness for the tracker's hot paths, run by the benchmark
+management command.
+
+A benchmark is a function registered with @benchmark that takes a Dataset
+and returns Case objects. Each case is measured on its own: one warm-up
+run, one run with a query-counting execute wrapper, one under
+tracemalloc for peak memory, then `repeat` plain timed runs for the
+latency percentiles. A case's `setup` runs before every run, untimed.
+"""
+
+import itertools
+import json
+import math
+import platform
+import sqlite3
+import statistics
+import time
+import tracemalloc
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from . import caching, datagen, search
+from .models import Game, Library, Medium, Platform, Status, SubscriptionService
+from .views import SORT_ORDERINGS
+
+REGISTRY = {}
+
+
+def benchmark(func):
+    REGISTRY[func.__name__] = func
+    return func
+
+
+class Case:
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+
+
+class Dataset:
+    """A generated library plus a logged-in client for its main user."""
+
+    def __init__(self, size, seed=1):
+        self.size = size
+        call_command("seed", games=0, entries_per_user=0, stdout=StringIO())
+        datagen.generate(users=2, games=size, entries_per_user=size, seed=seed)
+
+        self.user = Library.objects.order_by("user_id").first().user
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.platform = Platform.objects.filter(library__user=self.user).first()
+        self.status = Status.objects.filter(library__user=self.user).first()
+        self.mediums = list(Medium.objects.order_by("pk")[:2])
+        self.service = SubscriptionService.objects.order_by("pk").first()
+        self.entry = Library.objects.filter(user=self.user).order_by("pk").first()
+        self.search_term = self.entry.edition.game.title.split()[0]
+
+    def invalidate_pages(self):
+        """Make the next list request a page-cache miss."""
+        caching.bump_user_version(self.user.pk)
+
+
+# --- Measurement ---
+
+class _QueryCounter:
+    def __init__(self, queries):
+        self.queries = queries
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure(case, repeat=10):
+    if case.setup:
+        case.setup()
+    case.run()  # warm up
+
+    # Counted with an execute wrapper rather than CaptureQueriesContext:
+    # each test-client request resets connection.queries.
+    queries = []
+    if case.setup:
+        case.setup()
+    with connection.execute_wrapper(_QueryCounter(queries)):
+        case.run()
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "queries": len(queries),
+        "peak_kb": round(peak / 1024, 1),
+        "runs": repeat,
+    }
+
+
+def run_benchmarks(dataset, names=None, repeat=10, log=None):
+    """Measure every case of the named benchmarks (default: all)."""
+    results = {}
+    for name in names or REGISTRY:
+        for case in REGISTRY[name](dataset):
+            key = f"{dataset.size}/{name}/{case.name}"
+            results[key] = measure(case, repeat=repeat)
+            if log:
+                log(key, results[key])
+    return results
+
+
+def environment():
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+    }
+
+
+def save(path, results, **meta):
+    with open(path, "w") as f:
+        json.dump({"meta": {**environment(), **meta}, "results": results}, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline, threshold=0.25, floor_ms=0.5):
+    """
+    Regressions against a baseline, as (key, message) pairs. A case
+    regresses when its p50 grows by more than `threshold` (and by more
+    than `floor_ms`, to ignore noise on very fast cases), when it issues
+    more queries, or when its peak memory grows by more than `threshold`.
+    """
+    regressions = []
+    for key, new in sorted(results.items()):
+        old = baseline.get(key)
+        if old is None:
+            continue
+        slower = new["p50_ms"] - old["p50_ms"]
+        if slower > floor_ms and new["p50_ms"] > old["p50_ms"] * (1 + threshold):
+            regressions.append((key, f"p50 {old['p50_ms']:.2f}ms -> {new['p50_ms']:.2f}ms"))
+        if new["queries"] > old["queries"]:
+            regressions.append((key, f"queries {old['queries']} -> {new['queries']}"))
+        if new["peak_kb"] > old["peak_kb"] * (1 + threshold) + 64:
+            regressions.append((key, f"peak memory {old['peak_kb']:.0f}KB -> {new['peak_kb']:.0f}KB"))
+    return regressions
+
+
+# --- Benchmarks ---
+
+def _get(client, url, params=None):
+    response = client.get(url, params or {})
+    if response.status_code != 200:
+        raise AssertionError(f"GET {url} {params} returned {response.status_code}")
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+@benchmark
+def library_list(dataset):
+    """Every sort= option against every filter, each a page-cache miss."""
+    filters = {
+        "all": {},
+        "platform": {"platform": dataset.platform.pk},
+        "status": {"status": dataset.status.pk},
+        "medium": {"medium": dataset.mediums[0].pk},
+        "mediums_all": {"medium": [m.pk for m in dataset.mediums], "medium_match": "all"},
+        "service": {"subservice": dataset.service.pk},
+        "search": {"search": dataset.search_term},
+    }
+    url = reverse("library_list")
+    cases = []
+    for sort, (filter_name, params) in itertools.product([""] + list(SORT_ORDERINGS), filters.items()):
+        params = {**params, "sort": sort} if sort else params
+        cases.append(Case(
+            f"{sort or 'default'}/{filter_name}",
+            lambda params=params: _get(dataset.client, url, params),
+            setup=dataset.invalidate_pages,
+        ))
+    cases.append(Case(
+        "default/all/cached",
+        lambda: _get(dataset.client, url),
+    ))
+    cases.append(Case(
+        "default/all/stream",
+        lambda: _get(dataset.client, url, {"page_size": "all"}),
+    ))
+    return cases
+
+
+@benchmark
+def title_search(dataset):
+    term = dataset.search_term
+
+    def titles(text):
+        return list(search.filter_by_title(Game.objects.all(), text, game_field=None)[:20])
+
+    return [
+        Case("word", lambda: titles(term)),
+        Case("prefix", lambda: titles(term[:3])),
+        Case("no_match", lambda: titles("zzqx")),
+    ]
+
+
+@benchmark
+def library_write(dataset):
+    client = dataset.client
+    counter = itertools.count()
+
+    def form_data(**overrides):
+        data = {
+            "title": dataset.entry.edition.game.title,
+            "edition_name": dataset.entry.edition.name,
+            "platform": dataset.platform.pk,
+            "status": dataset.status.pk,
+            "priority": 5,
+            "hours_played": 0,
+            "notes": "",
+            "mediums": [dataset.mediums[0].pk],
+        }
+        data.update(overrides)
+        return data
+
+    def post(url, data):
+        response = client.post(url, data)
+        if response.status_code != 302:
+            raise AssertionError(f"POST {url} returned {response.status_code}")
+
+    def create():
+        post(reverse("library_add"), form_data(title=f"Benchmark Game {next(counter)}"))
+
+    def update():
+        post(
+            reverse("library_edit", args=[dataset.entry.pk]),
+            form_data(priority=next(counter) % 10 + 1),
+        )
+
+    doomed = []
+
+    def add_doomed():
+        doomed.append(Library.objects.create(
+            user=dataset.user,
+            edition=dataset.entry.edition,
+            platform=dataset.platform,
+            status=dataset.status,
+        ))
+
+    def delete():
+        post(reverse("library_delete", args=[doomed.pop().pk]), {})
+
+    def bulk_edit():
+        # every entry's priority, via "everything matching the filter"
+        post(reverse("library_bulk_edit"), {"scope": "filter", "priority": next(counter) % 10 + 1})
+
+    return [
+        Case("edit_form", lambda: _get(client, reverse("library_edit", args=[dataset.entry.pk]))),
+        Case("create", create),
+        Case("update", update),
+        Case("delete", delete, setup=add_doomed),
+        Case("bulk_edit_all", bulk_edit),
+    ]
+
+
+@benchmark
+def library_stats(dataset):
+    url = reverse("library_stats")
+    return [Case("page", lambda: _get(dataset.client, url))]
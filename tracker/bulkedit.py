@@ -0,0 +1,106 @@
+"""
+Bulk changes to many of one user's library entries at once.
+
+Status, platform and priority are set with one UPDATE per batch of
+entries, scoped to the user so ids they don't own are skipped; mediums
+and subscription services are added with one bulk_create per through
+table. Nothing is looked up or rewritten for the entries' games and
+editions, and everything runs in one transaction.
+
+UPDATE and bulk_create send no signals, so the LibraryRow read model,
+the stats rollups and the user's data version are updated here, from
+the rows read at the start rather than by reloading each entry.
+"""
+
+import copy
+
+from django.db import transaction
+
+from . import caching, stats
+from .models import Library, LibraryRow
+
+BATCH_SIZE = 5000  # ids per UPDATE statement
+
+
+def _batches(ids, size=BATCH_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def bulk_edit(user, library_ids, status=None, platform=None, priority=None,
+              add_mediums=(), add_services=()):
+    """
+    Apply the given changes to the user's entries among `library_ids`
+    (a list of ids or a queryset of them). Returns the number of entries
+    changed.
+    """
+    changes, row_changes = {}, {}
+    if status is not None:
+        changes["status"] = status
+        row_changes.update(
+            status=status, status_key=status.key,
+            status_order=status.order, status_label=status.label,
+        )
+    if platform is not None:
+        changes["platform"] = platform
+        row_changes.update(platform=platform, platform_name=platform.name)
+    if priority is not None:
+        changes["priority"] = priority
+        row_changes["priority"] = priority
+    medium_ids = {m.pk for m in add_mediums}
+    service_ids = {s.pk for s in add_services}
+
+    with transaction.atomic():
+        old_rows = list(
+            LibraryRow.objects.filter(user=user, pk__in=library_ids)
+            .only(*stats.ROW_FIELDS, "service_ids")
+            .order_by("pk")
+        )
+        ids = [row.pk for row in old_rows]
+        if not ids:
+            return 0
+
+        for batch in _batches(ids):
+            if changes:
+                Library.objects.filter(user=user, pk__in=batch).update(**changes)
+                LibraryRow.objects.filter(pk__in=batch).update(**row_changes)
+
+        new_rows = []
+        repacked = []
+        for old in old_rows:
+            row = copy.copy(old)
+            for name, value in row_changes.items():
+                setattr(row, name, value)
+            if medium_ids or service_ids:
+                packed = (
+                    LibraryRow.pack_ids(LibraryRow.unpack_ids(row.medium_ids) | medium_ids),
+                    LibraryRow.pack_ids(LibraryRow.unpack_ids(row.service_ids) | service_ids),
+                )
+                if packed != (row.medium_ids, row.service_ids):
+                    row.medium_ids, row.service_ids = packed
+                    repacked.append(row)
+            new_rows.append(row)
+
+        # Links the entries already have are skipped by the unique constraint
+        if medium_ids:
+            Library.mediums.through.objects.bulk_create(
+                (
+                    Library.mediums.through(library_id=pk, medium_id=medium_id)
+                    for pk in ids for medium_id in medium_ids
+                ),
+                ignore_conflicts=True, batch_size=BATCH_SIZE,
+            )
+        if service_ids:
+            Library.subscription_services.through.objects.bulk_create(
+                (
+                    Library.subscription_services.through(library_id=pk, subscriptionservice_id=service_id)
+                    for pk in ids for service_id in service_ids
+                ),
+                ignore_conflicts=True, batch_size=BATCH_SIZE,
+            )
+        if repacked:
+            LibraryRow.objects.bulk_update(repacked, ["medium_ids", "service_ids"], batch_size=1000)
+
+        stats.apply(old_rows, new_rows)
+        caching.bump_user_version(user.pk)
+    return len(ids)
@@ -0,0 +1,141 @@
+"""
+Per-user data versions and the rendered library page cache.
+
+Every user has a data version stored in Django's cache. Any change to one
+of their Library rows (including the mediums / subscription services
+links) replaces it — see tracker.signals — which orphans every cached page
+built from the old data. The version is a nanosecond timestamp, so it also
+tells when the user's data last changed. A library version, replaced along
+with any user's, does the same for things computed across every user's
+data (the admin's entry counts).
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import reference
+
+PAGE_CACHE_TIMEOUT = 300  # seconds
+
+LIBRARY_VERSION_KEY = "tracker:library_version"
+
+HITS_KEY = "tracker:page_cache:hits"
+MISSES_KEY = "tracker:page_cache:misses"
+
+
+def _version_key(user_id):
+    return f"tracker:user_version:{user_id}"
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # Never stored or evicted: start a fresh version so nothing cached
+        # under an older one can be served.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def user_version(user_id):
+    return _version(_version_key(user_id))
+
+
+def library_version():
+    return _version(LIBRARY_VERSION_KEY)
+
+
+def _set_new_version(user_id):
+    version = time.time_ns()
+    cache.set_many({_version_key(user_id): version, LIBRARY_VERSION_KEY: version}, None)
+
+
+def bump_user_version(user_id):
+    """Invalidate everything cached for this user, now and again on commit."""
+    _set_new_version(user_id)
+    transaction.on_commit(lambda: _set_new_version(user_id))
+
+
+def normalized_querystring(querydict, ignore=()):
+    """Querystring with keys and repeated values sorted and blanks dropped."""
+    items = []
+    for key in sorted(querydict.keys()):
+        if key in ignore:
+            continue
+        for value in sorted(querydict.getlist(key)):
+            if value != "":
+                items.append(f"{key}={value}")
+    return "&".join(items)
+
+
+# Parameters that change how the list's rows are shown, not which rows
+NOT_FILTERS = ("sort", "page", "page_size", "after", "before", "format")
+
+
+def filter_key(prefix, user_id, params):
+    """
+    Cache key for something computed from the user's rows matching the
+    list filters in `params` (the total, the facet counts): every page and
+    sort order of one filtered list shares it.
+    """
+    querystring = normalized_querystring(params, ignore=NOT_FILTERS)
+    return ":".join([
+        prefix,
+        str(user_id),
+        str(user_version(user_id)),
+        hashlib.md5(querystring.encode(), usedforsecurity=False).hexdigest(),
+    ])
+
+
+def page_key(request):
+    """
+    Cache key for a rendered library page. The session is part of the key
+    because the page embeds that session's CSRF token, and the username and
+    staff flag because the navigation bar shows them.
+    """
+    querystring = hashlib.md5(
+        normalized_querystring(request.GET).encode(), usedforsecurity=False
+    ).hexdigest()
+    account = hashlib.md5(
+        f"{request.user.get_username()}:{request.user.is_staff}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return ":".join([
+        "tracker:page",
+        str(request.user.pk),
+        str(user_version(request.user.pk)),
+        str(reference.current_version()),
+        request.session.session_key or "",
+        account,
+        querystring,
+    ])
+
+
+def _count(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def record_hit():
+    _count(HITS_KEY)
+
+
+def record_miss():
+    _count(MISSES_KEY)
+
+
+def page_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,193 @@
+"""
+Game and Edition identity.
+
+A game is identified by its title key and an edition by its game and name
+key (tracker.fields.normalize_key), and both keys carry a unique index.
+Looking a title up is one index probe, and two requests adding the same
+game at once end up sharing one row: the loser of the insert race gets an
+IntegrityError and reads the winner's row instead, which get_or_create
+does for single rows and the resolve_* functions do with ignore_conflicts
+for batches.
+
+merge_duplicates folds games and editions that were created apart but
+share a key, for the dedupe_games command (migration 0010 keeps its own
+copy).
+"""
+
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+
+from . import autocomplete
+from .fields import normalize_key
+from .models import Edition, Game, Library, LibraryRow
+
+BATCH_SIZE = 1000
+
+
+def get_or_create_game(title, **defaults):
+    return Game.objects.get_or_create(
+        title_key=normalize_key(title), defaults={"title": title, **defaults}
+    )
+
+
+def get_or_create_edition(game, name, **defaults):
+    return Edition.objects.get_or_create(
+        game=game, name_key=normalize_key(name), defaults={"name": name, **defaults}
+    )
+
+
+def resolve_games(titles, make=None):
+    """
+    ({title: Game}, [created Games]) for these titles, inserting the
+    missing ones in one statement. `make(title)` builds an unsaved Game
+    (default: just the title).
+    """
+    keys = {title: normalize_key(title) for title in titles}
+    found = {game.title_key: game for game in Game.objects.filter(title_key__in=set(keys.values()))}
+    missing = {}
+    for title, key in keys.items():
+        if key not in found and key not in missing:
+            missing[key] = make(title) if make else Game(title=title)
+    if missing:
+        # Conflicting rows were inserted concurrently; either way, read back
+        Game.objects.bulk_create(missing.values(), ignore_conflicts=True, batch_size=BATCH_SIZE)
+        found.update((game.title_key, game) for game in Game.objects.filter(title_key__in=missing))
+        # bulk_create sends no signals
+        autocomplete.bump_version()
+    return (
+        {title: found[key] for title, key in keys.items()},
+        [found[key] for key in missing],
+    )
+
+
+def resolve_editions(pairs, make=None):
+    """
+    ({(game_id, name): Edition}, [created Editions]) for these pairs, as
+    resolve_games. `make(game_id, name)` builds an unsaved Edition.
+    """
+    keys = {(game_id, name): (game_id, normalize_key(name)) for game_id, name in pairs}
+
+    def fetch(keys):
+        game_ids = {game_id for game_id, _ in keys}
+        name_keys = {name_key for _, name_key in keys}
+        return {
+            (edition.game_id, edition.name_key): edition
+            for edition in Edition.objects.filter(game_id__in=game_ids, name_key__in=name_keys)
+        }
+
+    found = fetch(keys.values())
+    missing = {}
+    for (game_id, name), key in keys.items():
+        if key not in found and key not in missing:
+            missing[key] = make(game_id, name) if make else Edition(game_id=game_id, name=name)
+    if missing:
+        Edition.objects.bulk_create(missing.values(), ignore_conflicts=True, batch_size=BATCH_SIZE)
+        found.update(fetch(missing))
+        autocomplete.bump_version()
+    return (
+        {pair: found[key] for pair, key in keys.items()},
+        [found[key] for key in missing],
+    )
+
+
+def _survivors(groups):
+    """{duplicate pk: surviving pk} for groups of pks, the oldest surviving."""
+    return {pk: min(pks) for pks in groups.values() for pk in pks if pk != min(pks)}
+
+
+def _store(model, field, keys):
+    """
+    Save {pk: key} into `field`, with one parameterised UPDATE run for
+    each row: bulk_update's CASE expression costs more to build than the
+    writes for the whole catalog.
+    """
+    if not keys:
+        return
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    sql = (
+        f"UPDATE {quote(model._meta.db_table)} SET {quote(model._meta.get_field(field).column)} = %s "
+        f"WHERE {quote(model._meta.pk.column)} = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(key, pk) for pk, key in keys.items()])
+
+
+def merge_duplicates(dry_run=False):
+    """
+    Merge games sharing a title key, then editions of one game sharing a
+    name key, into the oldest of each group, and store every key. Entries
+    of a merged edition move to the survivor, which gains its platforms.
+    Returns (games merged, editions merged, ids of users whose entries
+    changed). Saves, deletes and updates send no signals.
+    """
+    Platforms = Edition.platforms.through
+
+    # {pk: new key} for every key to store, and the stored ones among them
+    title_keys, stale_titles, game_groups = {}, set(), defaultdict(list)
+    for pk, title, stored in Game.objects.values_list("pk", "title", "title_key").iterator(chunk_size=2000):
+        key = normalize_key(title)
+        game_groups[key].append(pk)
+        if key != stored:
+            title_keys[pk] = key
+            if stored:
+                stale_titles.add(pk)
+    game_target = _survivors(game_groups)
+
+    name_keys, stale_names, edition_groups = {}, set(), defaultdict(list)
+    editions = Edition.objects.values_list("pk", "game_id", "name", "name_key")
+    for pk, game_id, name, stored in editions.iterator(chunk_size=2000):
+        key = normalize_key(name)
+        edition_groups[game_target.get(game_id, game_id), key].append(pk)
+        if key != stored:
+            name_keys[pk] = key
+            if stored:
+                stale_names.add(pk)
+    edition_target = _survivors(edition_groups)
+
+    merged_into = defaultdict(list)
+    for pk, survivor in edition_target.items():
+        merged_into[survivor].append(pk)
+    moved = Library.objects.filter(edition_id__in=edition_target) | Library.objects.filter(
+        edition__game_id__in=game_target
+    )
+    users = set(moved.values_list("user_id", flat=True).distinct())
+    if dry_run:
+        return len(game_target), len(edition_target), users
+
+    title_keys = {pk: key for pk, key in title_keys.items() if pk not in game_target}
+    name_keys = {pk: key for pk, key in name_keys.items() if pk not in edition_target}
+    with transaction.atomic():
+        # Stale keys step aside first, so moves and swaps can't collide
+        _store(Game, "title_key", {pk: f"#{pk}" for pk in stale_titles & title_keys.keys()})
+        _store(Edition, "name_key", {pk: f"#{pk}" for pk in stale_names & name_keys.keys()})
+
+        for survivor, pks in merged_into.items():
+            Library.objects.filter(edition_id__in=pks).update(edition_id=survivor)
+            Platforms.objects.bulk_create(
+                [
+                    Platforms(edition_id=survivor, platform_id=platform_id)
+                    for platform_id in Platforms.objects.filter(edition_id__in=pks)
+                    .values_list("platform_id", flat=True).distinct()
+                ],
+                ignore_conflicts=True,
+            )
+        Edition.objects.filter(pk__in=edition_target).delete()
+        for pk, survivor in game_target.items():
+            Edition.objects.filter(game_id=pk).update(game_id=survivor)
+
+        # LibraryRows copy their entry's game title and edition name, and
+        # go with their game: update them before the duplicates go
+        touched = set(merged_into) | set(
+            Edition.objects.filter(game_id__in=set(game_target.values())).values_list("pk", flat=True)
+        )
+        for edition in Edition.objects.filter(pk__in=touched).select_related("game"):
+            LibraryRow.objects.filter(library__edition_id=edition.pk).update(
+                game_id=edition.game_id, game_title=edition.game.title, edition_name=edition.name,
+            )
+        Game.objects.filter(pk__in=game_target).delete()
+
+        _store(Game, "title_key", title_keys)
+        _store(Edition, "name_key", name_keys)
+    return len(game_target), len(edition_target), users
@@ -0,0 +1,19 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Page caching and the per-user data versions (tracker.caching) need a
+    cache every worker process shares; see the Cache section of settings.
+    """
+    if isinstance(caches["default"], LocMemCache):
+        return [Error(
+            "The default cache is process-local (LocMemCache): with more than one "
+            "worker process, an edit handled by one leaves the others serving stale pages.",
+            hint="Set DJANGO_CACHE_DIR, or point CACHES at a shared backend.",
+            id="tracker.E001",
+        )]
+    return []
@@ -0,0 +1,260 @@
+"""
+Synthetic library data for development and performance testing.
+
+`generate` creates users, games, editions and library entries in batches
+with bulk_create, inserting the m2m through rows and the LibraryRow read
+model directly, so it can produce millions of entries in minutes. Output
+is fully determined by `seed`. The reference tables (platforms, statuses,
+mediums, subscription services) must already exist — the seed command
+creates them.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import caching, catalog, readmodel
+from .models import (
+    Game, Edition, Platform, Status,
+    Medium, SubscriptionService, Library
+)
+
+DEMO_TITLES = [
+    "Elden Ring", "Baldur's Gate 3", "Hades II", "Cyberpunk 2077",
+    "The Witcher 3", "Stardew Valley", "Hollow Knight",
+    "God of War Ragnarok", "Starfield", "Alan Wake 2",
+    "Persona 5 Royal", "Death Stranding", "Returnal",
+    "Ghost of Tsushima", "Bloodborne", "Dark Souls III",
+    "Final Fantasy VII Remake", "Monster Hunter World",
+    "Sekiro", "Control",
+]
+
+TITLE_ADJECTIVES = [
+    "Crimson", "Silent", "Forgotten", "Eternal", "Broken", "Hollow", "Iron",
+    "Neon", "Shattered", "Ancient", "Frozen", "Wild", "Lost", "Radiant",
+]
+TITLE_NOUNS = [
+    "Kingdom", "Frontier", "Odyssey", "Legacy", "Horizon", "Citadel", "Drift",
+    "Protocol", "Dynasty", "Abyss", "Chronicle", "Requiem", "Outpost", "Tide",
+]
+
+EDITION_NAMES = ["Standard Edition", "Deluxe Edition"]
+REGIONS = ["EU", "US", "JP", "Global"]
+
+SEED_USERNAME = "seed_user_{:06d}"
+SEED_PASSWORD = "password123"
+
+
+def synthetic_title(number):
+    """Deterministic, unique title for the nth game after the demo titles."""
+    adjective = TITLE_ADJECTIVES[number % len(TITLE_ADJECTIVES)]
+    noun = TITLE_NOUNS[(number // len(TITLE_ADJECTIVES)) % len(TITLE_NOUNS)]
+    return f"{adjective} {noun} {number + 1}"
+
+
+def game_titles(count):
+    return [
+        DEMO_TITLES[i] if i < len(DEMO_TITLES) else synthetic_title(i)
+        for i in range(count)
+    ]
+
+
+class Generator:
+    def __init__(self, seed=None, batch_size=5000, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+
+        self.platforms = list(Platform.objects.order_by("pk"))
+        self.statuses = list(Status.objects.order_by("pk"))
+        self.mediums = list(Medium.objects.order_by("pk"))
+        self.services = list(SubscriptionService.objects.order_by("pk"))
+        if not (self.platforms and self.statuses):
+            raise ValueError("Seed the platforms and statuses before generating entries")
+
+    def pick(self, objects, most):
+        """Between one and `most` distinct objects (none if there are none)."""
+        if not objects or most < 1:
+            return []
+        return self.rng.sample(objects, min(len(objects), self.rng.randint(1, most)))
+
+    # --- Users ---
+
+    def users(self, count, owner=None):
+        """
+        `owner` (the demo account, if given) and seed users up to `count`,
+        created as needed. Other accounts are never given entries.
+        """
+        users = [owner] if owner is not None and count else []
+        usernames = [SEED_USERNAME.format(n) for n in range(len(users), count)]
+        if usernames:
+            password = make_password(SEED_PASSWORD)  # hash once, share it
+            User.objects.bulk_create(
+                (User(username=username, password=password) for username in usernames),
+                batch_size=self.batch_size,
+                ignore_conflicts=True,
+            )
+            users += User.objects.filter(username__in=usernames).order_by("pk")
+        return users
+
+    # --- Games and editions ---
+
+    def editions(self, count):
+        """
+        Editions of the first `count` games as (edition, platform ids)
+        pairs, with edition.game loaded. Missing games get one or two
+        editions, each on one or two platforms.
+        """
+        titles = game_titles(count)
+        pool = []
+        for start in range(0, len(titles), self.batch_size):
+            chunk = titles[start:start + self.batch_size]
+            with transaction.atomic():
+                pool.extend(self.edition_batch(chunk))
+            self.log(f"  games: {min(start + self.batch_size, len(titles))}/{len(titles)}")
+        return pool
+
+    def edition_batch(self, titles):
+        rng = self.rng
+        games, missing = catalog.resolve_games(
+            titles, make=lambda title: Game(title=title, release_year=rng.randint(2000, 2024)),
+        )
+
+        def make_edition(game_id, name):
+            return Edition(
+                game_id=game_id,
+                name=name,
+                region=rng.choice(REGIONS),
+                release_date=date(rng.randint(2000, 2024), rng.randint(1, 12), rng.randint(1, 28)),
+            )
+
+        _, new_editions = catalog.resolve_editions(
+            [(game.pk, name) for game in missing for name in EDITION_NAMES[:rng.randint(1, 2)]],
+            make=make_edition,
+        )
+        by_pk = {game.pk: game for game in games.values()}
+        for edition in new_editions:
+            edition.game = by_pk[edition.game_id]
+
+        platform_ids = {
+            edition.pk: tuple(p.pk for p in self.pick(self.platforms, 2))
+            for edition in new_editions
+        }
+        Edition.platforms.through.objects.bulk_create(
+            Edition.platforms.through(edition_id=edition_id, platform_id=platform_id)
+            for edition_id, ids in platform_ids.items()
+            for platform_id in ids
+        )
+
+        # Editions of games that already existed keep their platforms
+        new_game_ids = {game.pk for game in missing}
+        old_games = {game.pk: game for game in games.values() if game.pk not in new_game_ids}
+        old_editions = list(Edition.objects.filter(game__in=old_games).order_by("pk"))
+        for edition in old_editions:
+            edition.game = old_games[edition.game_id]
+            platform_ids[edition.pk] = ()
+        for edition_id, platform_id in Edition.platforms.through.objects.filter(
+            edition__in=old_editions
+        ).values_list("edition_id", "platform_id"):
+            platform_ids[edition_id] += (platform_id,)
+
+        return [
+            (edition, platform_ids[edition.pk])
+            for edition in sorted(new_editions + old_editions, key=lambda e: e.pk)
+        ]
+
+    # --- Library entries ---
+
+    def entries(self, users, pool, per_user, max_mediums=2, service_rate=0.4, max_services=2):
+        """Give each user `per_user` entries drawn from the edition pool."""
+        platforms = {p.pk: p for p in self.platforms}
+        rng = self.rng
+        pending = []
+        created = 0
+
+        for number, user in enumerate(users, start=1):
+            owned = set(Library.objects.filter(user=user).values_list("edition_id", flat=True))
+            available = [item for item in pool if item[0].pk not in owned] if owned else pool
+
+            for edition, platform_ids in rng.sample(available, min(per_user, len(available))):
+                if platform_ids:
+                    platform = platforms[rng.choice(platform_ids)]
+                else:
+                    platform = rng.choice(self.platforms)
+                library = Library(
+                    user=user,
+                    edition=edition,
+                    platform=platform,
+                    status=rng.choice(self.statuses),
+                    priority=rng.randint(1, 10),
+                    hours_played=round(rng.uniform(0, 200), 1),
+                )
+                library.added_on = date(2020, 1, 1) + timedelta(days=rng.randint(0, 2000))
+                if rng.random() < 0.3:
+                    library.start_date = library.added_on + timedelta(days=rng.randint(0, 365))
+                mediums = self.pick(self.mediums, max_mediums)
+                services = self.pick(self.services, max_services) if rng.random() < service_rate else []
+                pending.append((library, mediums, services))
+
+                if len(pending) >= self.batch_size:
+                    created += self.write(pending)
+                    pending = []
+                    self.log(f"  entries: {created} ({number}/{len(users)} users)")
+
+        if pending:
+            created += self.write(pending)
+        for user in users:
+            caching.bump_user_version(user.pk)
+        return created
+
+    def write(self, pending):
+        with transaction.atomic():
+            libraries = Library.objects.bulk_create(lib for lib, _, _ in pending)
+            Library.mediums.through.objects.bulk_create(
+                Library.mediums.through(library_id=lib.pk, medium_id=medium.pk)
+                for lib, mediums, _ in pending
+                for medium in mediums
+            )
+            Library.subscription_services.through.objects.bulk_create(
+                Library.subscription_services.through(library_id=lib.pk, subscriptionservice_id=service.pk)
+                for lib, _, services in pending
+                for service in services
+            )
+            # bulk_create sends no signals: write the read model alongside
+            readmodel.add_rows(
+                readmodel.build_row(
+                    lib,
+                    medium_ids=[m.pk for m in mediums],
+                    service_ids=[s.pk for s in services],
+                )
+                for lib, mediums, services in pending
+            )
+        return len(libraries)
+
+
+def generate(users=1, games=20, entries_per_user=30, max_mediums=2,
+             service_rate=0.4, max_services=2, seed=None, batch_size=5000, log=None,
+             owner=None):
+    """
+    Generate a synthetic dataset for `owner` plus seed users. Returns counts
+    and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    generator = Generator(seed=seed, batch_size=batch_size, log=log)
+    user_objs = generator.users(users, owner)
+    pool = generator.editions(games)
+    created = generator.entries(
+        user_objs, pool, entries_per_user,
+        max_mediums=max_mediums, service_rate=service_rate, max_services=max_services,
+    )
+    return {
+        "users": len(user_objs),
+        "games": games,
+        "editions": len(pool),
+        "entries": created,
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,142 @@
+"""
+Streaming export of library entries as CSV, JSON or NDJSON.
+
+Rows are read with .iterator() from LibraryRow joined to its Library entry
+(for the notes and dates), and medium / service names are resolved from
+tracker.reference, so the export runs as a single query whatever the
+library size. Output is produced in chunks, optionally gzipped on the
+fly, so memory use stays flat. The fields match what tracker.importer
+reads back.
+"""
+
+import csv
+import json
+import zlib
+from io import StringIO
+
+from . import reference
+from .models import LibraryRow
+
+FORMATS = ("csv", "json", "ndjson")
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+FIELDS = [
+    "title", "edition", "platform", "status", "priority", "hours_played",
+    "notes", "start_date", "finish_date", "mediums", "subscription_services",
+]
+
+CHUNK_SIZE = 2000  # rows fetched per database round trip
+ROWS_PER_WRITE = 200  # rows serialized into each streamed piece
+
+_COLUMNS = [
+    "game_title", "edition_name", "platform_name", "status_key", "priority",
+    "hours_played", "library__notes", "library__start_date", "library__finish_date",
+    "medium_ids", "service_ids",
+]
+
+
+def records(queryset):
+    """Yield one export dict per LibraryRow in `queryset`, in its order."""
+    medium_names = {m.pk: m.name for m in reference.mediums()}
+    service_names = {s.pk: s.name for s in reference.subscription_services()}
+
+    def names(packed, table):
+        if not packed:
+            return []
+        ids = LibraryRow.unpack_ids(packed)
+        return [name for pk, name in table.items() if pk in ids]
+
+    rows = queryset.values_list(*_COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+    for (title, edition, platform, status, priority, hours, notes,
+         start_date, finish_date, medium_ids, service_ids) in rows:
+        yield {
+            "title": title,
+            "edition": edition,
+            "platform": platform,
+            "status": status,
+            "priority": priority,
+            "hours_played": hours,
+            "notes": notes,
+            "start_date": start_date.isoformat() if start_date else None,
+            "finish_date": finish_date.isoformat() if finish_date else None,
+            "mediums": names(medium_ids, medium_names),
+            "subscription_services": names(service_ids, service_names),
+        }
+
+
+def _batches(items, size=ROWS_PER_WRITE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def csv_chunks(items):
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for batch in _batches(items):
+        for item in batch:
+            writer.writerow({
+                **item,
+                "start_date": item["start_date"] or "",
+                "finish_date": item["finish_date"] or "",
+                "mediums": ";".join(item["mediums"]),
+                "subscription_services": ";".join(item["subscription_services"]),
+            })
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(items):
+    for batch in _batches(items):
+        yield "".join(json.dumps(item) + "\n" for item in batch)
+
+
+def json_chunks(items):
+    yield "["
+    separator = "\n"
+    for batch in _batches(items):
+        yield separator + ",\n".join(json.dumps(item) for item in batch)
+        separator = ",\n"
+    yield "\n]\n"
+
+
+SERIALIZERS = {
+    "csv": csv_chunks,
+    "json": json_chunks,
+    "ndjson": ndjson_chunks,
+}
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of bytes chunks as it goes."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(queryset, fmt, compress=False):
+    """Bytes chunks of `queryset` (LibraryRows) serialized as `fmt`."""
+    chunks = (text.encode("utf-8") for text in SERIALIZERS[fmt](records(queryset)))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def filename(fmt, compress=False, today=None):
+    name = f"backlog-{today:%Y%m%d}.{fmt}" if today else f"backlog.{fmt}"
+    return name + ".gz" if compress else name
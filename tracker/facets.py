@@ -0,0 +1,79 @@
+"""
+Facet counts for the library filter panel: how many of the user's
+entries each platform, status, priority, medium and subscription service
+option would match.
+
+Each dimension is counted with a grouped select over the list's
+filtered rows, with every active filter except the dimension's own
+applied, so an option's count is what selecting it (alone, in place of
+the current choice) would show. The five selects run as one UNION ALL
+statement. Platform, status and priority group the
+LibraryRows directly; mediums and services group the link tables joined
+to them. The five results are cached under the user's data version (see
+tracker.caching) and the filter querystring, so any change to the
+library replaces them and paging or re-sorting reuses them.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Value
+
+from . import caching
+from .models import Library
+
+# facet -> the querystring parameters that filter on it
+DIMENSIONS = {
+    "platform": ("platform",),
+    "status": ("status",),
+    "priority": ("priority",),
+    "medium": ("medium", "medium_match"),
+    "subservice": ("subservice", "subservice_match"),
+}
+
+
+def _rows(user, params, dimension):
+    # library_rows lives with the list views, which import this module
+    from .views import library_rows
+
+    params = params.copy()
+    for name in DIMENSIONS[dimension]:
+        params.pop(name, None)
+    return library_rows(user, params).order_by()
+
+
+def compute(user, params):
+    """{dimension: {option id: entries}} straight from the database."""
+    def grouped(dimension, queryset, field):
+        return (
+            queryset.order_by()
+            .values_list(Value(dimension), field)
+            .annotate(entries=Count("*"))
+        )
+
+    links = Library.mediums.through.objects
+    services = Library.subscription_services.through.objects
+    first, *rest = [
+        grouped("platform", _rows(user, params, "platform"), "platform_id"),
+        grouped("status", _rows(user, params, "status"), "status_id"),
+        grouped("priority", _rows(user, params, "priority"), "priority"),
+        grouped("medium", links.filter(
+            library_id__in=_rows(user, params, "medium").values("pk")
+        ), "medium_id"),
+        grouped("subservice", services.filter(
+            library_id__in=_rows(user, params, "subservice").values("pk")
+        ), "subscriptionservice_id"),
+    ]
+    result = {dimension: {} for dimension in DIMENSIONS}
+    # All five groupings in one statement
+    for dimension, key, entries in first.union(*rest, all=True):
+        result[dimension][key] = entries
+    return result
+
+
+def counts(user, params):
+    """compute(), cached until the user's library changes."""
+    key = caching.filter_key("tracker:facets", user.pk, params)
+    result = cache.get(key)
+    if result is None:
+        result = compute(user, params)
+        cache.set(key, result, caching.PAGE_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,47 @@
+import re
+import unicodedata
+
+from django.db import models
+
+_QUOTES_RE = re.compile(r"['‘’`\"“”]")
+_SEPARATORS_RE = re.compile(r"[\W_]+")
+
+
+def normalize_key(text):
+    """
+    Matching key for a game title or edition name: compatibility-folded,
+    case-folded, quotes dropped and every run of punctuation or whitespace
+    squashed to one space. "The Witcher 3:  Wild Hunt" and "the witcher 3
+    - wild hunt" share a key; so do "Assassin's Creed" and "Assassins Creed".
+    A title with nothing but punctuation or symbols ("!!!", "∞") keeps
+    its folded text as the key, rather than sharing an empty one.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    key = _SEPARATORS_RE.sub(" ", _QUOTES_RE.sub("", text)).strip()
+    return key or text.strip()
+
+
+class NormalizedKeyField(models.CharField):
+    """
+    A CharField holding normalize_key() of another field on the model. It
+    is filled in on every save and bulk_create, like auto_now, and is not
+    editable.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs["editable"] = False
+        kwargs.setdefault("blank", True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        del kwargs["editable"]
+        kwargs.pop("blank", None)
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_key(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Library
+from . import reference
+from .importer import FORMATS
+from .models import Library, Medium, Platform, Status, SubscriptionService
 from django.forms.widgets import CheckboxSelectMultiple
 
 
@@ -9,18 +11,73 @@ class InlineCheckboxSelectMultiple(forms.CheckboxSelectMultiple):
     template_name = "widgets/inline_checkbox_select.html"
 
 
+# Reference-data fields: choices to render and values to validate against
+# come from the tracker.reference cache, so neither queries the lookup
+# table. Until a form calls set_objects() they behave like their parents.
+
+class ReferenceObjectsMixin:
+    objects_by_pk = None
+
+    def set_objects(self, objects):
+        self.objects_by_pk = {str(obj.pk): obj for obj in objects}
+        choices = [(obj.pk, str(obj)) for obj in objects]
+        if getattr(self, "empty_label", None) is not None:
+            choices.insert(0, ("", self.empty_label))
+        self.choices = choices
+
+    def cached_object(self, value):
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        try:
+            return self.objects_by_pk[str(value)]
+        except KeyError:
+            raise forms.ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value},
+            )
+
+
+class ReferenceChoiceField(ReferenceObjectsMixin, forms.ModelChoiceField):
+    def to_python(self, value):
+        if self.objects_by_pk is None or value in self.empty_values:
+            return super().to_python(value)
+        return self.cached_object(value)
+
+
+class ReferenceMultipleChoiceField(ReferenceObjectsMixin, forms.ModelMultipleChoiceField):
+    def _check_values(self, value):
+        if self.objects_by_pk is None:
+            return super()._check_values(value)
+        return [self.cached_object(pk) for pk in dict.fromkeys(str(pk) for pk in value)]
+
+
+def use_reference_objects(form):
+    """Point a form's reference fields (by model field name) at the cached objects."""
+    objects = {
+        Platform: reference.platforms,
+        Status: reference.statuses,
+        Medium: reference.mediums,
+        SubscriptionService: reference.subscription_services,
+    }
+    for field in form.fields.values():
+        if isinstance(field, ReferenceObjectsMixin):
+            field.set_objects(objects[field.queryset.model]())
+
+
 class LibraryForm(forms.ModelForm):
     # User-typed fields
     title = forms.CharField(
         max_length=200,
         label="Game Title",
-        required=True
+        required=True,
+        # Suggestions come from the title_suggestions endpoint
+        widget=forms.TextInput(attrs={"list": "title-suggestions", "autocomplete": "off"}),
     )
 
     edition_name = forms.CharField(
         max_length=200,
         label="Edition Name",
-        required=False  # Blank becomes "Standard"
+        required=False,  # Blank becomes "Standard"
+        widget=forms.TextInput(attrs={"list": "edition-suggestions", "autocomplete": "off"}),
     )
 
     # NEW: Replace year with a real release_date field
@@ -53,10 +110,20 @@ class LibraryForm(forms.ModelForm):
             "mediums": "Medium",
             "subscription_services": "Subscription Services",
         }
+        field_classes = {
+            "platform": ReferenceChoiceField,
+            "status": ReferenceChoiceField,
+            "mediums": ReferenceMultipleChoiceField,
+            "subscription_services": ReferenceMultipleChoiceField,
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # Render and validate the lookup fields from the reference-data
+        # cache instead of querying each lookup table
+        use_reference_objects(self)
+
         # Apply Bootstrap classes to all fields
         for name, field in self.fields.items():
             widget = field.widget
@@ -80,6 +147,93 @@ class LibraryForm(forms.ModelForm):
             "max": 10
         })
 
+    def _get_validation_exclusions(self):
+        # The reference fields hold objects picked from the cached ones;
+        # the model's own check would look each one up again
+        exclude = super()._get_validation_exclusions()
+        exclude.update(
+            name for name, field in self.fields.items() if isinstance(field, ReferenceObjectsMixin)
+        )
+        return exclude
+
+
+# Import Form
+
+class LibraryImportForm(forms.Form):
+    file = forms.FileField(label="Library File")
+    format = forms.ChoiceField(
+        label="Format",
+        required=False,  # Blank means "from the file extension"
+        choices=[("", "Detect from file name")] + [(f, f.upper()) for f in FORMATS],
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["file"].widget.attrs.update({"class": "form-control"})
+        self.fields["format"].widget.attrs.update({"class": "form-select"})
+
+
+# Bulk Edit Form
+
+class IdListField(forms.Field):
+    """Any number of integer ids, e.g. from checkboxes sharing one name."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return [int(pk) for pk in value or []]
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid selection.")
+
+
+class LibraryBulkEditForm(forms.Form):
+    SELECTED = "selected"
+    FILTER = "filter"
+
+    scope = forms.ChoiceField(
+        label="Apply to",
+        choices=[(SELECTED, "Selected games"), (FILTER, "Every game matching the filter")],
+        initial=SELECTED,
+    )
+    ids = IdListField(required=False)
+    query = forms.CharField(required=False, widget=forms.HiddenInput)  # the list's querystring
+
+    status = ReferenceChoiceField(Status.objects.all(), required=False, empty_label="Status: no change")
+    platform = ReferenceChoiceField(Platform.objects.all(), required=False, empty_label="Platform: no change")
+    priority = forms.IntegerField(required=False, min_value=1, max_value=10)
+    add_mediums = ReferenceMultipleChoiceField(
+        Medium.objects.all(), required=False, label="Add medium",
+        widget=InlineCheckboxSelectMultiple(),
+    )
+    add_subscription_services = ReferenceMultipleChoiceField(
+        SubscriptionService.objects.all(), required=False, label="Add subscription service",
+        widget=InlineCheckboxSelectMultiple(),
+    )
+
+    CHANGES = ["status", "platform", "priority", "add_mediums", "add_subscription_services"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Choices from the reference-data cache, as in LibraryForm
+        use_reference_objects(self)
+
+        for name in ("scope", "status", "platform"):
+            self.fields[name].widget.attrs.update({"class": "form-select form-select-sm"})
+        self.fields["priority"].widget.attrs.update({
+            "class": "form-control form-control-sm", "placeholder": "Priority", "min": 1, "max": 10,
+        })
+        for name in ("add_mediums", "add_subscription_services"):
+            self.fields[name].widget.attrs.update({"class": "form-check"})
+
+    def clean(self):
+        cleaned = super().clean()
+        if not any(cleaned.get(name) for name in self.CHANGES):
+            raise forms.ValidationError("Choose at least one change to make.")
+        if cleaned.get("scope") == self.SELECTED and not cleaned.get("ids"):
+            raise forms.ValidationError("Select at least one game.")
+        return cleaned
+
 
 # Registration Form
 
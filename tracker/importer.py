@@ -0,0 +1,328 @@
+"""
+Streaming bulk import of library entries from CSV, JSON or NDJSON.
+
+Records are read one at a time and written in batches: each batch resolves
+its Game/Edition/Platform/Status/Medium/SubscriptionService references
+through in-memory lookup maps, creates whatever games and editions are
+missing with bulk_create (matching them on their normalized keys, see
+tracker.catalog), and inserts the Library rows and their m2m links
+in one transaction. Memory use depends on the batch size, not the file.
+
+Recognised fields (CSV headers or JSON keys):
+    title (required), edition, platform (required), status (required,
+    key or label), priority, hours_played, notes, start_date, finish_date,
+    mediums, subscription_services
+
+mediums / subscription_services are names, as a JSON list or a string
+separated by ";" or "|".
+"""
+
+import codecs
+import csv
+import json
+import math
+import re
+import time
+from datetime import date
+
+from django.db import transaction
+
+from . import caching, catalog, readmodel
+from .models import (
+    Platform, Status, Medium, SubscriptionService, Library
+)
+
+FORMATS = ("csv", "json", "ndjson")
+
+MAX_REJECTIONS_KEPT = 100
+
+_LIST_SPLIT_RE = re.compile(r"[;|]")
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be read."""
+
+
+class RowError(ValueError):
+    """One record cannot be imported."""
+
+
+def detect_format(filename):
+    name = filename.lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".json"):
+        return "json"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ImportFileError(f"Cannot tell the format of {filename!r}; use .csv, .json or .ndjson")
+
+
+# --- Readers ---
+
+def read_records(stream, fmt):
+    """Yield (line_or_index, record dict) from a binary stream."""
+    text = codecs.getreader("utf-8-sig")(stream)
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "ndjson":
+        for number, line in enumerate(text, start=1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield number, RowError(f"invalid JSON: {exc.msg}")
+    elif fmt == "json":
+        yield from enumerate(_iter_json_array(text), start=1)
+    else:
+        raise ImportFileError(f"Unknown format {fmt!r}")
+
+
+def _iter_json_array(text, chunk_size=64 * 1024):
+    """Yield the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    def read_more():
+        nonlocal buffer, position, eof
+        chunk = text.read(chunk_size)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+    def next_char():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                return None
+            read_more()
+
+    if next_char() != "[":
+        raise ImportFileError("A JSON import must be an array of objects")
+    position += 1
+    if next_char() == "]":
+        return
+
+    while True:
+        next_char()
+        while True:
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise ImportFileError("Invalid JSON in import file")
+                read_more()
+        yield item
+
+        separator = next_char()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ImportFileError("Invalid JSON in import file")
+        position += 1
+
+
+# --- Import ---
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.rejections = []  # (line, reason), first MAX_REJECTIONS_KEPT only
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        total = self.imported + self.rejected
+        return total / self.seconds if self.seconds else 0.0
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        if len(self.rejections) < MAX_REJECTIONS_KEPT:
+            self.rejections.append((line, reason))
+
+
+class LibraryImporter:
+    def __init__(self, user, batch_size=1000):
+        self.user = user
+        self.batch_size = batch_size
+
+        # Reference tables are small: map every accepted spelling up front.
+        self.platforms = {p.name.lower(): p for p in Platform.objects.all()}
+        self.statuses = {}
+        for status in Status.objects.all():
+            self.statuses[status.key.lower()] = status
+            self.statuses[status.label.lower()] = status
+        self.mediums = {m.name.lower(): m for m in Medium.objects.all()}
+        self.services = {s.name.lower(): s for s in SubscriptionService.objects.all()}
+
+    def run(self, records):
+        """Import (line, record) pairs; returns an ImportResult."""
+        result = ImportResult()
+        start = time.perf_counter()
+        batch = []
+
+        for line, record in records:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                batch.append((line, self.clean(record)))
+            except RowError as exc:
+                result.reject(line, str(exc))
+                continue
+            if len(batch) >= self.batch_size:
+                self.write(batch, result)
+                batch = []
+        if batch:
+            self.write(batch, result)
+
+        if result.imported:
+            caching.bump_user_version(self.user.pk)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def clean(self, record):
+        if not isinstance(record, dict):
+            raise RowError("record is not an object")
+
+        def text(name, default=""):
+            value = record.get(name)
+            return default if value is None else str(value).strip()
+
+        title = text("title")
+        if not title:
+            raise RowError("missing title")
+        if len(title) > 200:
+            raise RowError("title is longer than 200 characters")
+
+        edition = text("edition") or "Standard"
+        if len(edition) > 100:
+            raise RowError("edition is longer than 100 characters")
+
+        platform = self.platforms.get(text("platform").lower())
+        if platform is None:
+            raise RowError(f"unknown platform {text('platform')!r}")
+
+        status = self.statuses.get(text("status").lower())
+        if status is None:
+            raise RowError(f"unknown status {text('status')!r}")
+
+        try:
+            priority = int(text("priority") or 5)
+            hours_played = float(text("hours_played") or 0)
+        except ValueError:
+            raise RowError("priority and hours_played must be numbers")
+        if not 1 <= priority <= 10:
+            raise RowError("priority must be between 1 and 10")
+        # float() also takes "nan", "inf" and "-3"
+        if not math.isfinite(hours_played) or hours_played < 0:
+            raise RowError(f"invalid hours_played {text('hours_played')!r}")
+
+        return {
+            "title": title,
+            "edition": edition,
+            "platform": platform,
+            "status": status,
+            "priority": priority,
+            "hours_played": hours_played,
+            "notes": text("notes"),
+            "start_date": self.parse_date(text("start_date")),
+            "finish_date": self.parse_date(text("finish_date")),
+            "mediums": self.lookup_names(record.get("mediums"), self.mediums, "medium"),
+            "services": self.lookup_names(
+                record.get("subscription_services"), self.services, "subscription service"
+            ),
+        }
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise RowError(f"invalid date {value!r} (use YYYY-MM-DD)")
+
+    @staticmethod
+    def lookup_names(value, table, kind):
+        if not value:
+            return []
+        names = value if isinstance(value, list) else _LIST_SPLIT_RE.split(str(value))
+        found = []
+        for name in names:
+            name = str(name).strip()
+            if not name:
+                continue
+            obj = table.get(name.lower())
+            if obj is None:
+                raise RowError(f"unknown {kind} {name!r}")
+            found.append(obj)
+        return found
+
+    def write(self, batch, result):
+        rows = [row for _, row in batch]
+        with transaction.atomic():
+            games, _ = catalog.resolve_games({row["title"] for row in rows})
+            editions, _ = catalog.resolve_editions(
+                {(games[row["title"]].pk, row["edition"]) for row in rows}
+            )
+            for row in rows:
+                game = games[row["title"]]
+                editions[(game.pk, row["edition"])].game = game
+
+            libraries = Library.objects.bulk_create(
+                Library(
+                    user=self.user,
+                    edition=editions[(games[row["title"]].pk, row["edition"])],
+                    platform=row["platform"],
+                    status=row["status"],
+                    priority=row["priority"],
+                    hours_played=row["hours_played"],
+                    notes=row["notes"],
+                    start_date=row["start_date"],
+                    finish_date=row["finish_date"],
+                )
+                for row in rows
+            )
+
+            Library.mediums.through.objects.bulk_create(
+                Library.mediums.through(library_id=lib.pk, medium_id=medium.pk)
+                for lib, row in zip(libraries, rows)
+                for medium in set(row["mediums"])
+            )
+            Library.subscription_services.through.objects.bulk_create(
+                Library.subscription_services.through(
+                    library_id=lib.pk, subscriptionservice_id=service.pk
+                )
+                for lib, row in zip(libraries, rows)
+                for service in set(row["services"])
+            )
+
+            # bulk_create sends no signals: keep the read model in step here,
+            # from the objects in hand rather than reloading the entries
+            readmodel.add_rows(
+                readmodel.build_row(
+                    lib,
+                    medium_ids={m.pk for m in row["mediums"]},
+                    service_ids={s.pk for s in row["services"]},
+                )
+                for lib, row in zip(libraries, rows)
+            )
+        result.imported += len(libraries)
+
+
+def import_file(user, stream, fmt, batch_size=1000):
+    """
+    Import a whole file. Batches written before a file-level error (bad
+    encoding, broken JSON) stay imported.
+    """
+    try:
+        return LibraryImporter(user, batch_size=batch_size).run(read_records(stream, fmt))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError(f"Cannot read import file: {exc}")
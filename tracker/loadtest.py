@@ -0,0 +1,179 @@
+"""
+Concurrent load against the library pages through the WSGI and the ASGI
+request handlers, run by the loadtest management command.
+
+Each mode runs in its own process, because settings.TRACKER_ASYNC_VIEWS
+(which routes the pages to tracker.async_views) is read when the URLconf
+loads. Requests go through Django's in-process test handlers, so the
+numbers measure the framework, views and database, not a web server:
+
+- wsgi: the class-based views, one thread per client, each with a test
+  Client (the same per-request path a threaded WSGI server takes).
+- asgi: the async views on one event loop, one task per client, each
+  with an AsyncClient (ASGIHandler, with the middleware running async).
+
+Every client sends `requests` requests back to back, drawn from a fixed
+mix: list pages across sorts and page numbers, edit forms and updates.
+Updates bump the user's data version, so list pages keep missing the
+page cache as they would under real use.
+
+A request's queries run one after another in both modes: the async ORM
+and sync_to_async share one thread, so the async list view gains no
+parallelism within a request. Any difference comes from how the two
+handlers wait on many clients at once.
+"""
+
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from . import benchmarks
+from .benchmarks import percentile
+from .models import Library
+from .views import SORT_ORDERINGS
+
+MODES = ("wsgi", "asgi")
+
+MIX = (("list", 16), ("edit_form", 3), ("update", 1))  # relative weights
+
+
+class Workload:
+    """A fixed, seeded sequence of requests for each client."""
+
+    def __init__(self, dataset, requests, seed=1):
+        self.dataset = dataset
+        self.requests = requests
+        self.seed = seed
+        entries = Library.objects.filter(user=dataset.user).order_by("pk")
+        self.entries = list(entries.values_list("pk", "priority")[:200])
+        self.pages = max(1, len(entries) // 20)
+        self.sorts = [""] + list(SORT_ORDERINGS)
+
+    def plan(self, client_number):
+        rng = random.Random(self.seed * 100_003 + client_number)
+        kinds = [kind for kind, weight in MIX for _ in range(weight)]
+        for _ in range(self.requests):
+            kind = rng.choice(kinds)
+            if kind == "list":
+                params = {"page": rng.randint(1, min(self.pages, 50))}
+                sort = rng.choice(self.sorts)
+                if sort:
+                    params["sort"] = sort
+                yield "GET", reverse("library_list"), params
+            else:
+                pk, priority = rng.choice(self.entries)
+                url = reverse("library_edit", args=[pk])
+                if kind == "edit_form":
+                    yield "GET", url, None
+                else:
+                    yield "POST", url, update_form(pk, rng.randint(1, 10))
+
+
+def update_form(pk, priority):
+    """Edit-form POST data that keeps entry `pk` as it is but for `priority`."""
+    entry = Library.objects.select_related("edition__game").get(pk=pk)
+    return {
+        "title": entry.edition.game.title,
+        "edition_name": entry.edition.name,
+        "platform": entry.platform_id,
+        "status": entry.status_id,
+        "priority": priority,
+        "hours_played": entry.hours_played,
+        "notes": entry.notes,
+    }
+
+
+def _check(method, url, response):
+    expected = 302 if method == "POST" else 200
+    if response.status_code != expected:
+        raise AssertionError(f"{method} {url} returned {response.status_code}")
+
+
+def _summary(mode, clients, timings, errors, seconds):
+    return {
+        "mode": mode,
+        "clients": clients,
+        "requests": len(timings),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(timings) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(statistics.median(timings), 2) if timings else None,
+        "p95_ms": round(percentile(timings, 95), 2) if timings else None,
+        "p99_ms": round(percentile(timings, 99), 2) if timings else None,
+    }
+
+
+def run_wsgi(workload, clients, cookies):
+    # The plans are built up front: building them queries the database
+    plans = [list(workload.plan(number)) for number in range(clients)]
+    timings, errors = [], []
+
+    def client_loop(plan):
+        client = Client()
+        client.cookies = cookies
+        for method, url, data in plan:
+            start = time.perf_counter()
+            try:
+                if method == "GET":
+                    response = client.get(url, data)
+                else:
+                    response = client.post(url, data)
+                _check(method, url, response)
+            except Exception as exc:
+                errors.append(repr(exc))
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client_loop, plans))
+    return _summary("wsgi", clients, timings, len(errors), time.perf_counter() - start)
+
+
+def run_asgi(workload, clients, cookies):
+    plans = [list(workload.plan(number)) for number in range(clients)]
+    timings, errors = [], []
+
+    async def client_loop(plan):
+        client = AsyncClient()
+        client.cookies = cookies
+        for method, url, data in plan:
+            start = time.perf_counter()
+            try:
+                if method == "GET":
+                    response = await client.get(url, data)
+                else:
+                    response = await client.post(url, data)
+                _check(method, url, response)
+            except Exception as exc:
+                errors.append(repr(exc))
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+
+    async def main():
+        await asyncio.gather(*(client_loop(plan) for plan in plans))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return _summary("asgi", clients, timings, len(errors), time.perf_counter() - start)
+
+
+RUNNERS = {"wsgi": run_wsgi, "asgi": run_asgi}
+
+
+def run(mode, size, client_counts, requests, seed=1, log=None):
+    """Build a dataset of `size` entries and load it at each client count."""
+    dataset = benchmarks.Dataset(size, seed=seed)
+    workload = Workload(dataset, requests, seed=seed)
+    results = []
+    for clients in client_counts:
+        result = RUNNERS[mode](workload, clients, dataset.client.cookies)
+        results.append(result)
+        if log:
+            log(result)
+    return results
@@ -0,0 +1,99 @@
+import statistics
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from tracker import autocomplete, catalog
+from tracker.benchmarks import percentile
+from tracker.datagen import game_titles
+from tracker.models import Game
+
+# Whole-title prefixes of growing selectivity, a word inside titles (FTS
+# fill) and a miss
+QUERIES = ["c", "crim", "crimson kingdom", "crimson kingdom 15", "elden", "kingdom", "nomatch"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark title autocomplete latency on a scratch database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000],
+            help="Number of Game titles to benchmark against",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--clients", type=int, default=50,
+                            help="Threads asking for the same text at once in the coalescing run")
+
+    def handle(self, *args, **options):
+        # Work in a throwaway test database so the real one is never touched.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        loaded = 0
+        self.stdout.write(
+            f"{'titles':>10} {'query':<20} {'lookup p50':>11} {'p95 ms':>8} {'cached p50':>11} {'hits':>5}"
+        )
+        for size in sorted(options["sizes"]):
+            titles = game_titles(size)
+            while loaded < size:
+                batch = titles[loaded:loaded + 10_000]
+                Game.objects.bulk_create(Game(title=title) for title in batch)
+                loaded += len(batch)
+            # give the first game of each title some editions to list
+            for game in Game.objects.order_by("pk")[:10]:
+                catalog.get_or_create_edition(game, "Standard Edition")
+
+            for query in QUERIES:
+                hits = len(autocomplete.lookup(query))
+                cold = self.time(lambda: autocomplete.lookup(query), options["repeat"])
+                cache.clear()
+                autocomplete.suggest(query)
+                warm = self.time(lambda: autocomplete.suggest(query), options["repeat"])
+                self.stdout.write(
+                    f"{size:>10} {query:<20} {statistics.median(cold):>11.3f} "
+                    f"{percentile(cold, 95):>8.3f} {statistics.median(warm):>11.3f} {hits:>5}"
+                )
+            self.coalescing(options["clients"])
+
+    def time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def coalescing(self, clients):
+        """`clients` threads ask for the same uncached text at the same moment."""
+        cache.clear()
+        barrier = threading.Barrier(clients)
+
+        def client():
+            barrier.wait()
+            try:
+                autocomplete.suggest("crimson")
+            finally:
+                connections.close_all()
+
+        with mock.patch.object(autocomplete, "lookup", wraps=autocomplete.lookup) as lookup:
+            threads = [threading.Thread(target=client) for _ in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"{'':>10} {clients} concurrent requests: {lookup.call_count} database lookup(s), "
+            f"{elapsed:.1f}ms"
+        )
+
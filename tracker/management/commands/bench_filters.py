@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tracker.models import (
+    Game, Edition, Platform, Status,
+    Medium, SubscriptionService, Library
+)
+from tracker.views import filter_related
+
+
+class Command(BaseCommand):
+    help = "Compare DISTINCT-join and EXISTS medium/service filtering on a scratch database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=50_000)
+        parser.add_argument("--links-per-entry", type=int, default=4,
+                            help="Medium and service rows attached to each entry")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        # Work in a throwaway test database so the real one is never touched.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        user = self.build_library(rng, options["entries"], options["links_per_entry"])
+
+        mediums = list(Medium.objects.values_list("id", flat=True)[:2])
+        services = list(SubscriptionService.objects.values_list("id", flat=True)[:2])
+        base = (
+            Library.objects.filter(user=user)
+            .order_by("status__order", "priority", "edition__game__title", "pk")
+        )
+
+        cases = {
+            "join + distinct": (
+                base.filter(mediums__id__in=mediums).distinct()
+                .filter(subscription_services__id__in=services).distinct()
+            ),
+            "exists (any)": filter_related(
+                filter_related(base, Library.mediums.through, "medium", mediums),
+                Library.subscription_services.through, "subscriptionservice", services,
+            ),
+            "exists (all)": filter_related(
+                filter_related(base, Library.mediums.through, "medium", mediums, True),
+                Library.subscription_services.through, "subscriptionservice", services, True,
+            ),
+        }
+
+        for name, queryset in cases.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset.explain())
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                # what a list page does: count for the paginator, then one page
+                count = queryset.count()
+                list(queryset.values_list("id", flat=True)[:20])
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"rows={count} median={statistics.median(timings):.2f}ms "
+                f"min={min(timings):.2f}ms\n"
+            )
+
+    def build_library(self, rng, entries, links_per_entry):
+        user = User.objects.create_user(username="bench")
+        platform = Platform.objects.create(name="PC", type="PC")
+        statuses = [
+            Status.objects.create(key=f"s{i}", label=f"Status {i}", order=i)
+            for i in range(5)
+        ]
+        mediums = [Medium.objects.create(name=f"Medium {i}") for i in range(6)]
+        services = [SubscriptionService.objects.create(name=f"Service {i}") for i in range(6)]
+
+        games = Game.objects.bulk_create(Game(title=f"Game {i}") for i in range(entries))
+        editions = Edition.objects.bulk_create(Edition(game=g, name="Standard") for g in games)
+        libraries = Library.objects.bulk_create(
+            Library(
+                user=user, edition=e, platform=platform,
+                status=rng.choice(statuses), priority=rng.randint(1, 10),
+            )
+            for e in editions
+        )
+
+        per_kind = max(1, links_per_entry // 2)
+        Library.mediums.through.objects.bulk_create(
+            Library.mediums.through(library_id=lib.pk, medium_id=m.pk)
+            for lib in libraries
+            for m in rng.sample(mediums, per_kind)
+        )
+        Library.subscription_services.through.objects.bulk_create(
+            Library.subscription_services.through(library_id=lib.pk, subscriptionservice_id=s.pk)
+            for lib in libraries
+            for s in rng.sample(services, per_kind)
+        )
+        return user
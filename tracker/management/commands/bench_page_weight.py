@@ -0,0 +1,87 @@
+import re
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from tracker import datagen
+from tracker.models import Library
+
+# Local assets a page links to (the CDN ones aren't ours to serve)
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+# label -> Accept-Encoding sent
+CLIENTS = {"identity": "", "gzip": "gzip, deflate", "br": "gzip, deflate, br"}
+
+
+class Command(BaseCommand):
+    help = "Measure the bytes sent for a library_list page load, with and without compression"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=500)
+        parser.add_argument("--page-sizes", nargs="+", type=int, default=[20, 100])
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        # Work in a throwaway test database and static root so the real
+        # ones are never touched.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as static_root, override_settings(
+                DEBUG=False, STATIC_ROOT=static_root
+            ):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                self.run(options)
+        finally:
+            teardown_test_environment()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        call_command("seed", games=0, entries_per_user=0, stdout=StringIO())
+        datagen.generate(users=1, games=options["entries"], entries_per_user=options["entries"],
+                         seed=options["seed"])
+        client = Client()
+        client.force_login(Library.objects.first().user)
+
+        self.stdout.write(
+            f"{'page size':>9} {'client':<9} {'html':>9} {'assets':>8} {'first view':>11} "
+            f"{'repeat view':>12}"
+        )
+        for page_size in options["page_sizes"]:
+            before = None
+            for label, accept in CLIENTS.items():
+                html, assets, cached = self.page_load(client, page_size, accept)
+                if before is None:
+                    # Before: nothing compressed, every asset sent again
+                    # on each view
+                    before = html + assets
+                    self.row(page_size, "before", html, assets, before, before, before)
+                # Fingerprinted assets are immutable: a repeat view only
+                # fetches the page
+                self.row(page_size, label, html, assets, html + assets, html + assets - cached, before)
+
+    def row(self, page_size, label, html, assets, first, repeat, before):
+        self.stdout.write(
+            f"{page_size:>9} {label:<9} {html:>9,} {assets:>8,} {first:>11,} {repeat:>12,}"
+            f"  ({repeat / before:.0%} of before per repeat view)"
+        )
+
+    def page_load(self, client, page_size, accept):
+        """(page bytes, asset bytes, immutable asset bytes) as sent."""
+        response = client.get(reverse("library_list"), {"page_size": page_size},
+                              HTTP_ACCEPT_ENCODING=accept)
+        html = len(response.content)
+        page = client.get(reverse("library_list"), {"page_size": page_size}).content.decode()
+        assets = cached = 0
+        for url in dict.fromkeys(ASSET_RE.findall(page)):
+            asset = client.get(url, HTTP_ACCEPT_ENCODING=accept)
+            assets += len(asset.content)
+            if "immutable" in asset.get("Cache-Control", ""):
+                cached += len(asset.content)
+        return html, assets, cached
@@ -0,0 +1,192 @@
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from tracker import datagen, replicas
+from tracker.benchmarks import percentile
+from tracker.loadtest import update_form
+from tracker.models import Library
+from tracker.views import SORT_ORDERINGS
+
+MODES = ("primary", "replica")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure read throughput with the read-only views on the primary and on a "
+        "replica, while other users save changes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8, help="Users reading list pages and exports")
+        parser.add_argument("--writers", type=int, default=2, help="Users saving edits")
+        parser.add_argument("--size", type=int, default=1_000, help="Library entries per user")
+        parser.add_argument("--seconds", type=float, default=10, help="Length of each run")
+        parser.add_argument("--interval", type=float, default=2, help="Seconds between replica syncs")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            return self.work(options)
+
+        # The replica alias has to be in settings.DATABASES from the start
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "DJANGO_DB_PROFILE": "production",
+                "DJANGO_DB_REPLICAS": os.path.join(tmp, "replica.sqlite3"),
+                "DJANGO_CACHE_DIR": os.path.join(tmp, "cache"),
+                "DJANGO_REPLICA_PIN_SECONDS": str(math.ceil(options["interval"] * 2) + 1),
+                "PYTHONPATH": os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get("PYTHONPATH")])),
+            }
+            command = [
+                sys.executable, "-m", "django", "bench_replicas", "--worker",
+                *[f"--{name}={options[name]}" for name in ("readers", "writers", "size", "seconds", "interval", "seed")],
+            ]
+            child = subprocess.run(command, env=env, capture_output=True, text=True)
+        if child.returncode:
+            raise CommandError(f"Benchmark run failed:\n{child.stderr}")
+        results = {}
+        for line in child.stdout.splitlines():
+            if line.startswith("{"):
+                result = json.loads(line)
+                results[result["mode"]] = result
+                self.stdout.write(
+                    f"  {result['mode']:<8} reads {result['reads_per_s']:>8.1f}/s  "
+                    f"p50={result['p50_ms']:>7.2f}ms p95={result['p95_ms']:>7.2f}ms  "
+                    f"writes {result['writes_per_s']:>6.1f}/s  reader queries on replica "
+                    f"{result['replica_share']:.0%}  syncs={result['syncs']} "
+                    f"errors={result['errors']}"
+                )
+        primary, replica = results.get("primary"), results.get("replica")
+        if primary and replica and primary["reads_per_s"]:
+            self.stdout.write(
+                f"  replica/primary read throughput x{replica['reads_per_s'] / primary['reads_per_s']:.2f}"
+            )
+
+    def work(self, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(tmp, "primary.sqlite3")
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                self.run(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+    def run(self, options):
+        call_command("seed", games=0, entries_per_user=0, stdout=StringIO())
+        datagen.generate(
+            users=options["readers"] + options["writers"], games=options["size"],
+            entries_per_user=options["size"], seed=options["seed"],
+        )
+        users = list(User.objects.filter(libraries__isnull=False).distinct().order_by("pk"))
+        readers, writers = users[:options["readers"]], users[options["readers"]:]
+        replicas.sync_all()
+        # Let the data versions datagen set age past the pin
+        time.sleep(settings.TRACKER_REPLICA_PIN_SECONDS)
+
+        for mode in MODES:
+            syncer = replicas.PeriodicSync(options["interval"])
+            syncer.start()
+            aliases = settings.TRACKER_READ_REPLICAS if mode == "replica" else []
+            with override_settings(TRACKER_READ_REPLICAS=aliases):
+                result = self.load(readers, writers, options)
+            syncer.stop()
+            self.stdout.write(json.dumps({"mode": mode, "syncs": syncer.syncs, **result}))
+
+    def load(self, readers, writers, options):
+        deadline = time.perf_counter() + options["seconds"]
+        reads, writes, errors = [], [], []
+        # reader queries by where they ran
+        queries = {"primary": 0, "replica": 0}
+        sorts = [""] + list(SORT_ORDERINGS)
+        pages = max(1, min(options["size"] // 20, 50))
+
+        def count(where):
+            def wrapper(execute, sql, params, many, context):
+                queries[where] += 1
+                return execute(sql, params, many, context)
+            return wrapper
+
+        def reader(number, user):
+            rng = random.Random(options["seed"] * 1_000 + number)
+            client = Client()
+            client.force_login(user)
+            try:
+                with ExitStack() as stack:
+                    for alias in connections:
+                        where = "primary" if alias == DEFAULT_DB_ALIAS else "replica"
+                        stack.enter_context(connections[alias].execute_wrapper(count(where)))
+                    while time.perf_counter() < deadline:
+                        if rng.random() < 0.1:
+                            url, params = reverse("library_export"), {"format": "ndjson"}
+                        else:
+                            url = reverse("library_list")
+                            params = {"page": rng.randint(1, pages), "sort": rng.choice(sorts)}
+                        start = time.perf_counter()
+                        response = client.get(url, params)
+                        if response.streaming:
+                            b"".join(response.streaming_content)
+                        if response.status_code != 200:
+                            errors.append(f"GET {url} returned {response.status_code}")
+                            continue
+                        reads.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()
+
+        def writer(number, user):
+            rng = random.Random(options["seed"] * 1_000 + 500 + number)
+            client = Client()
+            client.force_login(user)
+            entries = list(Library.objects.filter(user=user).values_list("pk", flat=True)[:200])
+            try:
+                while time.perf_counter() < deadline:
+                    pk = rng.choice(entries)
+                    url = reverse("library_edit", args=[pk])
+                    response = client.post(url, update_form(pk, rng.randint(1, 10)))
+                    if response.status_code != 302:
+                        errors.append(f"POST {url} returned {response.status_code}")
+                        continue
+                    writes.append(1)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=reader, args=pair) for pair in enumerate(readers)]
+        threads += [threading.Thread(target=writer, args=pair) for pair in enumerate(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return {
+            "reads": len(reads),
+            "reads_per_s": round(len(reads) / elapsed, 1),
+            "writes_per_s": round(len(writes) / elapsed, 1),
+            "p50_ms": round(statistics.median(reads), 2) if reads else None,
+            "p95_ms": round(percentile(reads, 95), 2) if reads else None,
+            "replica_share": round(queries["replica"] / (sum(queries.values()) or 1), 2),
+            "errors": len(errors),
+        }
@@ -0,0 +1,81 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tracker.models import Game
+from tracker.search import filter_by_title, fts_available
+
+
+WORDS = [
+    "shadow", "legend", "dark", "souls", "star", "dragon", "knight", "hollow",
+    "ring", "crimson", "quest", "tales", "chronicles", "galaxy", "racer",
+    "mystic", "iron", "empire", "storm", "last", "frontier", "witcher",
+    "kingdom", "hearts", "final", "fantasy", "space", "odyssey", "rise",
+    "fallen", "eternal", "city", "night", "blade", "wild", "hunt", "tower",
+    "ghost", "island", "ocean", "forest", "machine", "world", "dust", "zero",
+]
+
+QUERIES = ["dragon", "dark souls", "wit", "final fan", "zero nig", "nomatch"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark FTS5 title search against icontains on a scratch database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000],
+            help="Number of Game titles to benchmark against",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        # Work in a throwaway test database so the real one is never touched.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        if not fts_available():
+            self.stderr.write("FTS5 table not available — only icontains will be timed.")
+
+        rng = random.Random(options["seed"])
+        loaded = 0
+        self.stdout.write(f"{'titles':>10} {'query':<12} {'icontains ms':>13} {'fts ms':>9} {'hits':>7}")
+
+        for size in sorted(options["sizes"]):
+            while loaded < size:
+                batch = min(10_000, size - loaded)
+                # titles are unique: repeats drawn here are skipped
+                Game.objects.bulk_create(
+                    (
+                        Game(title=" ".join(rng.sample(WORDS, rng.randint(2, 4))).title())
+                        for _ in range(batch)
+                    ),
+                    ignore_conflicts=True,
+                )
+                loaded = Game.objects.count()
+
+            games = Game.objects.all()
+            for query in QUERIES:
+                slow = self.time(games.filter(title__icontains=query), options["repeat"])
+                fast = self.time(filter_by_title(games, query, game_field=None), options["repeat"])
+                hits = filter_by_title(games, query, game_field=None).count()
+                self.stdout.write(
+                    f"{size:>10} {query:<12} {slow:>13.2f} {fast:>9.2f} {hits:>7}"
+                )
+
+    def time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            # what a list page does: count for the paginator, then one page
+            queryset.count()
+            list(queryset.values_list("id", flat=True)[:50])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
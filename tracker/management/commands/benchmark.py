@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Time the tracker's hot paths on generated datasets in a scratch database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000],
+                            help="Library entries for the benchmarked user")
+        parser.add_argument("--repeat", type=int, default=10,
+                            help="Timed runs per case")
+        parser.add_argument("--only", nargs="+", choices=sorted(benchmarks.REGISTRY),
+                            help="Run only these benchmarks")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--compare", metavar="BASELINE",
+                            help="JSON results to compare against; regressions fail the command")
+        parser.add_argument("--threshold", type=float, default=0.25,
+                            help="Relative slowdown that counts as a regression (default 0.25)")
+
+    def handle(self, *args, **options):
+        baseline = benchmarks.load(options["compare"]) if options["compare"] else None
+
+        # The test environment lets the test client talk to the views;
+        # a throwaway test database keeps the real one untouched.
+        setup_test_environment()
+        results = {}
+        try:
+            for size in options["sizes"]:
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                try:
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"{size} entries"))
+                    dataset = benchmarks.Dataset(size, seed=options["seed"])
+                    results.update(benchmarks.run_benchmarks(
+                        dataset, options["only"], options["repeat"], log=self.report,
+                    ))
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            teardown_test_environment()
+
+        if options["output"]:
+            benchmarks.save(
+                options["output"], results,
+                sizes=options["sizes"], repeat=options["repeat"], seed=options["seed"],
+            )
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = benchmarks.compare(results, baseline, options["threshold"])
+            for key, message in regressions:
+                self.stderr.write(f"REGRESSION {key}: {message}")
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def report(self, key, result):
+        self.stdout.write(
+            f"  {key:<48} p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms "
+            f"queries={result['queries']:>3} peak={result['peak_kb']:>8.0f}KB"
+        )
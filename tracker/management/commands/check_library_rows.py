@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import readmodel
+from tracker.models import Library
+
+
+class Command(BaseCommand):
+    help = "Check that every Library entry's LibraryRow matches the entry"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only check this username's entries")
+        parser.add_argument("--fix", action="store_true", help="Rebuild the rows that are wrong")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Library.objects.all()
+        if options["user"]:
+            queryset = queryset.filter(user__username=options["user"])
+
+        problems = readmodel.find_inconsistencies(queryset, batch_size=options["batch_size"])
+        bad = problems["missing"] + problems["stale"]
+        if not bad:
+            self.stdout.write(self.style.SUCCESS("Library rows are consistent."))
+            return
+
+        self.stdout.write(
+            f"{len(problems['missing'])} missing, {len(problems['stale'])} stale "
+            f"(library ids: {', '.join(map(str, bad[:20]))}{' ...' if len(bad) > 20 else ''})"
+        )
+        if options["fix"]:
+            readmodel.sync(bad)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(bad)} rows."))
+        else:
+            raise CommandError("Library rows are inconsistent; run with --fix to repair.")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracker import autocomplete, caching, catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge games whose titles, and editions whose names, differ only in case, "
+        "spacing or punctuation, and store their normalized keys"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only report what would be merged")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        games, editions, user_ids = catalog.merge_duplicates(dry_run=options["dry_run"])
+        elapsed = time.perf_counter() - start
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would merge {games} game(s) and {editions} edition(s), "
+                f"affecting {len(user_ids)} user(s)."
+            )
+            return
+
+        for user_id in user_ids:
+            caching.bump_user_version(user_id)
+        autocomplete.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {games} game(s) and {editions} edition(s) for {len(user_ids)} user(s) "
+            f"in {elapsed:.1f}s"
+        ))
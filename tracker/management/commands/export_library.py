@@ -0,0 +1,42 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from tracker import exporter
+from tracker.views import library_rows
+
+
+class Command(BaseCommand):
+    help = "Export a user's library as CSV, JSON or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="Username whose library to export")
+        parser.add_argument("--format", choices=exporter.FORMATS, default="csv")
+        parser.add_argument("--output", default="-", help="File to write ('-' for stdout)")
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+        parser.add_argument(
+            "--query", default="",
+            help="Library list querystring to filter and sort by, e.g. 'status=2&sort=name'",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}")
+
+        queryset = library_rows(user, QueryDict(options["query"]))
+        chunks = exporter.export(queryset, options["format"], options["gzip"])
+
+        if options["output"] == "-":
+            self.write(sys.stdout.buffer, chunks)
+        else:
+            with open(options["output"], "wb") as stream:
+                self.write(stream, chunks)
+
+    def write(self, stream, chunks):
+        for chunk in chunks:
+            stream.write(chunk)
+        stream.flush()
@@ -0,0 +1,51 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.importer import FORMATS, ImportFileError, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = "Import library entries for a user from a CSV, JSON or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import ('-' for stdin)")
+        parser.add_argument("--user", required=True, help="Username that owns the entries")
+        parser.add_argument("--format", choices=FORMATS,
+                            help="File format (default: from the file extension)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}")
+
+        path = options["path"]
+        try:
+            fmt = options["format"] or detect_format(path)
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+
+        if path == "-":
+            result = self.run(user, sys.stdin.buffer, fmt, options["batch_size"])
+        else:
+            with open(path, "rb") as stream:
+                result = self.run(user, stream, fmt, options["batch_size"])
+
+        for line, reason in result.rejections:
+            self.stderr.write(f"  line {line}: {reason}")
+        if result.rejected > len(result.rejections):
+            self.stderr.write(f"  ... and {result.rejected - len(result.rejections)} more")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} entries, rejected {result.rejected} "
+            f"in {result.seconds:.1f}s ({result.rows_per_second:,.0f} rows/s)"
+        ))
+
+    def run(self, user, stream, fmt, batch_size):
+        try:
+            return import_file(user, stream, fmt, batch_size=batch_size)
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker import loadtest
+
+
+class Command(BaseCommand):
+    help = "Compare the library pages under WSGI and ASGI at several client counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", nargs="+", type=int, default=[50, 200],
+                            help="Concurrent clients per run")
+        parser.add_argument("--requests", type=int, default=20,
+                            help="Requests each client sends")
+        parser.add_argument("--size", type=int, default=1_000,
+                            help="Library entries for the loaded user")
+        parser.add_argument("--modes", nargs="+", choices=loadtest.MODES, default=list(loadtest.MODES))
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--worker", choices=loadtest.MODES, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            return self.work(options)
+
+        results = []
+        for mode in options["modes"]:
+            self.stdout.write(self.style.MIGRATE_HEADING(mode))
+            results.extend(self.spawn(mode, options))
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Comparison"))
+        by_mode = {(r["mode"], r["clients"]): r for r in results}
+        for clients in options["clients"]:
+            wsgi, asgi = by_mode.get(("wsgi", clients)), by_mode.get(("asgi", clients))
+            if wsgi and asgi and wsgi["throughput_rps"]:
+                self.stdout.write(
+                    f"  {clients:>4} clients: asgi/wsgi throughput x{asgi['throughput_rps'] / wsgi['throughput_rps']:.2f}, "
+                    f"p95 {wsgi['p95_ms']:.1f}ms -> {asgi['p95_ms']:.1f}ms"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"options": {k: options[k] for k in ("clients", "requests", "size", "seed")},
+                           "results": results}, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def spawn(self, mode, options):
+        """Run one mode in a child process; its URLconf depends on the mode."""
+        command = [
+            sys.executable, "-m", "django", "loadtest", "--worker", mode,
+            "--size", str(options["size"]), "--requests", str(options["requests"]),
+            "--seed", str(options["seed"]), "--clients", *map(str, options["clients"]),
+        ]
+        # A scratch cache directory, rather than the production profile's
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = {
+                **os.environ,
+                "DJANGO_ASYNC_VIEWS": "1" if mode == "asgi" else "0",
+                "DJANGO_DB_PROFILE": "production",
+                "DJANGO_CACHE_DIR": cache_dir,
+                "PYTHONPATH": os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get("PYTHONPATH")])),
+            }
+            child = subprocess.run(command, env=env, capture_output=True, text=True)
+        if child.returncode:
+            raise CommandError(f"{mode} run failed:\n{child.stderr}")
+        results = [json.loads(line) for line in child.stdout.splitlines() if line.startswith("{")]
+        for result in results:
+            self.report(result)
+        return results
+
+    def work(self, options):
+        # A file-backed test database, so every client thread shares it
+        with tempfile.TemporaryDirectory() as tmp:
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(tmp, "loadtest.sqlite3")
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                loadtest.run(
+                    options["worker"], options["size"], options["clients"], options["requests"],
+                    seed=options["seed"], log=lambda result: self.stdout.write(json.dumps(result)),
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+    def report(self, result):
+        self.stdout.write(
+            f"  {result['clients']:>4} clients  {result['requests']:>6} requests  "
+            f"{result['throughput_rps']:>8.1f} req/s  p50={result['p50_ms']:>8.2f}ms "
+            f"p95={result['p95_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms errors={result['errors']}"
+        )
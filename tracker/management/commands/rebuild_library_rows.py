@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracker import readmodel
+from tracker.models import Library
+
+
+class Command(BaseCommand):
+    help = "Rebuild the LibraryRow read model from Library entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only rebuild this username's entries")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Library.objects.all()
+        if options["user"]:
+            queryset = queryset.filter(user__username=options["user"])
+
+        start = time.perf_counter()
+        count = readmodel.rebuild(queryset, batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {count} library rows in {elapsed:.1f}s"
+        ))
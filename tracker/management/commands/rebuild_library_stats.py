@@ -0,0 +1,39 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user library stats rollups from the library rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this username's stats")
+        parser.add_argument("--check", action="store_true",
+                            help="Only report rollups that differ from the rows; fail if any do")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["user"]:
+            user_ids = list(User.objects.filter(username=options["user"]).values_list("pk", flat=True))
+            if not user_ids:
+                raise CommandError(f"No user named {options['user']!r}.")
+
+        if options["check"]:
+            problems = stats.find_inconsistencies(user_ids)
+            if not problems:
+                self.stdout.write(self.style.SUCCESS("Library stats are consistent."))
+                return
+            shown = ", ".join(f"user {u} {d}={k}" for u, d, k in problems[:20])
+            raise CommandError(
+                f"{len(problems)} stale group(s): {shown}{' ...' if len(problems) > 20 else ''}"
+            )
+
+        start = time.perf_counter()
+        count = stats.rebuild(user_ids)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {count} stats groups in {elapsed:.1f}s"
+        ))
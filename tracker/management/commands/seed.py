@@ -1,30 +1,45 @@
-import random
-from datetime import date
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from tracker.datagen import generate
 from tracker.models import (
-    Game, Edition, Platform, Status,
-    Medium, SubscriptionService, Library
+    Platform, Status, Medium, SubscriptionService
 )
 
 
 class Command(BaseCommand):
     help = "Seed the database with test data for development"
 
+    def add_arguments(self, parser):
+        # Defaults reproduce the small demo library; raise them for load tests
+        parser.add_argument("--users", type=int, default=1,
+                            help="Users to give entries: the demo account, if there is one, "
+                                 "then seed_user_NNNNNN accounts")
+        parser.add_argument("--games", type=int, default=20)
+        parser.add_argument("--entries-per-user", type=int, default=30)
+        parser.add_argument("--max-mediums", type=int, default=2,
+                            help="Each entry gets between 1 and this many mediums")
+        parser.add_argument("--service-rate", type=float, default=0.4,
+                            help="Share of entries with subscription services")
+        parser.add_argument("--max-services", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=None,
+                            help="Random seed, for a reproducible dataset")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
     def handle(self, *args, **options):
         self.stdout.write("Seeding database...")
 
         # --- USER ---
-        if not User.objects.exists():
+        # Generated entries go to the demo account and seed_user_NNNNNN
+        # accounts only, never to anyone else's library
+        user = User.objects.filter(username="martyn").first()
+        if user is None and not User.objects.exists():
             user = User.objects.create_user(
                 username="martyn",
                 password="password123",
                 email="martyn@example.com"
             )
             self.stdout.write("Created default user: martyn / password123")
-        else:
-            user = User.objects.first()
 
         # --- STATUSES ---
         statuses = [
@@ -109,68 +124,22 @@ class Command(BaseCommand):
         if settings.DEBUG:
             self.stdout.write("DEBUG mode detected — seeding demo games...")
 
-            game_titles = [
-                "Elden Ring", "Baldur's Gate 3", "Hades II", "Cyberpunk 2077",
-                "The Witcher 3", "Stardew Valley", "Hollow Knight",
-                "God of War Ragnarok", "Starfield", "Alan Wake 2",
-                "Persona 5 Royal", "Death Stranding", "Returnal",
-                "Ghost of Tsushima", "Bloodborne", "Dark Souls III",
-                "Final Fantasy VII Remake", "Monster Hunter World",
-                "Sekiro", "Control"
-            ]
-
-            edition_objs = []
-
-            for title in game_titles:
-                game, _ = Game.objects.get_or_create(
-                    title=title,
-                    defaults={
-                        "release_year": random.randint(2000, 2024),
-                        "developer": "",
-                        "publisher": "",
-                    }
-                )
-
-                # Create 1–2 editions per game
-                for edition_name in ["Standard Edition", "Deluxe Edition"][:random.randint(1, 2)]:
-                    edition, _ = Edition.objects.get_or_create(
-                        game=game,
-                        name=edition_name,
-                        defaults={
-                            "region": random.choice(["EU", "US", "JP", "Global"]),
-                            "release_date": date(
-                                random.randint(2000, 2024),
-                                random.randint(1, 12),
-                                random.randint(1, 28)
-                            ),
-                        }
-                    )
-                    edition.platforms.set(random.sample(platform_objs, random.randint(1, 2)))
-                    edition_objs.append(edition)
-
-            # --- LIBRARY ENTRIES ---
-            for edition in edition_objs:
-                Library.objects.get_or_create(
-                    user=user,
-                    edition=edition,
-                    platform=random.choice(list(edition.platforms.all())),
-                    status=random.choice(status_objs),
-                    defaults={
-                        "priority": random.randint(1, 10),
-                        "hours_played": random.uniform(0, 200),
-                        "notes": "",
-                        "start_date": None,
-                        "finish_date": None,
-                    }
-                )
-
-                lib = Library.objects.get(user=user, edition=edition)
-                lib.mediums.set(random.sample(medium_objs, random.randint(1, 2)))
-
-                if random.random() < 0.4:
-                    lib.subscription_services.set(
-                        random.sample(service_objs, random.randint(1, 2))
-                    )
+            counts = generate(
+                users=options["users"],
+                games=options["games"],
+                entries_per_user=options["entries_per_user"],
+                max_mediums=options["max_mediums"],
+                service_rate=options["service_rate"],
+                max_services=options["max_services"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+                log=self.stdout.write if options["verbosity"] > 1 else None,
+                owner=user,
+            )
+            self.stdout.write(
+                "Generated {entries} entries for {users} users over {games} games "
+                "({editions} editions) in {seconds:.1f}s".format(**counts)
+            )
 
         else:
             self.stdout.write("Production mode — skipping demo game seeding.")
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import replicas
+
+
+class Command(BaseCommand):
+    help = "Copy the primary database into each read replica (settings.TRACKER_READ_REPLICAS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float,
+                            help="Keep syncing, this many seconds apart, until interrupted")
+
+    def handle(self, *args, **options):
+        if not settings.TRACKER_READ_REPLICAS:
+            raise CommandError("No read replicas configured; set DJANGO_DB_REPLICAS.")
+
+        while True:
+            for alias in settings.TRACKER_READ_REPLICAS:
+                start = time.perf_counter()
+                replicas.sync(alias)
+                self.stdout.write(
+                    f"Synced {alias} ({settings.DATABASES[alias]['NAME']}) "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
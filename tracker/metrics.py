@@ -0,0 +1,139 @@
+"""
+Per-request timing: what tracker.middleware.RequestMetricsMiddleware
+measures and the in-process rolling window it keeps per view.
+
+Queries are counted by an execute wrapper that TrackerConfig.ready()
+installs on every database connection as it is opened. It adds to the
+RequestMetrics of the current context, so queries a view runs through
+sync_to_async (the async ORM included) count towards its request.
+
+Template render time is collected by the DjangoTemplates backend below
+(enabled in settings.TEMPLATES), which times every top-level render made
+while a request is being measured, including render_to_string calls.
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+
+from django.template.backends.django import DjangoTemplates as BaseDjangoTemplates
+
+WINDOW = 1000  # most recent requests kept per view
+
+FIELDS = ("wall_ms", "queries", "sql_ms", "template_ms", "bytes")
+
+_current = contextvars.ContextVar("tracker_request_metrics", default=None)
+
+_lock = threading.Lock()
+_windows = {}  # view name -> deque of samples
+_totals = {}  # view name -> requests since start
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+
+    def time_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - start
+            self.queries += 1
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Time the query against the current request's metrics, if any."""
+    measured = _current.get()
+    if measured is None:
+        return execute(sql, params, many, context)
+    return measured.time_query(execute, sql, params, many, context)
+
+
+def install(sender=None, connection=None, **kwargs):
+    """connection_created receiver: add execute_wrapper to the connection."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def record(view, sample):
+    """Add one request's sample (a dict of FIELDS) to the view's window."""
+    values = tuple(sample[field] for field in FIELDS)
+    with _lock:
+        window = _windows.get(view)
+        if window is None:
+            window = _windows[view] = deque(maxlen=WINDOW)
+        window.append(values)
+        _totals[view] = _totals.get(view, 0) + 1
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def snapshot():
+    """Percentiles per view and field over each view's window."""
+    with _lock:
+        windows = {view: (list(window), _totals[view]) for view, window in _windows.items()}
+
+    stats = {}
+    for view, (samples, total) in sorted(windows.items()):
+        summary = {"requests": total, "window": len(samples)}
+        for index, field in enumerate(FIELDS):
+            values = sorted(s[index] for s in samples if s[index] is not None)
+            if not values:
+                continue
+            summary[field] = {
+                "p50": round(_percentile(values, 50), 2),
+                "p95": round(_percentile(values, 95), 2),
+                "p99": round(_percentile(values, 99), 2),
+                "max": round(values[-1], 2),
+            }
+        stats[view] = summary
+    return stats
+
+
+def reset():
+    with _lock:
+        _windows.clear()
+        _totals.clear()
+
+
+# --- Template timing ---
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template += time.perf_counter() - start
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """The stock Django template backend, with render timing."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,160 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseNotModified
+from django.middleware import gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics, staticfiles
+
+logger = logging.getLogger("tracker.metrics")
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request: wall time, ORM query count and SQL time (through
+    the execute wrapper tracker.metrics installs on each connection),
+    template render time and response size. Adds a Server-Timing header,
+    logs one line per request to the "tracker.metrics" logger and feeds
+    the rolling per-view window in tracker.metrics.
+
+    Runs natively under both WSGI and ASGI, so async views are measured
+    without a thread hop. Goes first in MIDDLEWARE so the wall time covers
+    the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        measured = metrics.RequestMetrics()
+        token = measured.activate()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.RequestMetrics.deactivate(token)
+        return self.finish(request, response, measured, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        measured = metrics.RequestMetrics()
+        token = measured.activate()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.RequestMetrics.deactivate(token)
+        return self.finish(request, response, measured, time.perf_counter() - start)
+
+    def finish(self, request, response, measured, wall):
+        match = request.resolver_match
+        view = (match.view_name if match else None) or "unresolved"
+        sample = {
+            "wall_ms": wall * 1000,
+            "queries": measured.queries,
+            "sql_ms": measured.sql * 1000,
+            "template_ms": measured.template * 1000,
+            # streamed bodies have no size until they are sent
+            "bytes": None if response.streaming else len(response.content),
+        }
+        metrics.record(view, sample)
+
+        response["Server-Timing"] = ", ".join([
+            f"app;dur={sample['wall_ms']:.1f}",
+            f'db;dur={sample["sql_ms"]:.1f};desc="{measured.queries} queries"',
+            f"tpl;dur={sample['template_ms']:.1f}",
+        ])
+        logger.info(
+            "view=%s method=%s status=%s wall_ms=%.1f queries=%d sql_ms=%.1f template_ms=%.1f bytes=%s",
+            view, request.method, response.status_code, sample["wall_ms"], measured.queries,
+            sample["sql_ms"], sample["template_ms"], "-" if sample["bytes"] is None else sample["bytes"],
+            extra={"view": view, "status": response.status_code, **sample},
+        )
+        return response
+
+
+class StaticFilesMiddleware:
+    """
+    Serve the files collectstatic wrote to STATIC_ROOT, before sessions
+    and auth run: fingerprinted names with an immutable, year-long
+    Cache-Control, anything else revalidated by Last-Modified; the .br or
+    .gz copy when the client accepts it (see tracker.staticfiles).
+
+    The file list is read at startup, so run collectstatic before starting
+    the server. Not used when nothing has been collected (development,
+    where runserver serves the app directories, and tests).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        if not settings.STATIC_ROOT or not settings.STATIC_URL.startswith("/"):
+            raise MiddlewareNotUsed
+        self.files = staticfiles.collected_files(settings.STATIC_ROOT)
+        if not self.files:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        # Static files are small: read them without a thread hop
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        """The response for a collected file, or None to pass the request on."""
+        if request.method not in ("GET", "HEAD") or not request.path.startswith(settings.STATIC_URL):
+            return None
+        static = self.files.get(request.path.removeprefix(settings.STATIC_URL))
+        if static is None:
+            return None
+
+        path, encoding = static.choose(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        stat = path.stat()
+        if not static.immutable and not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime
+        ):
+            return HttpResponseNotModified()
+
+        response = HttpResponse(path.read_bytes(), content_type=static.content_type)
+        # Served ahead of CommonMiddleware, which would set it
+        response["Content-Length"] = str(len(response.content))
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Cache-Control"] = staticfiles.IMMUTABLE if static.immutable else "no-cache"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if static.variants:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+
+class GZipMiddleware(gzip.GZipMiddleware):
+    """
+    Django's GZipMiddleware, except for bodies that are compressed already
+    (gzip export downloads, images), which would only cost CPU.
+    """
+
+    ALREADY_COMPRESSED = ("application/gzip", "application/zip", "image/png", "image/jpeg", "image/webp")
+
+    def process_response(self, request, response):
+        if response.get("Content-Type", "").startswith(self.ALREADY_COMPRESSED):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-18 15:02
+
+from django.db import migrations, OperationalError
+
+
+FTS_TABLE = "tracker_game_fts"
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title,
+        content='tracker_game',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER tracker_game_fts_insert AFTER INSERT ON tracker_game BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER tracker_game_fts_delete AFTER DELETE ON tracker_game BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER tracker_game_fts_update AFTER UPDATE OF title ON tracker_game BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS tracker_game_fts_insert",
+    "DROP TRIGGER IF EXISTS tracker_game_fts_delete",
+    "DROP TRIGGER IF EXISTS tracker_game_fts_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_fts(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends use the icontains fallback in
+    # tracker.search.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+    except OperationalError:
+        # SQLite built without FTS5
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_list_view_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 6.0 on 2026-10-18 14:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def pack_ids(ids):
+    return "," + ",".join(str(pk) for pk in sorted(ids)) + "," if ids else ""
+
+
+def fill_rows(apps, schema_editor):
+    Library = apps.get_model("tracker", "Library")
+    LibraryRow = apps.get_model("tracker", "LibraryRow")
+
+    libraries = (
+        Library.objects.select_related("edition__game", "platform", "status")
+        .prefetch_related("mediums", "subscription_services")
+        .order_by("pk")
+    )
+    rows = []
+    for lib in libraries.iterator(chunk_size=1000):
+        rows.append(LibraryRow(
+            library_id=lib.pk,
+            user_id=lib.user_id,
+            game_id=lib.edition.game_id,
+            game_title=lib.edition.game.title,
+            edition_name=lib.edition.name,
+            platform_id=lib.platform_id,
+            platform_name=lib.platform.name,
+            status_id=lib.status_id,
+            status_key=lib.status.key,
+            status_order=lib.status.order,
+            status_label=lib.status.label,
+            priority=lib.priority,
+            hours_played=lib.hours_played,
+            medium_ids=pack_ids([m.pk for m in lib.mediums.all()]),
+            service_ids=pack_ids([s.pk for s in lib.subscription_services.all()]),
+        ))
+        if len(rows) == 1000:
+            LibraryRow.objects.bulk_create(rows)
+            rows = []
+    LibraryRow.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_game_title_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryRow',
+            fields=[
+                ('library', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='row', serialize=False, to='tracker.library')),
+                ('game_title', models.CharField(max_length=200)),
+                ('edition_name', models.CharField(max_length=100)),
+                ('platform_name', models.CharField(max_length=100)),
+                ('status_key', models.CharField(max_length=50)),
+                ('status_order', models.PositiveIntegerField()),
+                ('status_label', models.CharField(max_length=100)),
+                ('priority', models.IntegerField()),
+                ('hours_played', models.FloatField()),
+                ('medium_ids', models.CharField(blank=True, max_length=255)),
+                ('service_ids', models.CharField(blank=True, max_length=255)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.game')),
+                ('platform', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.platform')),
+                ('status', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.status')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'status_order', 'priority', 'game_title', 'library'], name='row_user_status_sort_idx'), models.Index(fields=['user', 'game_title', 'library'], name='row_user_title_idx'), models.Index(fields=['user', 'platform_name', 'game_title', 'library'], name='row_user_platform_sort_idx'), models.Index(fields=['user', 'priority', 'game_title', 'library'], name='row_user_priority_sort_idx'), models.Index(fields=['user', 'platform', 'status_order'], name='row_user_platform_idx'), models.Index(fields=['user', 'status', 'priority'], name='row_user_status_idx')],
+            },
+        ),
+        migrations.RunPython(fill_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+import datetime
+from collections import defaultdict
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def fill_added_on(apps, schema_editor):
+    Library = apps.get_model("tracker", "Library")
+    LibraryRow = apps.get_model("tracker", "LibraryRow")
+
+    # Existing entries were added no later than they were started
+    Library.objects.filter(start_date__lt=F("added_on")).update(added_on=F("start_date"))
+    LibraryRow.objects.update(added_on=Subquery(
+        Library.objects.filter(pk=OuterRef("library_id")).values("added_on")[:1]
+    ))
+
+
+def fill_stats(apps, schema_editor):
+    LibraryRow = apps.get_model("tracker", "LibraryRow")
+    LibraryStat = apps.get_model("tracker", "LibraryStat")
+
+    totals = defaultdict(lambda: [0, 0.0, 0])
+    rows = LibraryRow.objects.values_list(
+        "user_id", "status_id", "platform_id", "priority", "hours_played", "medium_ids", "added_on",
+    )
+    for user_id, status_id, platform_id, priority, hours, medium_ids, added_on in rows.iterator(chunk_size=2000):
+        mediums = [int(pk) for pk in medium_ids.strip(",").split(",") if pk] or [0]
+        groups = [("status", status_id), ("platform", platform_id), ("priority", priority)]
+        groups += [("medium", pk) for pk in mediums]
+        for dimension, key in groups:
+            total = totals[user_id, dimension, key]
+            total[0] += 1
+            total[1] += hours
+            total[2] += (added_on - EPOCH).days
+
+    LibraryStat.objects.bulk_create(
+        (
+            LibraryStat(
+                user_id=user_id, dimension=dimension, key=key,
+                entries=entries, hours_played=hours, added_days=days,
+            )
+            for (user_id, dimension, key), (entries, hours, days) in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_library_row'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='library',
+            name='added_on',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AddField(
+            model_name='libraryrow',
+            name='added_on',
+            field=models.DateField(default=django.utils.timezone.localdate),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_added_on, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='LibraryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('platform', 'Platform'), ('medium', 'Medium'), ('priority', 'Priority')], max_length=10)),
+                ('key', models.IntegerField()),
+                ('entries', models.IntegerField(default=0)),
+                ('hours_played', models.FloatField(default=0)),
+                ('added_days', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'dimension', 'key'), name='stat_user_group_unique')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,170 @@
+# Generated by Django 6.0 on 2026-10-18 18:05
+
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import migrations, models
+
+import tracker.fields
+
+FTS_TABLE = "tracker_game_fts"
+
+# The triggers of 0007: SQLite rebuilds tracker_game to add the key column
+# and its unique index, and the rebuild drops them
+TRIGGER_SQL = [
+    "DROP TRIGGER IF EXISTS tracker_game_fts_insert",
+    "DROP TRIGGER IF EXISTS tracker_game_fts_delete",
+    "DROP TRIGGER IF EXISTS tracker_game_fts_update",
+    f"""
+    CREATE TRIGGER tracker_game_fts_insert AFTER INSERT ON tracker_game BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER tracker_game_fts_delete AFTER DELETE ON tracker_game BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER tracker_game_fts_update AFTER UPDATE OF title ON tracker_game BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def restore_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+    for sql in TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+_QUOTES_RE = re.compile(r"['‘’`\"“”]")
+_SEPARATORS_RE = re.compile(r"[\W_]+")
+
+
+def normalize_key(text):
+    # tracker.fields.normalize_key as of this migration
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    key = _SEPARATORS_RE.sub(" ", _QUOTES_RE.sub("", text)).strip()
+    return key or text.strip()
+
+
+def _survivors(groups):
+    """{duplicate pk: surviving pk} for groups of pks, the oldest surviving."""
+    return {pk: min(pks) for pks in groups.values() for pk in pks if pk != min(pks)}
+
+
+def merge_and_key(apps, schema_editor):
+    """
+    tracker.catalog.merge_duplicates as of this migration: merge games
+    sharing a title key, then editions of one game sharing a name key,
+    into the oldest of each group, and store every key.
+    """
+    connection = schema_editor.connection
+    db = connection.alias
+    Game = apps.get_model("tracker", "Game")
+    Edition = apps.get_model("tracker", "Edition")
+    Library = apps.get_model("tracker", "Library")
+    LibraryRow = apps.get_model("tracker", "LibraryRow")
+    Platforms = Edition.platforms.through
+
+    title_keys, game_groups = {}, defaultdict(list)
+    for pk, title in Game.objects.using(db).values_list("pk", "title").iterator(chunk_size=2000):
+        title_keys[pk] = normalize_key(title)
+        game_groups[title_keys[pk]].append(pk)
+    game_target = _survivors(game_groups)
+
+    name_keys, edition_groups = {}, defaultdict(list)
+    editions = Edition.objects.using(db).values_list("pk", "game_id", "name")
+    for pk, game_id, name in editions.iterator(chunk_size=2000):
+        name_keys[pk] = normalize_key(name)
+        edition_groups[game_target.get(game_id, game_id), name_keys[pk]].append(pk)
+    edition_target = _survivors(edition_groups)
+
+    merged_into = defaultdict(list)
+    for pk, survivor in edition_target.items():
+        merged_into[survivor].append(pk)
+
+    for survivor, pks in merged_into.items():
+        Library.objects.using(db).filter(edition_id__in=pks).update(edition_id=survivor)
+        Platforms.objects.using(db).bulk_create(
+            [
+                Platforms(edition_id=survivor, platform_id=platform_id)
+                for platform_id in Platforms.objects.using(db).filter(edition_id__in=pks)
+                .values_list("platform_id", flat=True).distinct()
+            ],
+            ignore_conflicts=True,
+        )
+    Edition.objects.using(db).filter(pk__in=edition_target).delete()
+    for pk, survivor in game_target.items():
+        Edition.objects.using(db).filter(game_id=pk).update(game_id=survivor)
+
+    # LibraryRows copy their entry's game title and edition name, and go
+    # with their game: update them before the duplicates go
+    touched = set(merged_into) | set(
+        Edition.objects.using(db).filter(game_id__in=set(game_target.values())).values_list("pk", flat=True)
+    )
+    for edition in Edition.objects.using(db).filter(pk__in=touched).select_related("game"):
+        LibraryRow.objects.using(db).filter(library__edition_id=edition.pk).update(
+            game_id=edition.game_id, game_title=edition.game.title, edition_name=edition.name,
+        )
+    Game.objects.using(db).filter(pk__in=game_target).delete()
+
+    # One parameterised UPDATE per row: bulk_update's CASE expression costs
+    # more to build than the writes for the whole catalog
+    quote = connection.ops.quote_name
+    for model, field, keys, merged in (
+        (Game, "title_key", title_keys, game_target),
+        (Edition, "name_key", name_keys, edition_target),
+    ):
+        sql = (
+            f"UPDATE {quote(model._meta.db_table)} SET {quote(model._meta.get_field(field).column)} = %s "
+            f"WHERE {quote(model._meta.pk.column)} = %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [(key, pk) for pk, key in keys.items() if pk not in merged])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_library_added_on_library_stats'),
+    ]
+
+    operations = [
+        # (restores the triggers when unapplied)
+        migrations.RunPython(migrations.RunPython.noop, restore_fts),
+        migrations.AddField(
+            model_name='game',
+            name='title_key',
+            field=tracker.fields.NormalizedKeyField(default='', max_length=200, source='title'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='edition',
+            name='name_key',
+            field=tracker.fields.NormalizedKeyField(default='', max_length=100, source='name'),
+            preserve_default=False,
+        ),
+        # Merge existing duplicates before the keys become unique
+        migrations.RunPython(merge_and_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='game',
+            name='title_key',
+            field=tracker.fields.NormalizedKeyField(max_length=200, source='title', unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='edition',
+            constraint=models.UniqueConstraint(fields=('game', 'name_key'), name='edition_game_name_key_unique'),
+        ),
+        migrations.RunPython(restore_fts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+from .fields import NormalizedKeyField
 
 class Platform(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -15,10 +18,17 @@ class Platform(models.Model):
 
 class Game(models.Model):
     title = models.CharField(max_length=200)
+    # one Game per title key: see tracker.catalog
+    title_key = NormalizedKeyField(source="title", max_length=200, unique=True)
     release_year = models.IntegerField(null=True, blank=True)
     developer = models.CharField(max_length=200, blank=True)
     publisher = models.CharField(max_length=200, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["title"], name="game_title_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.release_year})"
 
@@ -28,10 +38,27 @@ class Edition(models.Model):
     region = models.CharField(max_length=50, blank=True)
     release_date = models.DateField(null=True, blank=True)
     platforms = models.ManyToManyField(Platform, related_name="editions")
+    name_key = NormalizedKeyField(source="name", max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["game", "name_key"], name="edition_game_name_key_unique"),
+        ]
 
     def __str__(self):
         return f"{self.game.title} - {self.name}"
 
+STATUS_BADGE_CLASSES = {
+    "wishlist": "badge-wishlist",
+    "backlog": "badge-backlog",
+    "paused": "badge-paused",
+    "in_progress": "badge-in_progress",
+    "completed": "badge-completed",
+    "shelved": "badge-shelved",
+    "abandoned": "badge-abandoned",
+    "not_started": "badge-backlog",
+}
+
 class Status(models.Model):
     key = models.CharField(max_length=50, unique=True)
     label = models.CharField(max_length=100)
@@ -42,17 +69,7 @@ class Status(models.Model):
 
     @property
     def badge_class(self):
-        mapping = {
-            "wishlist": "badge-wishlist",
-            "backlog": "badge-backlog",
-            "paused": "badge-paused",
-            "in_progress": "badge-in_progress",
-            "completed": "badge-completed",
-            "shelved": "badge-shelved",
-            "abandoned": "badge-abandoned",
-            "not_started": "badge-backlog",
-        }
-        return mapping.get(self.key, "badge-secondary")
+        return STATUS_BADGE_CLASSES.get(self.key, "badge-secondary")
     
 class Medium(models.Model):
     name = models.CharField(max_length=50)
@@ -82,8 +99,116 @@ class Library(models.Model):
     notes = models.TextField(blank=True)
     start_date = models.DateField(null=True, blank=True)
     finish_date = models.DateField(null=True, blank=True)
+    added_on = models.DateField(default=timezone.localdate)
     mediums = models.ManyToManyField(Medium, blank=True)
     subscription_services = models.ManyToManyField(SubscriptionService, blank=True)
 
+    class Meta:
+        # Every list query is scoped to one user, so each index leads with
+        # user and follows the filter it serves (see LibraryListView).
+        indexes = [
+            models.Index(fields=["user", "status", "priority"], name="library_user_status_idx"),
+            models.Index(fields=["user", "platform", "priority"], name="library_user_platform_idx"),
+            models.Index(fields=["user", "priority"], name="library_user_priority_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.edition} ({self.status.label})"
+
+
+class LibraryRow(models.Model):
+    """
+    Flattened copy of one Library entry, holding everything the library
+    list filters, sorts and shows. Kept in sync by tracker.readmodel.
+    """
+    library = models.OneToOneField(
+        Library, on_delete=models.CASCADE, primary_key=True, related_name="row"
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_index=False)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="+")
+    game_title = models.CharField(max_length=200)
+    edition_name = models.CharField(max_length=100)
+    platform = models.ForeignKey(Platform, on_delete=models.CASCADE, related_name="+", db_index=False)
+    platform_name = models.CharField(max_length=100)
+    status = models.ForeignKey(Status, on_delete=models.CASCADE, related_name="+", db_index=False)
+    status_key = models.CharField(max_length=50)
+    status_order = models.PositiveIntegerField()
+    status_label = models.CharField(max_length=100)
+    priority = models.IntegerField()
+    hours_played = models.FloatField()
+    # comma-packed ids, e.g. ",1,4," so one id can be matched with contains
+    medium_ids = models.CharField(max_length=255, blank=True)
+    service_ids = models.CharField(max_length=255, blank=True)
+    added_on = models.DateField()
+
+    class Meta:
+        # One index per sort option, each leading with user and ending in
+        # the pk tie-breaker (see SORT_ORDERINGS in tracker.views), so pages
+        # are read in index order; plus the platform/status filters.
+        indexes = [
+            models.Index(fields=["user", "status_order", "priority", "game_title", "library"], name="row_user_status_sort_idx"),
+            models.Index(fields=["user", "game_title", "library"], name="row_user_title_idx"),
+            models.Index(fields=["user", "platform_name", "game_title", "library"], name="row_user_platform_sort_idx"),
+            models.Index(fields=["user", "priority", "game_title", "library"], name="row_user_priority_sort_idx"),
+            models.Index(fields=["user", "platform", "status_order"], name="row_user_platform_idx"),
+            models.Index(fields=["user", "status", "priority"], name="row_user_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.game_title} ({self.platform_name})"
+
+    @property
+    def id(self):
+        return self.library_id
+
+    @property
+    def badge_class(self):
+        return STATUS_BADGE_CLASSES.get(self.status_key, "badge-secondary")
+
+    @staticmethod
+    def pack_ids(ids):
+        ids = sorted(ids)
+        return "," + ",".join(str(pk) for pk in ids) + "," if ids else ""
+
+    @staticmethod
+    def unpack_ids(packed):
+        return {int(pk) for pk in packed.strip(",").split(",") if pk}
+
+    def mediums(self):
+        from .reference import mediums
+        ids = self.unpack_ids(self.medium_ids)
+        return [m for m in mediums() if m.pk in ids]
+
+    def subscription_services(self):
+        from .reference import subscription_services
+        ids = self.unpack_ids(self.service_ids)
+        return [s for s in subscription_services() if s.pk in ids]
+
+
+class LibraryStat(models.Model):
+    """
+    One user's totals for one group of their library: a status, platform,
+    medium (0 for entries with none) or priority. Kept in step with
+    LibraryRow by tracker.stats, so the stats page reads one row per group.
+    """
+    STATUS = "status"
+    PLATFORM = "platform"
+    MEDIUM = "medium"
+    PRIORITY = "priority"
+    DIMENSIONS = [(STATUS, "Status"), (PLATFORM, "Platform"), (MEDIUM, "Medium"), (PRIORITY, "Priority")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_index=False)
+    dimension = models.CharField(max_length=10, choices=DIMENSIONS)
+    key = models.IntegerField()
+    entries = models.IntegerField(default=0)
+    hours_played = models.FloatField(default=0)
+    # sum of the entries' added_on dates, as days since 1970-01-01
+    added_days = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "dimension", "key"], name="stat_user_group_unique"),
+        ]
+
     def __str__(self):
-        return f"{self.user.username} - {self.edition} ({self.status.label})"
\ No newline at end of file
+        return f"{self.user_id} {self.dimension}={self.key}: {self.entries}"
@@ -0,0 +1,200 @@
+"""
+Keyset (cursor) pagination, and numbered pages with a cached total.
+
+Instead of ``OFFSET n`` a page is fetched with a WHERE clause on the sort
+key of the row it starts after (or before), so every page costs the same
+as the first one and no COUNT is needed. The ordering must be a total
+order, i.e. end in a unique field such as "pk".
+
+Numbered pages need the total. CachedCountPaginator keeps it in Django's
+cache, so turning pages doesn't count the rows again, and can stop
+counting after a set number of rows for very large results.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from . import caching
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(token) from exc
+    if not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def sort_key(obj, ordering):
+    """Values of `ordering`'s fields on `obj`, following "__" paths."""
+    values = []
+    for field in ordering:
+        value = obj
+        for attr in field.lstrip("-").split("__"):
+            value = getattr(value, attr)
+        values.append(value)
+    return values
+
+
+def keyset_q(ordering, values, reverse=False):
+    """
+    Q matching rows that sort strictly after `values` under `ordering`
+    (strictly before, if `reverse`).
+    """
+    if len(values) != len(ordering):
+        raise InvalidCursor(values)
+
+    q = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != reverse
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        q |= equal & step
+        equal &= Q(**{name: value})
+    return q
+
+
+def filter_from_cursor(queryset, ordering, token, reverse=False):
+    """
+    `queryset` restricted by keyset_q to the rows after (or before) the
+    cursor `token`. Values the sort fields can't take, e.g. text where a
+    number or date belongs, make it an InvalidCursor.
+    """
+    try:
+        return queryset.filter(keyset_q(ordering, decode_cursor(token), reverse=reverse))
+    except (ValueError, TypeError, ValidationError) as exc:
+        raise InvalidCursor(token) from exc
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+
+class KeysetPage:
+    """The slice of rows shown for one cursor request."""
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return encode_cursor(sort_key(self.object_list[-1], self.ordering))
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return encode_cursor(sort_key(self.object_list[0], self.ordering))
+        return None
+
+
+def keyset_page(queryset, ordering, per_page, after=None, before=None):
+    """
+    Fetch one page of `queryset` ordered by `ordering`, starting after the
+    `after` cursor or ending before the `before` cursor. Reads one extra
+    row to tell whether another page follows.
+    """
+    ordering = list(ordering)
+
+    if before:
+        queryset = filter_from_cursor(queryset, ordering, before, reverse=True)
+        rows = list(queryset.order_by(*reverse_ordering(ordering))[:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(rows, ordering, has_next=True, has_previous=has_previous)
+
+    if after:
+        queryset = filter_from_cursor(queryset, ordering, after)
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    return KeysetPage(
+        rows[:per_page], ordering,
+        has_next=len(rows) > per_page,
+        has_previous=bool(after),
+    )
+
+
+class CachedCountPage(Page):
+    def has_next(self):
+        # An estimated total stops short of the rows, which carry on past
+        # its last numbered page
+        if self.paginator.estimated and self.number == self.paginator.num_pages:
+            return True
+        return super().has_next()
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator keeping its total under `count_key` in Django's cache; the
+    key has to change whenever the total can (data version, filters).
+    Without a key it counts every time, like Paginator.
+
+    With `estimate_above`, counting stops after that many rows: a larger
+    total is reported as `estimate_above`, with `estimated` set once the
+    count is known, and pages past it are reached by cursor.
+    """
+
+    def __init__(self, object_list, per_page, *args, count_key=None, estimate_above=None,
+                 timeout=caching.PAGE_CACHE_TIMEOUT, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.count_key = count_key
+        self.estimate_above = estimate_above
+        self.timeout = timeout
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        total = cache.get(self.count_key) if self.count_key else None
+        if total is None:
+            total = self._count()
+            if self.count_key:
+                cache.set(self.count_key, total, self.timeout)
+        count, self.estimated = total
+        return count
+
+    def _count(self):
+        """(count, estimated) from the database."""
+        queryset = self.object_list.order_by()
+        if self.estimate_above is None:
+            return queryset.count(), False
+        # COUNT over a LIMIT subquery reads at most estimate_above + 1 rows
+        counted = queryset[:self.estimate_above + 1].count()
+        return min(counted, self.estimate_above), counted > self.estimate_above
+
+    def _get_page(self, *args, **kwargs):
+        return CachedCountPage(*args, **kwargs)
@@ -0,0 +1,160 @@
+"""
+Maintenance of LibraryRow, the flattened read model behind the library list.
+
+Rows are rebuilt from their Library entry whenever the entry or its
+mediums / subscription services change, and patched in place when a
+shared row they copy from (Game, Edition, Platform, Status) is edited.
+The wiring lives in tracker.signals; `rebuild` and `find_inconsistencies`
+back the rebuild_library_rows and check_library_rows commands.
+
+Every row written or dropped here is also passed to tracker.stats, which
+keeps the per-user rollups in step with the rows.
+
+Inside a `deferred()` block, syncs are collected and run once when the
+block ends, so saving an entry and then its links rebuilds the row once.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from . import stats
+from .models import Library, LibraryRow
+
+ROW_FIELDS = [
+    "user", "game", "game_title", "edition_name",
+    "platform", "platform_name",
+    "status", "status_key", "status_order", "status_label",
+    "priority", "hours_played", "medium_ids", "service_ids", "added_on",
+]
+
+
+def _with_related(queryset):
+    return queryset.select_related(
+        "edition__game", "platform", "status"
+    ).prefetch_related("mediums", "subscription_services")
+
+
+def build_row(library, medium_ids=None, service_ids=None):
+    """
+    The LibraryRow a (fully loaded) Library entry should have. Callers that
+    already know the entry's medium / service ids can pass them instead of
+    prefetching the m2m relations.
+    """
+    if medium_ids is None:
+        medium_ids = [m.pk for m in library.mediums.all()]
+    if service_ids is None:
+        service_ids = [s.pk for s in library.subscription_services.all()]
+    return LibraryRow(
+        library=library,
+        user_id=library.user_id,
+        game_id=library.edition.game_id,
+        game_title=library.edition.game.title,
+        edition_name=library.edition.name,
+        platform_id=library.platform_id,
+        platform_name=library.platform.name,
+        status_id=library.status_id,
+        status_key=library.status.key,
+        status_order=library.status.order,
+        status_label=library.status.label,
+        priority=library.priority,
+        hours_played=library.hours_played,
+        medium_ids=LibraryRow.pack_ids(medium_ids),
+        service_ids=LibraryRow.pack_ids(service_ids),
+        added_on=library.added_on,
+    )
+
+
+def add_rows(rows, batch_size=None):
+    """Insert the rows of new Library entries (for bulk writers, which send no signals)."""
+    rows = LibraryRow.objects.bulk_create(rows, batch_size=batch_size)
+    stats.apply(new_rows=rows)
+    return rows
+
+
+_pending = contextvars.ContextVar("tracker_readmodel_pending", default=None)
+
+
+@contextmanager
+def deferred():
+    """Hold back every sync() inside the block and run them as one at its end."""
+    if _pending.get() is not None:
+        yield  # already inside a deferred() block
+        return
+    library_ids = set()
+    token = _pending.set(library_ids)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    sync(library_ids)
+
+
+def sync(library_ids):
+    """Rebuild the rows for these Library ids, dropping rows of deleted entries."""
+    library_ids = set(library_ids)
+    if not library_ids:
+        return
+    pending = _pending.get()
+    if pending is not None:
+        pending.update(library_ids)
+        return
+    old_rows = list(LibraryRow.objects.filter(pk__in=library_ids).only(*stats.ROW_FIELDS))
+    rows = [build_row(lib) for lib in _with_related(Library.objects.filter(pk__in=library_ids))]
+    LibraryRow.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["library"],
+        update_fields=ROW_FIELDS,
+    )
+    gone = library_ids - {row.library_id for row in rows}
+    if gone:
+        LibraryRow.objects.filter(pk__in=gone).delete()
+    stats.apply(old_rows, rows)
+
+
+def _id_batches(queryset, batch_size):
+    ids = queryset.order_by("pk").values_list("pk", flat=True)
+    batch = []
+    for pk in ids.iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild(queryset=None, batch_size=1000):
+    """Rebuild rows for `queryset` (default: every Library). Returns the count."""
+    if queryset is None:
+        queryset = Library.objects.all()
+    count = 0
+    for batch in _id_batches(queryset, batch_size):
+        sync(batch)
+        count += len(batch)
+    return count
+
+
+def find_inconsistencies(queryset=None, batch_size=1000):
+    """
+    Compare each entry's row with what it should be. Returns a dict of
+    Library ids: "missing" (no row) and "stale" (row differs).
+    """
+    if queryset is None:
+        queryset = Library.objects.all()
+
+    problems = {"missing": [], "stale": []}
+    for batch in _id_batches(queryset, batch_size):
+        existing = LibraryRow.objects.in_bulk(batch)
+        for lib in _with_related(Library.objects.filter(pk__in=batch)):
+            row = existing.get(lib.pk)
+            if row is None:
+                problems["missing"].append(lib.pk)
+                continue
+            expected = build_row(lib)
+            if any(
+                getattr(row, field.attname) != getattr(expected, field.attname)
+                for field in LibraryRow._meta.concrete_fields
+            ):
+                problems["stale"].append(lib.pk)
+    return problems
@@ -0,0 +1,82 @@
+"""
+Process-local cache of the reference (lookup) tables: Platform, Status,
+Medium and SubscriptionService.
+
+Each process keeps the rows in memory together with the version stamp it
+loaded them under. The current stamp lives in Django's cache and is
+replaced whenever one of these tables changes (see tracker.signals), so
+every worker notices the change on its next read and reloads. With more
+than one worker process, CACHES must point at a cache they share.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Platform, Status, Medium, SubscriptionService
+
+VERSION_KEY = "tracker:reference:version"
+
+TABLES = {
+    "platforms": Platform,
+    "statuses": Status,
+    "mediums": Medium,
+    "subscription_services": SubscriptionService,
+}
+
+_lock = threading.Lock()
+_loaded = {"version": None, "tables": {}}
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Nothing stored (first start, or evicted): start a new stamp
+        # rather than trusting whatever this process loaded before.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _set_new_version():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def bump_version():
+    """
+    Invalidate every process's copy. Bumped again on commit so a process
+    that reloaded mid-transaction cannot keep the pre-commit rows.
+    """
+    _set_new_version()
+    transaction.on_commit(_set_new_version)
+
+
+def _tables():
+    version = current_version()
+    if _loaded["version"] != version:
+        with _lock:
+            if _loaded["version"] != version:
+                _loaded["tables"] = {
+                    name: tuple(model.objects.all())
+                    for name, model in TABLES.items()
+                }
+                _loaded["version"] = version
+    return _loaded["tables"]
+
+
+def platforms():
+    return _tables()["platforms"]
+
+
+def statuses():
+    return _tables()["statuses"]
+
+
+def mediums():
+    return _tables()["mediums"]
+
+
+def subscription_services():
+    return _tables()["subscription_services"]
@@ -0,0 +1,186 @@
+"""
+Read replicas for the read-only library views.
+
+settings.TRACKER_READ_REPLICAS names database aliases holding copies of
+the primary. Views decorated with replica_reads (the list and its search,
+export, stats and the JSON API) run their tracker queries against one of
+them; everything else, and every write, uses the primary.
+
+The copies lag the primary, so a user who changed their library within
+settings.TRACKER_REPLICA_PIN_SECONDS reads from the primary: their data
+version (tracker.caching) is the time of their last change. The lookup
+tables and the auth and session tables are always read from the primary:
+they are cached under version stamps the primary bumps, and a lagging
+copy would cache old rows under a new stamp.
+
+Replicas here are SQLite files refreshed by sync() (the sync_replicas
+command), a stand-in for real replication.
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import caching
+
+_replica = ContextVar("tracker_replica", default=None)
+
+# Always read from the primary (see the module docstring)
+PRIMARY_MODELS = {"platform", "status", "medium", "subscriptionservice"}
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias and model._meta.app_label == "tracker" and model._meta.model_name not in PRIMARY_MODELS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Not the instance's database: objects read from a replica save
+        # to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.TRACKER_READ_REPLICAS:
+            return False  # copied from the primary, schema included
+        return None
+
+
+@contextmanager
+def reading_from(alias):
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def pinned_to_primary(user_id):
+    """Whether the user's last change may not have reached the replicas yet."""
+    changed = caching.user_version(user_id)
+    return time.time_ns() - changed < settings.TRACKER_REPLICA_PIN_SECONDS * 1_000_000_000
+
+
+def replica_for(request):
+    """A replica alias to serve this request's reads from, or None for the primary."""
+    replicas = settings.TRACKER_READ_REPLICAS
+    if not replicas or request.method not in ("GET", "HEAD"):
+        return None
+    if not request.user.is_authenticated or pinned_to_primary(request.user.pk):
+        return None
+    return random.choice(replicas)
+
+
+_DONE = object()
+
+
+def _stream(alias, chunks):
+    # Streamed bodies run their queries after the view has returned
+    chunks = iter(chunks)
+    while True:
+        with reading_from(alias):
+            chunk = next(chunks, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+async def _astream(alias, chunks):
+    chunks = aiter(chunks)
+    while True:
+        with reading_from(alias):
+            try:
+                chunk = await anext(chunks)
+            except StopAsyncIteration:
+                return
+        yield chunk
+
+
+def _finish(alias, response):
+    """Run the reads a response makes after the view, on the same replica."""
+    if getattr(response, "streaming", False):
+        if response.is_async:
+            response.streaming_content = _astream(alias, response.streaming_content)
+        else:
+            response.streaming_content = _stream(alias, response.streaming_content)
+    elif hasattr(response, "render") and not response.is_rendered:
+        with reading_from(alias):
+            response.render()
+    return response
+
+
+def replica_reads(view):
+    """Serve a read-only view from a replica when replica_for() allows it."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            alias = replica_for(request)
+            if alias is None:
+                return await view(request, *args, **kwargs)
+            with reading_from(alias):
+                response = await view(request, *args, **kwargs)
+            return _finish(alias, response)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            alias = replica_for(request)
+            if alias is None:
+                return view(request, *args, **kwargs)
+            with reading_from(alias):
+                response = view(request, *args, **kwargs)
+            return _finish(alias, response)
+    return wrapper
+
+
+# --- Sync stand-in ---
+
+def sync(alias, using=DEFAULT_DB_ALIAS):
+    """
+    Copy the primary into replica `alias` with SQLite's online backup,
+    which reads one consistent snapshot while writers carry on. Readers
+    of the replica wait (busy timeout) while the copy is written.
+    """
+    source = connections[using]
+    source.ensure_connection()
+    with closing(sqlite3.connect(settings.DATABASES[alias]["NAME"], timeout=20)) as target:
+        source.connection.backup(target)
+
+
+def sync_all(using=DEFAULT_DB_ALIAS):
+    for alias in settings.TRACKER_READ_REPLICAS:
+        sync(alias, using)
+
+
+class PeriodicSync(threading.Thread):
+    """sync_all() every `interval` seconds until stop()."""
+
+    def __init__(self, interval, using=DEFAULT_DB_ALIAS):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.using = using
+        self.stopped = threading.Event()
+        self.syncs = 0
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                sync_all(self.using)
+                self.syncs += 1
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
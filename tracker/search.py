@@ -0,0 +1,94 @@
+"""
+Game title search.
+
+Titles are indexed in an SQLite FTS5 table (``tracker_game_fts``) that
+migration 0007 keeps in sync with ``tracker_game`` through triggers. Each
+word the user types is matched as a token prefix, so "wit 3" finds
+"The Witcher 3". When the FTS table is not available (another database
+backend, or an SQLite build without FTS5) we fall back to ``icontains``.
+"""
+
+import re
+
+from django.db import connections, DatabaseError
+from django.db.models.expressions import RawSQL
+
+from .models import Game
+
+FTS_TABLE = "tracker_game_fts"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# alias -> bool, so the sqlite_master lookup only happens once per process
+_fts_available = {}
+
+
+def fts_available(using="default"):
+    if using not in _fts_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == "sqlite":
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                        [FTS_TABLE],
+                    )
+                    available = cursor.fetchone() is not None
+            except DatabaseError:
+                available = False
+        _fts_available[using] = available
+    return _fts_available[using]
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 MATCH expression: every word becomes a
+    quoted prefix term and all terms must match. Returns None when the
+    text has no searchable words.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def matching_game_ids(expression):
+    """Subquery of Game ids whose title matches an FTS expression."""
+    return RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+        [expression],
+    )
+
+
+def filter_by_title(queryset, text, game_field="edition__game"):
+    """
+    Restrict `queryset` to rows whose game title matches `text`.
+    `game_field` is the lookup path from the queryset's model to Game,
+    or None when `queryset` is a Game queryset.
+    """
+    id_lookup = f"{game_field}__in" if game_field else "pk__in"
+    title_lookup = f"{game_field}__title__icontains" if game_field else "title__icontains"
+
+    expression = match_expression(text)
+    if expression and fts_available(queryset.db):
+        return queryset.filter(**{id_lookup: matching_game_ids(expression)})
+    return queryset.filter(**{title_lookup: text})
+
+
+def first_matches(text, limit=20, using="default"):
+    """
+    [(pk, title)] of up to `limit` Games matching `text`, in no particular
+    order: the lookup stops at the first `limit` matches.
+    """
+    expression = match_expression(text)
+    if expression and fts_available(using):
+        games = Game.objects.using(using).filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s",
+                [expression, limit],
+            )
+        )
+    else:
+        games = Game.objects.using(using).filter(title__icontains=text)
+    return list(games.values_list("pk", "title")[:limit])
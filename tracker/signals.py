@@ -0,0 +1,137 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import autocomplete, caching, readmodel, reference, stats
+from .models import (
+    Game, Edition, Platform, Status,
+    Medium, SubscriptionService, Library, LibraryRow
+)
+
+
+# --- Reference data ---
+
+@receiver(post_save, sender=Platform)
+@receiver(post_save, sender=Status)
+@receiver(post_save, sender=Medium)
+@receiver(post_save, sender=SubscriptionService)
+@receiver(post_delete, sender=Platform)
+@receiver(post_delete, sender=Status)
+@receiver(post_delete, sender=Medium)
+@receiver(post_delete, sender=SubscriptionService)
+def reference_data_changed(sender, **kwargs):
+    reference.bump_version()
+
+
+@receiver(post_save, sender=Platform)
+def platform_saved(sender, instance, created, **kwargs):
+    if not created:
+        LibraryRow.objects.filter(platform=instance).update(platform_name=instance.name)
+
+
+@receiver(post_save, sender=Status)
+def status_saved(sender, instance, created, **kwargs):
+    if not created:
+        LibraryRow.objects.filter(status=instance).update(
+            status_key=instance.key,
+            status_order=instance.order,
+            status_label=instance.label,
+        )
+
+
+@receiver(post_delete, sender=Medium)
+def medium_deleted(sender, instance, **kwargs):
+    # The link rows were removed without an m2m_changed signal
+    rows = LibraryRow.objects.filter(medium_ids__contains=f",{instance.pk},")
+    resync_rows(rows)
+
+
+@receiver(post_delete, sender=SubscriptionService)
+def subscription_service_deleted(sender, instance, **kwargs):
+    rows = LibraryRow.objects.filter(service_ids__contains=f",{instance.pk},")
+    resync_rows(rows)
+
+
+def resync_rows(rows):
+    # Note the owners first: once synced, the rows no longer match
+    rows = list(rows.values_list("pk", "user_id"))
+    readmodel.sync([pk for pk, _ in rows])
+    bump_users([user_id for _, user_id in rows])
+
+
+# --- Per-user library data ---
+
+def bump_users(user_ids):
+    for user_id in set(user_ids):
+        caching.bump_user_version(user_id)
+
+
+@receiver(post_save, sender=Library)
+def library_saved(sender, instance, **kwargs):
+    readmodel.sync([instance.pk])
+    bump_users([instance.user_id])
+
+
+@receiver(pre_delete, sender=Library)
+def library_deleting(sender, instance, origin=None, **kwargs):
+    # The row is removed by the cascade, not by readmodel, so take it out
+    # of the rollups here. A deleted user's rollups go with the user.
+    if not isinstance(origin, User):
+        stats.apply(old_rows=LibraryRow.objects.filter(pk=instance.pk).only(*stats.ROW_FIELDS))
+
+
+@receiver(post_delete, sender=Library)
+def library_deleted(sender, instance, **kwargs):
+    bump_users([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Library.mediums.through)
+@receiver(m2m_changed, sender=Library.subscription_services.through)
+def library_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            readmodel.sync([instance.pk])
+            bump_users([instance.user_id])
+        return
+
+    # Changed from the Medium / SubscriptionService side: `pk_set` holds
+    # Library ids, except for clear(), where we note them beforehand.
+    if action == "pre_clear":
+        links = sender.objects.filter(**{instance._meta.model_name: instance})
+        instance._cleared_library_ids = list(links.values_list("library_id", flat=True))
+        return
+    if action == "post_clear":
+        library_ids = getattr(instance, "_cleared_library_ids", [])
+    elif action in ("post_add", "post_remove"):
+        library_ids = pk_set
+    else:
+        return
+
+    readmodel.sync(library_ids)
+    bump_users(
+        Library.objects.filter(pk__in=library_ids).values_list("user_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Edition)
+def catalog_changed(sender, instance, created, **kwargs):
+    # A new Game/Edition is in nobody's library yet; an edited one shows up
+    # on the pages of everyone who owns it.
+    if created:
+        return
+    if sender is Game:
+        rows = LibraryRow.objects.filter(game=instance)
+        rows.update(game_title=instance.title)
+    else:
+        rows = LibraryRow.objects.filter(library__edition=instance)
+        rows.update(edition_name=instance.name)
+    bump_users(rows.values_list("user_id", flat=True))
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Edition)
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Edition)
+def titles_changed(sender, **kwargs):
+    autocomplete.bump_version()
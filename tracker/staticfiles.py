@@ -0,0 +1,130 @@
+"""
+Static files: fingerprinted, precompressed at collectstatic, served with
+far-future caching.
+
+CompressedManifestStorage names every collected file after a hash of its
+contents (css/style.css -> css/style.1d2c3b4a5e6f.css, as Django's
+ManifestStaticFilesStorage) and writes .gz and, when the Brotli package
+is installed, .br copies of the text ones beside it. A hashed name never
+changes contents, so tracker.middleware.StaticFilesMiddleware serves
+them with an immutable, year-long Cache-Control and browsers stop
+revalidating them; it picks the smallest encoding the client accepts.
+
+Before collectstatic has run (development, tests) there is no manifest
+and files keep their plain names.
+"""
+
+import gzip
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz copies are written
+    brotli = None
+
+# Worth compressing; images and fonts already are
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".svg", ".txt", ".html", ".json", ".xml", ".ico"}
+
+# Content-Encoding -> file suffix, best first
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def compress(content):
+    """{encoding: bytes} for every variant smaller than `content`."""
+    variants = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(content, quality=11)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(content)}
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name  # not collected yet
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name:
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+
+        for hashed_name in dict.fromkeys(hashed):
+            if os.path.splitext(hashed_name)[1].lower() not in COMPRESSIBLE:
+                continue
+            with self.open(hashed_name) as original:
+                content = original.read()
+            for encoding, data in compress(content).items():
+                variant = hashed_name + ENCODINGS[encoding]
+                if self.exists(variant):
+                    self.delete(variant)
+                self._save(variant, ContentFile(data))
+                yield hashed_name, variant, True
+
+
+class StaticFile:
+    """One collected file and its precompressed variants."""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        self.content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.variants = {
+            encoding: Path(f"{path}{suffix}")
+            for encoding, suffix in ENCODINGS.items()
+            if Path(f"{path}{suffix}").is_file()
+        }
+
+    def choose(self, accept_encoding):
+        """(path, Content-Encoding or None) of the best variant the client accepts."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, path in self.variants.items():
+            if encoding in accepted:
+                return path, encoding
+        return self.path, None
+
+
+def accepted_encodings(header):
+    """Codings an Accept-Encoding header allows (any q but 0)."""
+    accepted = set()
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def collected_files(root):
+    """{path under STATIC_ROOT: StaticFile} for everything collectstatic wrote."""
+    root = Path(root)
+    manifest = root / ManifestStaticFilesStorage.manifest_name
+    hashed = set()
+    if manifest.is_file():
+        hashed = set(json.loads(manifest.read_text()).get("paths", {}).values())
+
+    files = {}
+    for path in root.rglob("*"):
+        if not path.is_file() or path.suffix in ENCODINGS.values():
+            continue
+        name = path.relative_to(root).as_posix()
+        files[name] = StaticFile(path, immutable=name in hashed)
+    return files
@@ -0,0 +1,208 @@
+"""
+Library statistics: per-user rollups (LibraryStat) and the stats page
+built from them.
+
+Each LibraryRow contributes one entry, its hours played and its added_on
+date to four groups: its status, platform, priority and each of its
+mediums (or NO_MEDIUM). tracker.readmodel passes every row it writes,
+replaces or drops through `apply`, which adds the difference to the
+affected groups, so the rollups track the rows without rescanning them.
+`rebuild` recomputes them with grouped aggregate queries and backs the
+rebuild_library_stats command.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum, Value
+from django.utils import timezone
+
+from . import reference
+from .models import Library, LibraryRow, LibraryStat
+
+EPOCH = date(1970, 1, 1)
+NO_MEDIUM = 0
+
+# The LibraryRow fields a row's contribution depends on
+ROW_FIELDS = ["user", "status", "platform", "priority", "hours_played", "medium_ids", "added_on"]
+
+COMPLETED_KEY = "completed"
+# Statuses whose entries no longer count towards the backlog's age
+FINISHED_KEYS = ("completed", "abandoned")
+
+
+def _groups(row):
+    yield LibraryStat.STATUS, row.status_id
+    yield LibraryStat.PLATFORM, row.platform_id
+    yield LibraryStat.PRIORITY, row.priority
+    for medium_id in LibraryRow.unpack_ids(row.medium_ids) or {NO_MEDIUM}:
+        yield LibraryStat.MEDIUM, medium_id
+
+
+def deltas(old_rows=(), new_rows=()):
+    """
+    {(user_id, dimension, key): [entries, hours, added_days]} changes that
+    turn `old_rows` into `new_rows`, leaving out groups that don't change.
+    """
+    totals = defaultdict(lambda: [0, 0.0, 0])
+    for sign, rows in ((-1, old_rows), (1, new_rows)):
+        for row in rows:
+            days = (row.added_on - EPOCH).days
+            for dimension, key in _groups(row):
+                total = totals[row.user_id, dimension, key]
+                total[0] += sign
+                total[1] += sign * row.hours_played
+                total[2] += sign * days
+    return {group: total for group, total in totals.items() if any(total)}
+
+
+def apply(old_rows=(), new_rows=()):
+    """Update the rollups for LibraryRows replaced by `new_rows`."""
+    for (user_id, dimension, key), (entries, hours, days) in deltas(old_rows, new_rows).items():
+        group = LibraryStat.objects.filter(user_id=user_id, dimension=dimension, key=key)
+        change = {
+            "entries": F("entries") + entries,
+            "hours_played": F("hours_played") + hours,
+            "added_days": F("added_days") + days,
+        }
+        if group.update(**change):
+            continue
+        try:
+            with transaction.atomic():
+                LibraryStat.objects.create(
+                    user_id=user_id, dimension=dimension, key=key,
+                    entries=entries, hours_played=hours, added_days=days,
+                )
+        except IntegrityError:
+            # created by a concurrent write since the update above
+            group.update(**change)
+
+
+# --- Grouped aggregates ---
+
+def aggregate(user_ids=None):
+    """Fresh LibraryStats for these users (default: all), from the rows."""
+    rows = LibraryRow.objects.all()
+    links = Library.mediums.through.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+        links = links.filter(library__user_id__in=user_ids)
+
+    def totals(prefix=""):
+        return {
+            "entries": Count("pk"),
+            "hours": Sum(f"{prefix}hours_played"),
+            "added": Sum(ExpressionWrapper(
+                F(f"{prefix}added_on") - Value(EPOCH), output_field=DurationField()
+            )),
+        }
+
+    grouped = [
+        (LibraryStat.STATUS, rows.values_list("user_id", "status_id").annotate(**totals()).order_by()),
+        (LibraryStat.PLATFORM, rows.values_list("user_id", "platform_id").annotate(**totals()).order_by()),
+        (LibraryStat.PRIORITY, rows.values_list("user_id", "priority").annotate(**totals()).order_by()),
+        (LibraryStat.MEDIUM, links.values_list("library__user_id", "medium_id").annotate(
+            **totals("library__row__")
+        ).order_by()),
+    ]
+    no_medium = rows.filter(medium_ids="").values_list("user_id").annotate(**totals())
+    grouped.append((LibraryStat.MEDIUM, (
+        (user_id, NO_MEDIUM, *values) for user_id, *values in no_medium.order_by()
+    )))
+    return [
+        LibraryStat(
+            user_id=user_id, dimension=dimension, key=key,
+            entries=entries, hours_played=hours or 0.0,
+            added_days=(added or timedelta()).days,
+        )
+        for dimension, results in grouped
+        for user_id, key, entries, hours, added in results
+    ]
+
+
+def rebuild(user_ids=None):
+    """Replace the rollups of these users (default: all). Returns the group count."""
+    with transaction.atomic():
+        existing = LibraryStat.objects.all()
+        if user_ids is not None:
+            existing = existing.filter(user_id__in=user_ids)
+        existing.delete()
+        return len(LibraryStat.objects.bulk_create(aggregate(user_ids), batch_size=1000))
+
+
+def find_inconsistencies(user_ids=None):
+    """Groups whose stored rollup differs from a fresh aggregate."""
+    def key(stat):
+        return stat.user_id, stat.dimension, stat.key
+
+    stored = LibraryStat.objects.filter(entries__gt=0)
+    if user_ids is not None:
+        stored = stored.filter(user_id__in=user_ids)
+    stored = {key(stat): stat for stat in stored}
+    fresh = {key(stat): stat for stat in aggregate(user_ids)}
+
+    problems = []
+    for group in stored.keys() | fresh.keys():
+        old, new = stored.get(group), fresh.get(group)
+        if (
+            old is None or new is None
+            or old.entries != new.entries
+            or old.added_days != new.added_days
+            or abs(old.hours_played - new.hours_played) > 0.01
+        ):
+            problems.append(group)
+    return sorted(problems)
+
+
+# --- Stats page ---
+
+def summary(user, today=None):
+    """Everything the stats page shows, from the user's rollups alone."""
+    today_days = ((today or timezone.localdate()) - EPOCH).days
+    groups = defaultdict(dict)
+    for stat in LibraryStat.objects.filter(user=user, entries__gt=0):
+        groups[stat.dimension][stat.key] = stat
+
+    def rows(dimension, objects):
+        found = groups[dimension]
+        return [
+            {"name": str(obj), "entries": found[obj.pk].entries,
+             "hours": found[obj.pk].hours_played, "stat": found[obj.pk], "object": obj}
+            for obj in objects if obj.pk in found
+        ]
+
+    by_status = rows(LibraryStat.STATUS, reference.statuses())
+    for row in by_status:
+        row["average_age"] = today_days - row["stat"].added_days / row["entries"]
+
+    by_medium = rows(LibraryStat.MEDIUM, reference.mediums())
+    if NO_MEDIUM in groups[LibraryStat.MEDIUM]:
+        stat = groups[LibraryStat.MEDIUM][NO_MEDIUM]
+        by_medium.append({"name": "None", "entries": stat.entries, "hours": stat.hours_played})
+
+    by_priority = [
+        {"priority": priority, "entries": stat.entries, "hours": stat.hours_played}
+        for priority, stat in sorted(groups[LibraryStat.PRIORITY].items())
+    ]
+
+    total = sum(row["entries"] for row in by_status)
+    completed = sum(row["entries"] for row in by_status if row["object"].key == COMPLETED_KEY)
+    backlog = [row for row in by_status if row["object"].key not in FINISHED_KEYS]
+    backlog_entries = sum(row["entries"] for row in backlog)
+    return {
+        "total_entries": total,
+        "total_hours": sum(row["hours"] for row in by_status),
+        "completion_rate": completed / total if total else None,
+        "backlog_entries": backlog_entries,
+        "backlog_age": (
+            sum(row["average_age"] * row["entries"] for row in backlog) / backlog_entries
+            if backlog_entries else None
+        ),
+        "by_status": by_status,
+        "by_platform": sorted(
+            rows(LibraryStat.PLATFORM, reference.platforms()), key=lambda row: -row["hours"]
+        ),
+        "by_medium": by_medium,
+        "by_priority": by_priority,
+    }
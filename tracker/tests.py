@@ -1,3 +1,1792 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import closing
+from itertools import count as counter
+from datetime import date
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import cache
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse, QueryDict, StreamingHttpResponse
+from django.conf import settings
+from django.db import IntegrityError, connection, router, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from .models import (
+    Game, Edition, Platform, Status,
+    Medium, SubscriptionService, Library, LibraryRow, LibraryStat
+)
+from . import (
+    autocomplete, benchmarks, caching, catalog, checks, facets, importer, metrics, readmodel,
+    reference, replicas, search, staticfiles, stats, urls,
+)
+from .fields import normalize_key
+from .forms import LibraryForm
+from .pagination import CachedCountPaginator, encode_cursor
+from .views import LibraryListView
+
+
+_game_numbers = counter()
+
+
+def make_library(user, count, platform, status, mediums=(), services=()):
+    """Create `count` library entries for `user`, each with its own game."""
+    entries = []
+    for i in range(count):
+        game = Game.objects.create(title=f"Game {user.pk}-{next(_game_numbers):05d}")
+        edition = Edition.objects.create(game=game, name="Standard")
+        lib = Library.objects.create(
+            user=user,
+            edition=edition,
+            platform=platform,
+            status=status,
+            priority=(i % 10) + 1,
+        )
+        lib.mediums.set(mediums)
+        lib.subscription_services.set(services)
+        entries.append(lib)
+    return entries
+
+
+class LibraryListQueryBudgetTests(TestCase):
+    # session, user, count and rows, plus the filter panel's facet counts
+    # when they aren't cached; medium/service names and the filter-panel
+    # lookup tables come from tracker.reference
+    QUERY_BUDGET = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="tester", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.mediums = [Medium.objects.create(name="Digital"), Medium.objects.create(name="Disc")]
+        cls.services = [SubscriptionService.objects.create(name="Game Pass")]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def count_list_queries(self, **params):
+        reference.platforms()  # warm the reference-data cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("library_list"), params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        make_library(self.user, 3, self.platform, self.status, self.mediums, self.services)
+        small = self.count_list_queries(page_size=100)
+
+        make_library(self.user, 60, self.platform, self.status, self.mediums, self.services)
+        large = self.count_list_queries(page_size=100)
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.QUERY_BUDGET)
+
+    def test_query_budget_for_every_sort(self):
+        make_library(self.user, 25, self.platform, self.status, self.mediums, self.services)
+        for sort in ["", "name", "name_desc", "platform", "platform_desc",
+                     "status", "status_desc", "priority", "priority_desc"]:
+            with self.subTest(sort=sort):
+                self.assertLessEqual(
+                    self.count_list_queries(sort=sort, page_size=100),
+                    self.QUERY_BUDGET,
+                )
+
+
+class ReferenceDataCacheTests(TestCase):
+    def test_cached_until_a_table_changes(self):
+        Platform.objects.create(name="PC", type="PC")
+        self.assertEqual([p.name for p in reference.platforms()], ["PC"])
+        with self.assertNumQueries(0):
+            reference.platforms()
+            reference.statuses()
+
+        Platform.objects.create(name="Mac", type="PC")
+        self.assertEqual([p.name for p in reference.platforms()], ["PC", "Mac"])
+
+        Platform.objects.filter(name="Mac").get().delete()
+        self.assertEqual([p.name for p in reference.platforms()], ["PC"])
+
+    def test_stale_when_version_changes_elsewhere(self):
+        Medium.objects.create(name="Digital")
+        reference.mediums()
+        # another process bumped the shared stamp
+        Medium.objects.update(name="Download")
+        reference.bump_version()
+        self.assertEqual([m.name for m in reference.mediums()], ["Download"])
+
+    def test_form_choices_come_from_cache(self):
+        platform = Platform.objects.create(name="PC", type="PC")
+        status = Status.objects.create(key="backlog", label="Backlog")
+        medium = Medium.objects.create(name="Digital")
+        reference.platforms()
+        with self.assertNumQueries(0):
+            form = LibraryForm()
+            html = form.as_p()
+        self.assertIn(f'<option value="{platform.pk}">PC</option>', html)
+        self.assertIn(f'<option value="{status.pk}">Backlog</option>', html)
+        self.assertIn(f'value="{medium.pk}"', html)
+
+
+class LibraryPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cached", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.medium = Medium.objects.create(name="Digital")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.lib, = make_library(self.user, 1, self.platform, self.status)
+
+    def get(self, **params):
+        return self.client.get(reverse("library_list"), params)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.get(sort="name", page_size=10)
+        self.assertEqual(first["X-Page-Cache"], "miss")
+        with self.assertNumQueries(2):  # session + user only
+            second = self.get(page_size=10, sort="name")
+        self.assertEqual(second["X-Page-Cache"], "hit")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(caching.page_cache_stats()["hits"], 1)
+        self.assertEqual(caching.page_cache_stats()["misses"], 1)
+
+    def test_writes_invalidate(self):
+        self.get()
+        self.lib.priority = 9
+        self.lib.save()
+        self.assertEqual(self.get()["X-Page-Cache"], "miss")
+
+        self.lib.mediums.add(self.medium)
+        response = self.get()
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Digital")
+
+        self.lib.edition.game.title = "Renamed"
+        self.lib.edition.game.save()
+        self.assertContains(self.get(), "Renamed")
+
+    def test_other_users_writes_do_not_invalidate(self):
+        self.get()
+        other = User.objects.create_user(username="someone", password="pw")
+        make_library(other, 1, self.platform, self.status)
+        self.assertEqual(self.get()["X-Page-Cache"], "hit")
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse("page_cache_stats")).status_code, 302)
+        staff = User.objects.create_user(username="staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(
+            set(self.client.get(reverse("page_cache_stats")).json()),
+            {"hits", "misses", "hit_rate"},
+        )
+
+    def test_account_changes_are_not_served_stale(self):
+        self.assertNotContains(self.get(), 'href="/admin/"')
+        self.user.is_staff = True
+        self.user.username = "renamed"
+        self.user.save()
+        response = self.get()
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, 'href="/admin/"')
+        self.assertContains(response, "Welcome, Renamed")
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        self.assertEqual([e.id for e in checks.check_shared_cache(None)], ["tracker.E001"])
+        with tempfile.TemporaryDirectory() as tmp, override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp,
+        }}):
+            self.assertEqual(checks.check_shared_cache(None), [])
+
+
+class LibraryReadModelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.medium = Medium.objects.create(name="Digital")
+        cls.service = SubscriptionService.objects.create(name="Game Pass")
+
+    def setUp(self):
+        self.lib, = make_library(self.user, 1, self.platform, self.status, [self.medium])
+
+    def assertConsistent(self):
+        self.assertEqual(readmodel.find_inconsistencies(), {"missing": [], "stale": []})
+
+    def test_row_follows_writes(self):
+        row = LibraryRow.objects.get(pk=self.lib.pk)
+        self.assertEqual(row.game_title, self.lib.edition.game.title)
+        self.assertEqual(row.medium_ids, f",{self.medium.pk},")
+        self.assertEqual(row.mediums(), [self.medium])
+
+        self.lib.priority = 9
+        self.lib.save()
+        self.lib.subscription_services.add(self.service)
+        self.service.library_set.remove(self.lib)
+        self.service.library_set.add(self.lib)
+        self.medium.library_set.clear()
+        self.assertConsistent()
+
+        self.platform.name = "Windows"
+        self.platform.save()
+        self.status.label = "Pile of Shame"
+        self.status.save()
+        self.lib.edition.game.title = "Renamed"
+        self.lib.edition.game.save()
+        self.lib.edition.name = "Deluxe"
+        self.lib.edition.save()
+        self.assertConsistent()
+
+        self.service.delete()
+        self.assertConsistent()
+
+        self.lib.delete()
+        self.assertFalse(LibraryRow.objects.exists())
+
+    def test_check_command_detects_and_fixes_drift(self):
+        LibraryRow.objects.update(priority=99)
+        with self.assertRaises(CommandError):
+            call_command("check_library_rows", stdout=StringIO())
+        call_command("check_library_rows", "--fix", stdout=StringIO())
+        self.assertConsistent()
+
+    def test_rebuild_command(self):
+        LibraryRow.objects.all().delete()
+        call_command("rebuild_library_rows", stdout=StringIO())
+        self.assertConsistent()
+
+
+class LibraryListQueryPlanTests(TestCase):
+    SORTS = ["", "name", "name_desc", "platform", "platform_desc",
+             "status", "status_desc", "priority", "priority_desc"]
+
+    # sorts whose columns all run the same direction, so the rows can be
+    # read straight off an index with no sort step
+    INDEX_ORDERED_SORTS = ["", "name", "name_desc", "platform", "status", "priority"]
+
+    FILTERS = ["", "platform", "status", "priority"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="planner", password="pw")
+
+    def explain(self, **params):
+        request = RequestFactory().get(reverse("library_list"), params)
+        request.user = self.user
+        view = LibraryListView()
+        view.setup(request)
+        return view.get_queryset().explain()
+
+    def test_every_sort_uses_a_row_index(self):
+        for sort in self.SORTS:
+            for param in self.FILTERS:
+                params = {"sort": sort}
+                if param:
+                    params[param] = "1"
+                with self.subTest(sort=sort, filter=param):
+                    plan = self.explain(**params)
+                    self.assertIn("SEARCH tracker_libraryrow USING INDEX row_user_", plan)
+                    self.assertNotIn("SCAN", plan)
+                    # no joins: the read model holds every sort column
+                    self.assertEqual(plan.count("SEARCH"), 1)
+
+    def test_single_direction_sorts_need_no_sort_step(self):
+        for sort in self.INDEX_ORDERED_SORTS:
+            with self.subTest(sort=sort):
+                self.assertNotIn("TEMP B-TREE", self.explain(sort=sort))
+
+
+class TitleSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.witcher = Game.objects.create(title="The Witcher 3: Wild Hunt")
+        cls.souls = Game.objects.create(title="Dark Souls III")
+        cls.hunt = Game.objects.create(title="Hunt: Showdown")
+
+    def titles(self, text):
+        return set(
+            search.filter_by_title(Game.objects.all(), text, game_field=None)
+            .values_list("title", flat=True)
+        )
+
+    def test_token_prefix_matching(self):
+        self.assertTrue(search.fts_available())
+        self.assertEqual(self.titles("wit 3"), {"The Witcher 3: Wild Hunt"})
+        self.assertEqual(self.titles("HUNT"), {"The Witcher 3: Wild Hunt", "Hunt: Showdown"})
+        self.assertEqual(self.titles("dark soul"), {"Dark Souls III"})
+
+    def test_index_follows_game_changes(self):
+        self.souls.title = "Demon's Souls"
+        self.souls.save()
+        self.hunt.delete()
+        self.assertEqual(self.titles("demon"), {"Demon's Souls"})
+        self.assertEqual(self.titles("dark"), set())
+        self.assertEqual(self.titles("showdown"), set())
+
+    def test_punctuation_only_falls_back_to_icontains(self):
+        self.assertEqual(self.titles(":"), {"The Witcher 3: Wild Hunt", "Hunt: Showdown"})
+
+
+class LibraryListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="pager", password="pw")
+        platforms = [Platform.objects.create(name=n, type="PC") for n in ("PC", "Mac")]
+        statuses = [
+            Status.objects.create(key=k, label=k.title(), order=i)
+            for i, k in enumerate(("backlog", "completed"))
+        ]
+        for i in range(23):
+            # entries sharing a title on purpose
+            game, _ = Game.objects.get_or_create(title=f"Title {i % 7}")
+            Library.objects.create(
+                user=cls.user,
+                edition=Edition.objects.create(game=game, name=f"Edition {i}"),
+                platform=platforms[i % 2],
+                status=statuses[i % 2],
+                priority=(i % 3) + 1,
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self, **params):
+        """Follow Next links from the first page, collecting row ids."""
+        response = self.client.get(reverse("library_list"), {"page_size": 5, **params})
+        ids = [lib.id for lib in response.context["libraries"]]
+        while response.context.get("next_cursor"):
+            response = self.client.get(reverse("library_list"), {
+                "page_size": 5, "after": response.context["next_cursor"], **params,
+            })
+            self.assertIsNone(response.context["paginator"])
+            ids += [lib.id for lib in response.context["libraries"]]
+        return ids, response
+
+    def test_cursor_pages_match_full_ordering(self):
+        for sort in ["", "name", "name_desc", "platform_desc", "status_desc", "priority_desc"]:
+            with self.subTest(sort=sort):
+                request = RequestFactory().get("/", {"sort": sort})
+                request.user = self.user
+                view = LibraryListView()
+                view.setup(request)
+                expected = list(view.get_queryset().values_list("pk", flat=True))
+
+                ids, _ = self.walk(sort=sort)
+                self.assertEqual(ids, expected)
+
+    def test_previous_cursor_returns_preceding_page(self):
+        first = self.client.get(reverse("library_list"), {"page_size": 5})
+        second = self.client.get(reverse("library_list"), {
+            "page_size": 5, "after": first.context["next_cursor"],
+        })
+        back = self.client.get(reverse("library_list"), {
+            "page_size": 5, "before": second.context["page_obj"].previous_cursor,
+        })
+        self.assertEqual(
+            [lib.id for lib in back.context["libraries"]],
+            [lib.id for lib in first.context["libraries"]],
+        )
+
+    def test_cursor_pages_skip_count(self):
+        first = self.client.get(reverse("library_list"), {"page_size": 5})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("library_list"), {
+                "page_size": 5, "after": first.context["next_cursor"],
+            })
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get(reverse("library_list"), {"after": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+        # well-formed, but text where status_order and priority belong
+        cursor = encode_cursor(["first", "high", "Title", 1])
+        for param in ("after", "before"):
+            with self.subTest(param=param):
+                response = self.client.get(reverse("library_list"), {param: cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse("library_list"), {"page_size": 100000})
+        self.assertEqual(response.context["paginator"].per_page, 100)
+
+    def test_all_mode_streams_every_row(self):
+        for page_size in ("all", "9999"):
+            with self.subTest(page_size=page_size):
+                response = self.client.get(reverse("library_list"), {"page_size": page_size})
+                self.assertTrue(response.streaming)
+                html = b"".join(response.streaming_content).decode()
+                self.assertEqual(html.count('class="py-2 col-game"'), 23)
+                self.assertIn("</html>", html)
+
+
+class LibraryListRelatedFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="filterer", password="pw")
+        platform = Platform.objects.create(name="PC", type="PC")
+        status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.digital, cls.disc, cls.cart = (
+            Medium.objects.create(name=n) for n in ("Digital", "Disc", "Cartridge")
+        )
+        cls.both, = make_library(cls.user, 1, platform, status, [cls.digital, cls.disc])
+        cls.digital_only, = make_library(cls.user, 1, platform, status, [cls.digital])
+        cls.none, = make_library(cls.user, 1, platform, status)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def listed(self, **params):
+        response = self.client.get(reverse("library_list"), params)
+        return {lib.id for lib in response.context["libraries"]}
+
+    def test_match_any(self):
+        self.assertEqual(
+            self.listed(medium=[self.digital.id, self.disc.id]),
+            {self.both.id, self.digital_only.id},
+        )
+
+    def test_match_all(self):
+        self.assertEqual(
+            self.listed(medium=[self.digital.id, self.disc.id], medium_match="all"),
+            {self.both.id},
+        )
+
+    def test_no_distinct_or_join(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("library_list"), {"medium": [self.digital.id]})
+        rows_sql = next(q["sql"] for q in ctx.captured_queries if "tracker_library_mediums" in q["sql"])
+        self.assertIn("EXISTS", rows_sql)
+        self.assertNotIn("DISTINCT", rows_sql)
+
+
+class LibraryCreateUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="editor", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.medium = Medium.objects.create(name="Digital")
+        cls.service = SubscriptionService.objects.create(name="Game Pass")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def form_data(self, **overrides):
+        data = {
+            "title": "Hades II",
+            "edition_name": "",
+            "platform": self.platform.pk,
+            "status": self.status.pk,
+            "priority": 3,
+            "hours_played": 0,
+            "notes": "",
+            "mediums": [self.medium.pk],
+            "subscription_services": [self.service.pk],
+        }
+        data.update(overrides)
+        return data
+
+    def test_create_then_edit(self):
+        response = self.client.post(reverse("library_add"), self.form_data())
+        self.assertRedirects(response, reverse("library_list"))
+        lib = Library.objects.get(user=self.user)
+        self.assertEqual(lib.edition.game.title, "Hades II")
+        self.assertEqual(lib.edition.name, "Standard")
+        self.assertEqual(list(lib.mediums.all()), [self.medium])
+
+        response = self.client.get(reverse("library_edit", args=[lib.pk]))
+        self.assertContains(response, 'value="Hades II"')
+        self.assertContains(response, f'value="{self.medium.pk}"')
+        self.assertContains(response, "checked")
+
+        response = self.client.post(
+            reverse("library_edit", args=[lib.pk]),
+            self.form_data(priority=7, mediums=[], subscription_services=[]),
+        )
+        self.assertRedirects(response, reverse("library_list"))
+        lib.refresh_from_db()
+        self.assertEqual(lib.priority, 7)
+        self.assertFalse(lib.mediums.exists())
+
+    def test_create_builds_its_row_once(self):
+        with mock.patch.object(readmodel, "build_row", wraps=readmodel.build_row) as build_row:
+            self.client.post(reverse("library_add"), self.form_data())
+        self.assertEqual(build_row.call_count, 1)
+        self.assertEqual(readmodel.find_inconsistencies(), {"missing": [], "stale": []})
+        self.assertEqual(stats.find_inconsistencies(), [])
+
+    def test_cannot_edit_someone_elses_entry(self):
+        other = User.objects.create_user(username="other", password="pw")
+        lib, = make_library(other, 1, self.platform, self.status)
+        response = self.client.get(reverse("library_edit", args=[lib.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse("library_edit", args=[lib.pk]), self.form_data())
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse("library_delete", args=[lib.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Library.objects.filter(pk=lib.pk).exists())
+
+    # session, user, the entry (with game, edition and platform) and its
+    # mediums and services; choices come from tracker.reference
+    EDIT_PAGE_QUERIES = 5
+    # the above; game and edition lookups; the entry's UPDATE; reading its
+    # mediums and services to set them; one row rebuild (old row, entry,
+    # its mediums and services, upsert); two status and two priority
+    # rollup updates
+    EDIT_SAVE_QUERIES = 19
+    DELETE_PAGE_QUERIES = 3
+
+    def test_edit_and_delete_query_counts(self):
+        other_status = Status.objects.create(key="playing", label="Playing", order=2)
+        mediums = [self.medium] + [Medium.objects.create(name=name) for name in ("Disc", "Cartridge")]
+        # entries at priorities 1 and 2 in both statuses, so the rollup
+        # groups the edits move between already exist
+        make_library(self.user, 2, self.platform, self.status)
+        make_library(self.user, 2, self.platform, other_status)
+        for links in (1, 3):
+            with self.subTest(mediums=links):
+                lib, = make_library(
+                    self.user, 1, self.platform, self.status, mediums[:links], [self.service],
+                )
+                url = reverse("library_edit", args=[lib.pk])
+                reference.platforms()  # warm the reference-data cache
+
+                with self.assertNumQueries(self.EDIT_PAGE_QUERIES):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+                data = self.form_data(
+                    title=lib.edition.game.title, edition_name=lib.edition.name,
+                    status=other_status.pk, priority=2,
+                    mediums=[m.pk for m in mediums[:links]],
+                )
+                with self.assertNumQueries(self.EDIT_SAVE_QUERIES):
+                    response = self.client.post(url, data)
+                self.assertRedirects(response, reverse("library_list"))
+                self.assertEqual(LibraryRow.objects.get(pk=lib.pk).status_key, "playing")
+
+                with self.assertNumQueries(self.DELETE_PAGE_QUERIES):
+                    self.client.get(reverse("library_delete", args=[lib.pk]))
+
+    def test_invalid_choices_are_rejected_without_queries(self):
+        lib, = make_library(self.user, 1, self.platform, self.status)
+        reference.platforms()
+        form = LibraryForm(self.form_data(platform=999, mediums=[self.medium.pk, 999]), instance=lib)
+        with self.assertNumQueries(0):
+            self.assertFalse(form.is_valid())
+        self.assertEqual(set(form.errors), {"platform", "mediums"})
+
+
+class LibraryImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="importer", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.medium = Medium.objects.create(name="Digital")
+        cls.service = SubscriptionService.objects.create(name="Game Pass")
+
+    def import_text(self, text, fmt, batch_size=2):
+        return importer.import_file(self.user, BytesIO(text.encode()), fmt, batch_size=batch_size)
+
+    def assert_rows_consistent(self):
+        self.assertEqual(readmodel.find_inconsistencies(), {"missing": [], "stale": []})
+
+    def test_csv(self):
+        result = self.import_text(
+            "﻿title,edition,platform,status,priority,mediums,subscription_services\n"
+            "Hades,,PC,Backlog,2,Digital,Game Pass\n"
+            "Hades,Deluxe,pc,backlog,3,,\n"
+            "Celeste,,PC,Backlog,,,\n",
+            "csv",
+        )
+        self.assertEqual((result.imported, result.rejected), (3, 0))
+        self.assertEqual(Game.objects.filter(title="Hades").count(), 1)
+        lib = Library.objects.get(edition__name="Standard", edition__game__title="Hades")
+        self.assertEqual(lib.priority, 2)
+        self.assertEqual(list(lib.mediums.all()), [self.medium])
+        self.assertEqual(list(lib.subscription_services.all()), [self.service])
+        self.assertEqual(Library.objects.get(edition__game__title="Celeste").priority, 5)
+        self.assert_rows_consistent()
+
+    def test_json_and_ndjson(self):
+        records = [
+            {"title": f"Game {i}", "platform": "PC", "status": "backlog",
+             "mediums": ["Digital"], "start_date": "2024-01-0%d" % (i + 1)}
+            for i in range(5)
+        ]
+        result = self.import_text(json.dumps(records), "json")
+        self.assertEqual(result.imported, 5)
+
+        result = self.import_text("\n".join(json.dumps(r) for r in records), "ndjson")
+        self.assertEqual(result.imported, 5)
+        self.assertEqual(Library.objects.filter(user=self.user).count(), 10)
+        self.assertEqual(Game.objects.count(), 5)
+        self.assert_rows_consistent()
+
+    def test_bad_rows_are_rejected_with_their_line(self):
+        result = self.import_text(
+            '{"title": "Ok", "platform": "PC", "status": "backlog"}\n'
+            '{"title": "", "platform": "PC", "status": "backlog"}\n'
+            "not json\n"
+            '{"title": "X", "platform": "Amiga", "status": "backlog"}\n'
+            '{"title": "Y", "platform": "PC", "status": "backlog", "priority": 11}\n'
+            '{"title": "Z", "platform": "PC", "status": "backlog", "mediums": "Tape"}\n',
+            "ndjson",
+        )
+        self.assertEqual(result.imported, 1)
+        self.assertEqual([line for line, _ in result.rejections], [2, 3, 4, 5, 6])
+        self.assertIn("Amiga", result.rejections[2][1])
+
+    def test_hours_played_must_be_finite_and_not_negative(self):
+        result = self.import_text(
+            "title,platform,status,hours_played\n"
+            "A,PC,Backlog,12.5\n"
+            "B,PC,Backlog,nan\n"
+            "C,PC,Backlog,inf\n"
+            "D,PC,Backlog,-3\n",
+            "csv",
+        )
+        self.assertEqual(result.imported, 1)
+        self.assertEqual([line for line, _ in result.rejections], [3, 4, 5])
+        self.assertIn("'nan'", result.rejections[0][1])
+        # JSON has its own spelling of infinity
+        result = self.import_text(
+            '{"title": "E", "platform": "PC", "status": "backlog", "hours_played": Infinity}',
+            "ndjson",
+        )
+        self.assertEqual(result.rejected, 1)
+        self.assertEqual(list(Library.objects.values_list("hours_played", flat=True)), [12.5])
+
+    def test_broken_json_file(self):
+        with self.assertRaises(importer.ImportFileError):
+            self.import_text('{"title": "Not an array"}', "json")
+        with self.assertRaises(importer.ImportFileError):
+            self.import_text('[{"title": "A"} {"title": "B"}]', "json")
+
+    def test_import_invalidates_page_cache(self):
+        before = caching.user_version(self.user.pk)
+        self.import_text("title,platform,status\nHades,PC,Backlog\n", "csv")
+        self.assertNotEqual(caching.user_version(self.user.pk), before)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("title,platform,status\nHades,PC,Backlog\nBad,PS9,Backlog\n")
+        self.addCleanup(os.remove, f.name)
+        out, err = StringIO(), StringIO()
+        call_command("import_library", f.name, user="importer", stdout=out, stderr=err)
+        self.assertIn("Imported 1 entries, rejected 1", out.getvalue())
+        self.assertIn("line 3", err.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("import_library", f.name, user="nobody", stdout=out)
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile("games.csv", b"title,platform,status\nHades,PC,Backlog\n")
+        response = self.client.post(reverse("library_import"), {"file": upload})
+        self.assertContains(response, "Imported 1 entry")
+        self.assertTrue(Library.objects.filter(user=self.user).exists())
+
+        upload = SimpleUploadedFile("games.txt", b"whatever")
+        response = self.client.post(reverse("library_import"), {"file": upload})
+        self.assertContains(response, "Cannot tell the format")
+
+
+@override_settings(DEBUG=True)
+class SeedCommandTests(TestCase):
+    def seed(self, **options):
+        call_command("seed", stdout=StringIO(), seed=7, **options)
+
+    def test_generates_requested_volume(self):
+        self.seed(users=3, games=40, entries_per_user=25)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Game.objects.count(), 40)
+        for user in User.objects.all():
+            self.assertEqual(Library.objects.filter(user=user).count(), 25)
+        self.assertTrue(Library.mediums.through.objects.exists())
+        self.assertEqual(readmodel.find_inconsistencies(), {"missing": [], "stale": []})
+
+    def test_leaves_other_accounts_alone(self):
+        User.objects.create_user(username="alice", password="pw")
+        self.seed(users=2, games=10, entries_per_user=5)
+        self.assertFalse(Library.objects.filter(user__username="alice").exists())
+        self.assertEqual(
+            set(Library.objects.values_list("user__username", flat=True)),
+            {"seed_user_000000", "seed_user_000001"},
+        )
+
+    def test_rerun_does_not_duplicate(self):
+        self.seed(games=20, entries_per_user=10)
+        self.seed(games=20, entries_per_user=10)
+        self.assertEqual(Game.objects.count(), 20)
+        self.assertEqual(Library.objects.count(), 20)
+        self.assertEqual(
+            Library.objects.values("edition").distinct().count(), Library.objects.count()
+        )
+
+    def test_same_seed_same_data(self):
+        def snapshot():
+            return list(Library.objects.order_by("pk").values_list(
+                "edition__game__title", "platform__name", "status__key", "priority"
+            ))
+
+        self.seed(games=30, entries_per_user=15)
+        first = snapshot()
+        Library.objects.all().delete()
+        Game.objects.all().delete()
+        self.seed(games=30, entries_per_user=15)
+        self.assertEqual(snapshot(), first)
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_measure_counts_queries_and_runs_setup(self):
+        calls = []
+        case = benchmarks.Case(
+            "count", lambda: list(User.objects.all()), setup=lambda: calls.append(1)
+        )
+        result = benchmarks.measure(case, repeat=3)
+        self.assertEqual(result["queries"], 1)
+        self.assertEqual(result["runs"], 3)
+        self.assertEqual(len(calls), 6)  # warm-up, queries, memory, 3 timed
+        self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+
+    def test_compare_flags_regressions(self):
+        baseline = {
+            "a": {"p50_ms": 10.0, "queries": 3, "peak_kb": 100.0},
+            "b": {"p50_ms": 0.1, "queries": 1, "peak_kb": 10.0},
+        }
+        results = {
+            "a": {"p50_ms": 20.0, "queries": 4, "peak_kb": 100.0},
+            "b": {"p50_ms": 0.3, "queries": 1, "peak_kb": 10.0},  # under the noise floor
+            "new": {"p50_ms": 50.0, "queries": 9, "peak_kb": 999.0},
+        }
+        regressions = benchmarks.compare(results, baseline)
+        self.assertEqual([key for key, _ in regressions], ["a", "a"])
+
+    def test_runs_against_a_small_dataset(self):
+        dataset = benchmarks.Dataset(20)
+        results = benchmarks.run_benchmarks(dataset, ["library_write", "title_search"], repeat=1)
+        self.assertIn("20/library_write/create", results)
+        self.assertGreater(results["20/library_write/update"]["queries"], 0)
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="timed", password="pw")
+        platform = Platform.objects.create(name="PC", type="PC")
+        status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        make_library(cls.user, 3, platform, status)
+
+    def setUp(self):
+        metrics.reset()
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_server_timing_header_and_window(self):
+        with self.assertLogs("tracker.metrics", "INFO") as logs:
+            response = self.client.get(reverse("library_list"))
+
+        header = response["Server-Timing"]
+        self.assertRegex(header, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+$')
+        self.assertIn("view=library_list method=GET status=200", logs.output[0])
+
+        stats = metrics.snapshot()["library_list"]
+        self.assertEqual(stats["requests"], 1)
+        self.assertGreater(stats["queries"]["max"], 0)
+        self.assertGreater(stats["template_ms"]["max"], 0)
+        self.assertEqual(stats["bytes"]["max"], len(response.content))
+
+    def test_streamed_response_has_no_size(self):
+        self.client.get(reverse("library_list"), {"page_size": "all"})
+        self.assertNotIn("bytes", metrics.snapshot()["library_list"])
+
+    def test_endpoint_is_staff_only(self):
+        self.client.get(reverse("library_list"))
+        response = self.client.get(reverse("request_metrics"))
+        self.assertEqual(response.status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse("request_metrics"))
+        self.assertIn("library_list", response.json())
+
+
+# Stands in for one worker process: read-then-write transactions against
+# a shared database file, through Django's own SQLite backend.
+CONTENTION_WORKER = """
+import json, sys, time
+import django
+from django.conf import settings
+settings.configure(DATABASES={"default": json.loads(sys.argv[1])})
+django.setup()
+from django.db import OperationalError, connection, transaction
+
+errors = 0
+for number in range(int(sys.argv[2])):
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM counter")
+            time.sleep(0.001)  # hold the read lock while the others arrive
+            cursor.execute("INSERT INTO counter (n) VALUES (%s)", [number])
+    except OperationalError:
+        errors += 1
+print(errors)
+"""
+
+
+class SQLiteContentionTests(SimpleTestCase):
+    workers = 4
+    rounds = 40
+
+    def contend(self, settings_dict):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "contention.sqlite3")
+        with closing(sqlite3.connect(path)) as db:
+            db.execute("CREATE TABLE counter (n INTEGER)")
+
+        settings_json = json.dumps({"ENGINE": "django.db.backends.sqlite3", "NAME": path, **settings_dict})
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", CONTENTION_WORKER, settings_json, str(self.rounds)],
+                stdout=subprocess.PIPE, text=True,
+            )
+            for _ in range(self.workers)
+        ]
+        errors = 0
+        for process in processes:
+            output, _ = process.communicate(timeout=120)
+            self.assertEqual(process.returncode, 0)
+            errors += int(output)
+
+        with closing(sqlite3.connect(path)) as db:
+            rows = db.execute("SELECT COUNT(*) FROM counter").fetchone()[0]
+        return errors, rows
+
+    def test_default_settings_hit_lock_errors(self):
+        errors, rows = self.contend({})
+        self.assertGreater(errors, 0)
+        self.assertEqual(rows + errors, self.workers * self.rounds)
+
+    def test_production_profile_has_no_lock_errors(self):
+        errors, rows = self.contend(settings.SQLITE_PRODUCTION_PROFILE)
+        self.assertEqual(errors, 0)
+        self.assertEqual(rows, self.workers * self.rounds)
+
+
+class LibraryExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="exporter", password="pw")
+        cls.pc = Platform.objects.create(name="PC", type="PC")
+        cls.switch = Platform.objects.create(name="Switch", type="Console")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.medium = Medium.objects.create(name="Digital")
+        cls.service = SubscriptionService.objects.create(name="Game Pass")
+        make_library(cls.user, 3, cls.pc, cls.status, mediums=[cls.medium], services=[cls.service])
+        make_library(cls.user, 2, cls.switch, cls.status)
+        other = User.objects.create_user(username="someone", password="pw")
+        make_library(other, 4, cls.pc, cls.status)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse("library_export"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        lines = body.decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["title", "edition", "platform"])
+        self.assertEqual(len(lines), 6)
+        self.assertIn("Digital", body.decode())
+
+    def test_json_and_ndjson_honour_filters_and_sort(self):
+        _, body = self.export(format="json", platform=self.pc.pk, sort="name_desc")
+        items = json.loads(body)
+        self.assertEqual(len(items), 3)
+        self.assertEqual([i["title"] for i in items], sorted((i["title"] for i in items), reverse=True))
+        self.assertEqual(items[0]["mediums"], ["Digital"])
+        self.assertEqual(items[0]["subscription_services"], ["Game Pass"])
+
+        _, body = self.export(format="ndjson", platform=self.switch.pk)
+        self.assertEqual(len(body.decode().splitlines()), 2)
+
+        _, body = self.export(format="json", platform=9999)
+        self.assertEqual(json.loads(body), [])
+
+    def test_gzip(self):
+        response, body = self.export(format="ndjson", gzip="1")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('.ndjson.gz"'))
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 5)
+
+    def test_one_library_query(self):
+        reference.platforms()  # warm the reference cache
+        with CaptureQueriesContext(connection) as queries:
+            self.export(format="csv")
+        library_queries = [q for q in queries if "tracker_libraryrow" in q["sql"]]
+        self.assertEqual(len(library_queries), 1)
+
+    def test_round_trip_through_import(self):
+        _, body = self.export(format="csv")
+        copy = User.objects.create_user(username="copy")
+        result = importer.import_file(copy, BytesIO(body), "csv")
+        self.assertEqual((result.imported, result.rejected), (5, 0))
+        self.assertEqual(
+            Library.objects.filter(user=copy, mediums=self.medium).count(), 3
+        )
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse("library_export"), {"format": "xml"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.json.gz")
+            call_command(
+                "export_library", user="exporter", format="json", gzip=True,
+                output=path, query=f"platform={self.switch.pk}",
+            )
+            with gzip.open(path) as f:
+                self.assertEqual(len(json.load(f)), 2)
+
+
+class LibraryApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="api", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.other_platform = Platform.objects.create(name="Switch", type="Console")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.medium = Medium.objects.create(name="Digital")
+        cls.libraries = make_library(cls.user, 5, cls.platform, cls.status, mediums=[cls.medium])
+        make_library(cls.user, 2, cls.other_platform, cls.status)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse("library_api")
+
+    def test_filters_sorts_and_paginates(self):
+        data = self.client.get(self.url, {"platform": self.platform.pk, "sort": "name", "page_size": 2}).json()
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNone(data["previous"])
+        self.assertEqual(data["results"][0]["mediums"], ["Digital"])
+        self.assertEqual(data["results"][0]["platform"]["name"], "PC")
+
+        titles = [r["title"] for r in data["results"]]
+        while data["next"]:
+            data = self.client.get(data["next"]).json()
+            titles += [r["title"] for r in data["results"]]
+        self.assertEqual(titles, sorted(titles))
+        self.assertEqual(len(titles), 5)
+
+    def test_conditional_requests_skip_the_library_tables(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        for headers in ({"if_none_match": etag}, {"if_modified_since": last_modified}):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, headers=headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertFalse([q for q in queries if "tracker_" in q["sql"]])
+
+    def test_change_invalidates_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        lib = self.libraries[0]
+        lib.priority = 9
+        lib.save()
+        response = self.client.get(self.url, headers={"if_none_match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_requires_login_and_valid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"after": "garbage"}).status_code, 400)
+        cursor = encode_cursor(["Title", {"pk": 1}])
+        self.assertEqual(self.client.get(self.url, {"sort": "name", "after": cursor}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class AsyncLibraryURLConf:
+    # The site URLconf, with the library pages served by tracker.async_views
+    urlpatterns = urls.async_library_views + [path("", include("backlog_tracker.urls"))]
+
+
+@override_settings(ROOT_URLCONF=AsyncLibraryURLConf)
+class AsyncLibraryViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="async", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.medium = Medium.objects.create(name="Digital")
+        cls.libraries = make_library(cls.user, 25, cls.platform, cls.status, [cls.medium])
+
+    def setUp(self):
+        cache.clear()
+        self.async_client.force_login(self.user)
+
+    def form_data(self, **overrides):
+        data = {
+            "title": "Hades II",
+            "edition_name": "",
+            "platform": self.platform.pk,
+            "status": self.status.pk,
+            "priority": 3,
+            "hours_played": 0,
+            "notes": "",
+            "mediums": [self.medium.pk],
+        }
+        data.update(overrides)
+        return data
+
+    async def test_list_pages_and_page_cache(self):
+        response = await self.async_client.get(reverse("library_list"), {"sort": "name"})
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Game")
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+        page_2 = await self.async_client.get(reverse("library_list"), {"sort": "name", "page": 2})
+        self.assertContains(page_2, self.libraries[24].edition.game.title)
+        self.assertNotContains(page_2, self.libraries[0].edition.game.title)
+
+        cached = await self.async_client.get(reverse("library_list"), {"sort": "name"})
+        self.assertEqual(cached["X-Page-Cache"], "hit")
+        self.assertEqual(cached.content, response.content)
+
+    async def test_reference_reload_while_rendering(self):
+        # The reference tables change after the page of rows is read: the
+        # reload happens while the context is built, off the event loop
+        counts = facets.counts
+
+        def counts_then_change(*args):
+            reference.bump_version()
+            return counts(*args)
+
+        for params in ({}, {"page_size": "all"}):
+            with self.subTest(params=params), mock.patch.object(facets, "counts", counts_then_change):
+                response = await self.async_client.get(reverse("library_list"), params)
+                if response.streaming:
+                    b"".join([chunk async for chunk in response.streaming_content])
+                self.assertEqual(response.status_code, 200)
+
+    async def test_first_search_in_a_new_process(self):
+        for params in ({"search": "Game"}, {"search": "Game", "page_size": "all"}):
+            with self.subTest(params=params), mock.patch.dict(search._fts_available, clear=True):
+                response = await self.async_client.get(reverse("library_list"), params)
+                if response.streaming:
+                    b"".join([chunk async for chunk in response.streaming_content])
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(search._fts_available)
+
+    async def test_keyset_and_streamed_pages(self):
+        streamed = await self.async_client.get(reverse("library_list"), {"page_size": "all"})
+        body = b"".join([chunk async for chunk in streamed.streaming_content])
+        self.assertEqual(body.count(b"Game %d-" % self.user.pk), 25)
+
+        response = await self.async_client.get(reverse("library_list"), {"after": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_create_update_delete(self):
+        response = await self.async_client.post(reverse("library_add"), self.form_data())
+        self.assertRedirects(response, reverse("library_list"), fetch_redirect_response=False)
+        lib = await Library.objects.select_related("edition__game").aget(edition__game__title="Hades II")
+        self.assertEqual(lib.edition.name, "Standard")
+        self.assertEqual([m async for m in lib.mediums.all()], [self.medium])
+
+        response = await self.async_client.get(reverse("library_edit", args=[lib.pk]))
+        self.assertContains(response, 'value="Hades II"')
+
+        response = await self.async_client.post(
+            reverse("library_edit", args=[lib.pk]), self.form_data(priority=8, mediums=[]),
+        )
+        self.assertEqual(response.status_code, 302)
+        await lib.arefresh_from_db()
+        self.assertEqual(lib.priority, 8)
+        self.assertFalse(await lib.mediums.aexists())
+
+        response = await self.async_client.post(reverse("library_delete", args=[lib.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(await Library.objects.filter(pk=lib.pk).aexists())
+
+    async def test_scoped_to_the_logged_in_user(self):
+        other = await User.objects.acreate(username="other")
+        response = await self.async_client.get(reverse("library_edit", args=[self.libraries[0].pk]))
+        self.assertEqual(response.status_code, 200)
+
+        await self.async_client.aforce_login(other)
+        response = await self.async_client.post(reverse("library_delete", args=[self.libraries[0].pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(await Library.objects.filter(pk=self.libraries[0].pk).aexists())
+
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse("library_list"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("login"), response["Location"])
+
+
+class LibraryStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="counter", password="pw")
+        cls.pc = Platform.objects.create(name="PC", type="PC")
+        cls.switch = Platform.objects.create(name="Switch", type="Console")
+        cls.backlog = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.completed = Status.objects.create(key="completed", label="Completed", order=2)
+        cls.digital = Medium.objects.create(name="Digital")
+        cls.disc = Medium.objects.create(name="Disc")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def assertConsistent(self):
+        self.assertEqual(stats.find_inconsistencies(), [])
+
+    def test_rollups_follow_every_kind_of_change(self):
+        first, second = make_library(self.user, 2, self.pc, self.backlog, [self.digital])
+        self.assertConsistent()
+
+        first.hours_played = 12.5
+        first.status = self.completed
+        first.platform = self.switch
+        first.save()
+        self.assertConsistent()
+
+        second.mediums.add(self.disc)
+        self.assertConsistent()
+        self.digital.library_set.clear()
+        self.assertConsistent()
+
+        second.delete()
+        self.assertConsistent()
+        self.switch.delete()
+        self.assertConsistent()
+        self.assertFalse(LibraryStat.objects.filter(entries__gt=0).exists())
+
+    def test_bulk_writers_update_rollups(self):
+        data = "title,platform,status,hours_played,mediums\nA,PC,Backlog,3,Digital\nB,PC,Completed,4,\n"
+        importer.import_file(self.user, BytesIO(data.encode()), "csv")
+        self.assertConsistent()
+        hours = LibraryStat.objects.get(user=self.user, dimension="platform", key=self.pc.pk).hours_played
+        self.assertEqual(hours, 7)
+
+        other = User.objects.create_user(username="leaving", password="pw")
+        make_library(other, 3, self.pc, self.backlog)
+        other.delete()
+        self.assertConsistent()
+
+    def test_summary(self):
+        entries = make_library(self.user, 4, self.pc, self.backlog, [self.digital])
+        Library.objects.filter(pk=entries[0].pk).update(added_on=date(2026, 1, 1))
+        for lib in entries[:2]:
+            lib.refresh_from_db()
+            lib.status = self.completed
+            lib.hours_played = 10
+            lib.save()
+        entries[3].mediums.clear()
+        Library.objects.filter(pk=entries[2].pk).update(added_on=date(2026, 1, 11))
+        Library.objects.filter(pk=entries[3].pk).update(added_on=date(2026, 1, 21))
+        readmodel.sync([entries[2].pk, entries[3].pk])
+
+        summary = stats.summary(self.user, today=date(2026, 1, 31))
+        self.assertEqual(summary["total_entries"], 4)
+        self.assertEqual(summary["total_hours"], 20)
+        self.assertEqual(summary["completion_rate"], 0.5)
+        self.assertEqual(summary["backlog_entries"], 2)
+        self.assertEqual(summary["backlog_age"], 15)
+        self.assertEqual(
+            [(row["name"], row["entries"]) for row in summary["by_medium"]],
+            [("Digital", 3), ("None", 1)],
+        )
+        self.assertEqual([row["entries"] for row in summary["by_status"]], [2, 2])
+
+    def test_page_cost_does_not_grow_with_the_library(self):
+        def page_queries():
+            reference.platforms()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("library_stats"))
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        make_library(self.user, 2, self.pc, self.backlog, [self.digital])
+        small = page_queries()
+        make_library(self.user, 40, self.switch, self.completed, [self.disc])
+        self.assertEqual(page_queries(), small)
+        self.assertContains(self.client.get(reverse("library_stats")), "Switch")
+
+    def test_rebuild_command(self):
+        make_library(self.user, 3, self.pc, self.backlog, [self.digital])
+        LibraryStat.objects.filter(dimension="status").update(entries=99)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_library_stats", check=True, stdout=StringIO())
+        call_command("rebuild_library_stats", user="counter", stdout=StringIO())
+        self.assertConsistent()
+
+
+class LibraryBulkEditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="bulk", password="pw")
+        cls.other = User.objects.create_user(username="bystander", password="pw")
+        cls.pc = Platform.objects.create(name="PC", type="PC")
+        cls.switch = Platform.objects.create(name="Switch", type="Console")
+        cls.backlog = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.shelved = Status.objects.create(key="shelved", label="Shelved", order=5)
+        cls.digital = Medium.objects.create(name="Digital")
+        cls.disc = Medium.objects.create(name="Disc")
+        cls.service = SubscriptionService.objects.create(name="Game Pass")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse("library_bulk_edit")
+
+    def assertConsistent(self):
+        problems = readmodel.find_inconsistencies()
+        self.assertEqual(problems["missing"] + problems["stale"], [])
+        self.assertEqual(stats.find_inconsistencies(), [])
+
+    def post(self, entries, **data):
+        return self.client.post(self.url, {"scope": "selected", "ids": [lib.pk for lib in entries], **data})
+
+    def test_selected_entries_in_constant_queries(self):
+        def edit_queries(entries, status):
+            reference.platforms()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(entries, status=status.pk)
+            self.assertRedirects(response, reverse("library_list"), fetch_redirect_response=False)
+            return len(queries)
+
+        few = make_library(self.user, 3, self.pc, self.backlog)
+        many = make_library(self.user, 200, self.pc, self.backlog)
+        edit_queries(few, self.shelved)  # creates the rollup group for Shelved
+        edit_queries(few, self.backlog)
+        self.assertEqual(edit_queries(few, self.shelved), edit_queries(many, self.shelved))
+        self.assertEqual(Library.objects.filter(status=self.shelved).count(), 203)
+        self.assertConsistent()
+
+    def test_skips_other_users_entries(self):
+        mine = make_library(self.user, 2, self.pc, self.backlog)
+        theirs = make_library(self.other, 2, self.pc, self.backlog)
+        self.post(mine + theirs, priority=9)
+        self.assertEqual(set(Library.objects.filter(priority=9)), set(mine))
+        self.assertConsistent()
+
+    def test_everything_matching_the_filter(self):
+        on_pc = make_library(self.user, 5, self.pc, self.backlog)
+        on_switch = make_library(self.user, 5, self.switch, self.backlog)
+        response = self.client.post(self.url, {
+            "scope": "filter", "query": f"platform={self.switch.pk}&page=2", "status": self.shelved.pk,
+        })
+        self.assertRedirects(
+            response, reverse("library_list") + f"?platform={self.switch.pk}", fetch_redirect_response=False,
+        )
+        self.assertEqual(set(Library.objects.filter(status=self.shelved)), set(on_switch))
+        self.assertFalse(Library.objects.filter(pk__in=[lib.pk for lib in on_pc], status=self.shelved).exists())
+        self.assertConsistent()
+
+    def test_add_mediums_and_services(self):
+        entries = make_library(self.user, 4, self.pc, self.backlog, [self.digital])
+        self.post(entries[:3], add_mediums=[self.digital.pk, self.disc.pk], add_subscription_services=[self.service.pk])
+        self.assertEqual(Library.mediums.through.objects.filter(medium=self.disc).count(), 3)
+        self.assertEqual(Library.mediums.through.objects.filter(medium=self.digital).count(), 4)
+        self.assertEqual(entries[0].subscription_services.get(), self.service)
+        self.assertConsistent()
+
+    def test_list_page_shows_the_change(self):
+        entries = make_library(self.user, 2, self.pc, self.backlog)
+        self.assertNotContains(self.client.get(reverse("library_list")), "Shelved</span>")
+        self.post(entries, status=self.shelved.pk)
+        self.assertContains(self.client.get(reverse("library_list")), "Shelved</span>", count=2)
+
+    def test_rejects_empty_requests(self):
+        entries = make_library(self.user, 1, self.pc, self.backlog)
+        self.assertEqual(self.post(entries).status_code, 400)
+        self.assertEqual(self.post([], priority=3).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+
+class GameIdentityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="collector", password="pw")
+        cls.pc = Platform.objects.create(name="PC", type="PC")
+        cls.switch = Platform.objects.create(name="Switch", type="Console")
+        cls.backlog = Status.objects.create(key="backlog", label="Backlog", order=1)
+
+    def test_normalized_keys(self):
+        self.assertEqual(normalize_key("The Witcher 3:  Wild Hunt"), "the witcher 3 wild hunt")
+        self.assertEqual(normalize_key("the witcher 3 - WILD HUNT "), "the witcher 3 wild hunt")
+        self.assertEqual(normalize_key("Assassin’s Creed"), normalize_key("assassins creed"))
+        self.assertEqual(normalize_key("ＨＡＤＥＳ"), "hades")
+        self.assertNotEqual(normalize_key("Hades"), normalize_key("Hades II"))
+
+    def test_symbol_only_titles_stay_apart(self):
+        titles = ["!!!", "???", "∞", "\U0001f3ae", "ＡＢＣ!!!"]
+        self.assertEqual([normalize_key(title) for title in titles], ["!!!", "???", "∞", "\U0001f3ae", "abc"])
+        for title in titles[:4]:
+            Game.objects.create(title=title)
+        self.assertEqual(catalog.get_or_create_game("!!!")[1], False)
+        self.assertEqual(catalog.merge_duplicates(), (0, 0, set()))
+        self.assertEqual(Game.objects.count(), 4)
+
+    def test_variant_titles_share_one_game(self):
+        game = Game.objects.create(title="The Witcher 3: Wild Hunt")
+        self.assertEqual(game.title_key, "the witcher 3 wild hunt")
+        self.assertEqual(catalog.get_or_create_game("the witcher 3 - wild hunt"), (game, False))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Game.objects.create(title="THE WITCHER 3 WILD HUNT")
+
+        edition, created = catalog.get_or_create_edition(game, "GOTY Edition")
+        self.assertTrue(created)
+        self.assertEqual(catalog.get_or_create_edition(game, "goty  edition"), (edition, False))
+
+    def test_batches_resolve_variants_to_one_row(self):
+        existing = Game.objects.create(title="Hades")
+        games, created = catalog.resolve_games(["HADES", "Hades II", "hades ii", "Dead Cells"])
+        self.assertEqual(games["HADES"], existing)
+        self.assertEqual(games["Hades II"], games["hades ii"])
+        self.assertEqual(sorted(game.title for game in created), ["Dead Cells", "Hades II"])
+        self.assertTrue(all(game.pk for game in created))
+        self.assertEqual(Game.objects.count(), 3)
+
+        editions, created = catalog.resolve_editions([(existing.pk, "Standard"), (existing.pk, "standard")])
+        self.assertEqual(len(created), 1)
+        self.assertEqual(editions[existing.pk, "Standard"], editions[existing.pk, "standard"])
+
+    def test_adding_a_variant_title_reuses_the_game(self):
+        game = Game.objects.create(title="Hades II")
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("library_add"), {
+            "title": "hades ii", "edition_name": "", "platform": self.pc.pk,
+            "status": self.backlog.pk, "priority": 3, "hours_played": 0, "notes": "",
+        })
+        self.assertRedirects(response, reverse("library_list"))
+        self.assertEqual(Library.objects.get(user=self.user).edition.game, game)
+        self.assertEqual(Game.objects.count(), 1)
+
+    def test_dedupe_games_merges_duplicates(self):
+        hades = Game.objects.create(title="Hades")
+        standard = Edition.objects.create(game=hades, name="Standard")
+        standard.platforms.set([self.pc])
+        kept = Library.objects.create(
+            user=self.user, edition=standard, platform=self.pc, status=self.backlog,
+        )
+        # A title changed by a queryset update skips the key: it goes stale
+        copy = Game.objects.create(title="Hades (copy)")
+        Game.objects.filter(pk=copy.pk).update(title="HADES")
+        copy_standard = Edition.objects.create(game=copy, name="standard")
+        copy_standard.platforms.set([self.switch])
+        deluxe = Edition.objects.create(game=copy, name="Deluxe")
+        moved = [
+            Library.objects.create(user=self.user, edition=edition, platform=self.switch, status=self.backlog)
+            for edition in (copy_standard, deluxe)
+        ]
+
+        out = StringIO()
+        call_command("dedupe_games", "--dry-run", stdout=out)
+        self.assertIn("Would merge 1 game(s) and 1 edition(s), affecting 1 user(s)", out.getvalue())
+        self.assertEqual(Game.objects.count(), 2)
+
+        call_command("dedupe_games", stdout=StringIO())
+        self.assertEqual(list(Game.objects.all()), [hades])
+        self.assertEqual(set(hades.editions.all()), {standard, deluxe})
+        self.assertEqual(set(standard.platforms.all()), {self.pc, self.switch})
+        self.assertEqual(Library.objects.get(pk=moved[0].pk).edition, standard)
+        self.assertEqual(Library.objects.get(pk=moved[1].pk).edition, deluxe)
+        self.assertEqual(Library.objects.get(pk=kept.pk).edition, standard)
+        problems = readmodel.find_inconsistencies()
+        self.assertEqual(problems["missing"] + problems["stale"], [])
+        self.assertEqual(catalog.merge_duplicates(), (0, 0, set()))
+
+
+class TitleAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="typist", password="pw")
+        cls.witcher = Game.objects.create(title="The Witcher 3: Wild Hunt")
+        cls.witcher2 = Game.objects.create(title="The Witcher 2")
+        cls.hades = Game.objects.create(title="Hades")
+        cls.hades2 = Game.objects.create(title="Hades II")
+        Edition.objects.create(game=cls.witcher, name="Standard")
+        Edition.objects.create(game=cls.witcher, name="Complete Edition")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse("title_suggestions")
+
+    def titles(self, q, **params):
+        return [r["title"] for r in self.client.get(self.url, {"q": q, **params}).json()["results"]]
+
+    def test_prefix_then_word_matches(self):
+        self.assertEqual(self.titles("HADES"), ["Hades", "Hades II"])
+        self.assertEqual(self.titles("the witcher 3 -"), ["The Witcher 3: Wild Hunt"])
+        self.assertEqual(set(self.titles("witch")), {"The Witcher 2", "The Witcher 3: Wild Hunt"})
+        self.assertEqual(self.titles("hades", limit=1), ["Hades"])
+        self.assertEqual(self.titles("  "), [])
+
+        # word matches come from the text as typed: its key, "assassins",
+        # is not a word of the title
+        game = Game.objects.create(title="The Assassin's Tale")
+        self.assertEqual(self.titles("assassin's"), [game.title])
+
+        result = self.client.get(self.url, {"q": "the witcher 3"}).json()["results"][0]
+        self.assertEqual(result, {
+            "id": self.witcher.pk, "title": "The Witcher 3: Wild Hunt",
+            "editions": ["Complete Edition", "Standard"],
+        })
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url, {"q": "hades"}).status_code, 401)
+
+    def test_cached_until_the_catalog_changes(self):
+        self.assertEqual(autocomplete.suggest("hades"), autocomplete.lookup("hades"))
+        with self.assertNumQueries(0):
+            autocomplete.suggest("hades")
+
+        catalog.get_or_create_game("Hades: Supergiant Edition")
+        self.assertEqual(len(autocomplete.suggest("hades")), 3)
+        catalog.resolve_games(["Hades III"])
+        self.assertEqual(len(autocomplete.suggest("hades")), 4)
+
+    def test_concurrent_requests_share_one_lookup(self):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_lookup(text, limit):
+            calls.append(text)
+            started.set()
+            release.wait(5)
+            return [{"id": 1, "title": "Hades", "editions": []}]
+
+        results = []
+        with mock.patch.object(autocomplete, "lookup", slow_lookup):
+            threads = [
+                threading.Thread(target=lambda text=text: results.append(
+                    autocomplete._coalesced("hades", text, 10)
+                ))
+                for text in ("Hades", "hades", "HADES", "Hades ", "hades")
+            ]
+            threads[0].start()
+            started.wait(5)
+            for thread in threads[1:]:
+                thread.start()
+            time.sleep(0.05)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(calls, ["Hades"])
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+
+class LibraryFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="facets", password="pw")
+        cls.pc = Platform.objects.create(name="PC", type="PC")
+        cls.switch = Platform.objects.create(name="Switch", type="Console")
+        cls.backlog = Status.objects.create(key="backlog", label="Backlog", order=1)
+        cls.playing = Status.objects.create(key="playing", label="Playing", order=2)
+        cls.digital = Medium.objects.create(name="Digital")
+        cls.disc = Medium.objects.create(name="Disc")
+        cls.service = SubscriptionService.objects.create(name="Game Pass")
+
+        make_library(cls.user, 3, cls.pc, cls.backlog, [cls.digital], [cls.service])
+        make_library(cls.user, 2, cls.pc, cls.playing, [cls.digital, cls.disc])
+        make_library(cls.user, 4, cls.switch, cls.backlog, [cls.disc])
+        other = User.objects.create_user(username="someone", password="pw")
+        make_library(other, 5, cls.pc, cls.backlog, [cls.digital])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def counts(self, **params):
+        query = QueryDict(mutable=True)
+        for name, value in params.items():
+            query.setlist(name, value if isinstance(value, list) else [value])
+        return facets.compute(self.user, query)
+
+    def test_counts_apply_every_other_filter(self):
+        counts = self.counts()
+        self.assertEqual(counts["platform"], {self.pc.pk: 5, self.switch.pk: 4})
+        self.assertEqual(counts["status"], {self.backlog.pk: 7, self.playing.pk: 2})
+        self.assertEqual(counts["medium"], {self.digital.pk: 5, self.disc.pk: 6})
+        self.assertEqual(counts["subservice"], {self.service.pk: 3})
+        self.assertEqual(sum(counts["priority"].values()), 9)
+
+        counts = self.counts(platform=str(self.pc.pk), medium=[str(self.disc.pk)])
+        # a dimension's own selection doesn't narrow its counts
+        self.assertEqual(counts["platform"], {self.pc.pk: 2, self.switch.pk: 4})
+        self.assertEqual(counts["medium"], {self.digital.pk: 5, self.disc.pk: 2})
+        self.assertEqual(counts["status"], {self.playing.pk: 2})
+        self.assertEqual(counts["subservice"], {})
+
+    def test_list_shows_counts_and_caches_them(self):
+        response = self.client.get(reverse("library_list"))
+        self.assertContains(response, "Switch (4)")
+        self.assertContains(response, "Backlog (7)")
+
+        with self.assertNumQueries(0):
+            facets.counts(self.user, QueryDict("sort=name&page=2"))
+
+        # any change to the library replaces them
+        make_library(self.user, 1, self.switch, self.playing)
+        self.assertEqual(facets.counts(self.user, QueryDict())["platform"][self.switch.pk], 5)
+
+    def test_deleting_an_option_replaces_the_counts(self):
+        counts = facets.counts(self.user, QueryDict())
+        self.assertEqual(counts["medium"][self.disc.pk], 6)
+        self.assertEqual(counts["subservice"], {self.service.pk: 3})
+
+        # the links go in the cascade, without an m2m_changed signal
+        disc_pk = self.disc.pk
+        self.disc.delete()
+        self.service.delete()
+        counts = facets.counts(self.user, QueryDict())
+        self.assertNotIn(disc_pk, counts["medium"])
+        self.assertEqual(counts["subservice"], {})
+
+
+class LibraryCountCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="counter", password="pw")
+        cls.platform = Platform.objects.create(name="PC", type="PC")
+        cls.status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        make_library(cls.user, 25, cls.platform, cls.status)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get_list(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("library_list"), {"page_size": 5, **params})
+        counted = any("COUNT(" in q["sql"] for q in ctx.captured_queries)
+        return response, counted
+
+    def test_pages_and_sorts_share_one_count(self):
+        response, counted = self.get_list()
+        self.assertTrue(counted)
+        self.assertEqual(response.context["paginator"].count, 25)
+
+        response, counted = self.get_list(page=3, sort="name")
+        self.assertFalse(counted)
+        self.assertEqual(response.context["paginator"].num_pages, 5)
+
+        # other filters are counted separately
+        response, counted = self.get_list(priority=1)
+        self.assertTrue(counted)
+        self.assertEqual(response.context["paginator"].count, 3)
+
+        make_library(self.user, 1, self.platform, self.status)
+        response, counted = self.get_list(page=2)
+        self.assertTrue(counted)
+        self.assertEqual(response.context["paginator"].count, 26)
+
+    @override_settings(TRACKER_COUNT_ESTIMATE_ABOVE=12)
+    def test_estimated_count_continues_by_cursor(self):
+        response, _ = self.get_list(page=3)
+        paginator = response.context["paginator"]
+        self.assertEqual((paginator.count, paginator.estimated, paginator.num_pages), (12, True, 3))
+        self.assertEqual(len(response.context["libraries"]), 2)
+        self.assertContains(response, "&hellip;")
+
+        # the last numbered page still links on to the rows past the estimate
+        seen = 12
+        while response.context.get("next_cursor"):
+            response, counted = self.get_list(after=response.context["next_cursor"])
+            self.assertFalse(counted)
+            seen += len(response.context["libraries"])
+        self.assertEqual(seen, 25)
+
+        response, _ = self.get_list(priority=1)
+        self.assertEqual((response.context["paginator"].count, response.context["paginator"].estimated), (3, False))
+
+    def test_admin_changelist_caches_its_count(self):
+        admin_user = User.objects.create_superuser(username="root", password="pw")
+        self.client.force_login(admin_user)
+        url = reverse("admin:tracker_library_changelist")
+
+        response = self.client.get(url)
+        self.assertIsInstance(response.context["cl"].paginator, CachedCountPaginator)
+        self.assertEqual(response.context["cl"].result_count, 25)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"o": "1"})
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+
+        # any user's change replaces it
+        other = User.objects.create_user(username="other", password="pw")
+        make_library(other, 2, self.platform, self.status)
+        self.assertEqual(self.client.get(url).context["cl"].result_count, 27)
+
+
+@override_settings(TRACKER_READ_REPLICAS=["replica1"], TRACKER_REPLICA_PIN_SECONDS=60)
+class ReadReplicaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="pw")
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        # last changed two minutes ago, past the pin
+        cache.set(caching._version_key(self.user.pk), time.time_ns() - 120 * 10**9, None)
+
+    def request(self, method="get", user=None):
+        request = getattr(self.factory, method)("/")
+        request.user = user or self.user
+        return request
+
+    def test_router_sends_user_data_reads_to_the_replica(self):
+        self.assertEqual(router.db_for_read(LibraryRow), "default")
+        with replicas.reading_from("replica1"):
+            self.assertEqual(router.db_for_read(LibraryRow), "replica1")
+            self.assertEqual(router.db_for_read(Library), "replica1")
+            # lookup tables and auth stay on the primary
+            self.assertEqual(router.db_for_read(Platform), "default")
+            self.assertEqual(router.db_for_read(User), "default")
+            self.assertEqual(router.db_for_write(LibraryRow), "default")
+        self.assertFalse(router.allow_migrate("replica1", "tracker"))
+
+    def test_reads_follow_the_user_and_method(self):
+        @replicas.replica_reads
+        def view(request):
+            return HttpResponse(router.db_for_read(LibraryRow))
+
+        self.assertEqual(view(self.request()).content, b"replica1")
+        self.assertEqual(view(self.request("post")).content, b"default")
+        self.assertEqual(view(self.request(user=AnonymousUser())).content, b"default")
+
+        # read-your-writes: a change pins the user to the primary
+        caching.bump_user_version(self.user.pk)
+        self.assertEqual(view(self.request()).content, b"default")
+
+    def test_streamed_and_async_responses_read_from_the_replica(self):
+        @replicas.replica_reads
+        def streamed(request):
+            return StreamingHttpResponse(router.db_for_read(LibraryRow) for _ in range(2))
+
+        @replicas.replica_reads
+        async def async_view(request):
+            return HttpResponse(await sync_to_async(router.db_for_read)(LibraryRow))
+
+        self.assertEqual(b"".join(streamed(self.request()).streaming_content), b"replica1replica1")
+        self.assertEqual(async_to_sync(async_view)(self.request()).content, b"replica1")
+
+    @override_settings(TRACKER_READ_REPLICAS=["default"])
+    def test_library_views_read_from_a_replica(self):
+        # the primary stands in for the replica
+        self.client.force_login(self.user)
+        for name in ("library_list", "library_export", "library_stats", "library_api"):
+            with self.subTest(name=name), mock.patch.object(
+                replicas, "reading_from", wraps=replicas.reading_from
+            ) as reading_from:
+                response = self.client.get(reverse(name))
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+                reading_from.assert_called_with("default")
+
+    @override_settings(TRACKER_READ_REPLICAS=[])
+    def test_sync_needs_a_replica(self):
+        with self.assertRaises(CommandError):
+            call_command("sync_replicas", stdout=StringIO())
+
+
+@override_settings(TRACKER_READ_REPLICAS=["replica1"])
+class ReplicaSyncTests(TransactionTestCase):
+    # The online backup reads committed data, so no wrapping transaction
+    def test_sync_copies_the_primary(self):
+        platform = Platform.objects.create(name="PC", type="PC")
+        status = Status.objects.create(key="backlog", label="Backlog", order=1)
+        make_library(User.objects.create_user(username="synced"), 3, platform, status)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "replica.sqlite3")
+            with mock.patch.dict(settings.DATABASES, {"replica1": {"NAME": path}}):
+                call_command("sync_replicas", stdout=StringIO())
+            with closing(sqlite3.connect(path)) as copy:
+                self.assertEqual(copy.execute("SELECT COUNT(*) FROM tracker_libraryrow").fetchone(), (3,))
+
+
+class StaticAssetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root))
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.url = staticfiles_storage.url("css/style.css")
+        with open(os.path.join(settings.BASE_DIR, "tracker", "static", "css", "style.css"), "rb") as f:
+            cls.original = f.read()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="assets", password="pw")
+
+    def test_collectstatic_fingerprints_and_precompresses(self):
+        self.assertRegex(self.url, r"^/static/css/style\.[0-9a-f]{12}\.css$")
+        hashed = os.path.join(self.static_root, self.url.removeprefix("/static/"))
+        with open(hashed + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), self.original)
+        self.assertEqual(os.path.exists(hashed + ".br"), staticfiles.brotli is not None)
+        # images are stored as they are
+        self.assertFalse(os.path.exists(os.path.join(self.static_root, "screenshots", "library_view.png.gz")))
+
+    def test_fingerprinted_files_are_immutable_and_compressed(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.content), self.original)
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response.content, self.original)
+
+    def test_plain_names_revalidate(self):
+        response = self.client.get("/static/css/style.css")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        response = self.client.get("/static/css/style.css", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_pages_are_compressed(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("library_list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(self.url.encode(), gzip.decompress(response.content))
+
+        # gzip downloads are sent as they are
+        response = self.client.get(reverse("library_export"), {"gzip": "1"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
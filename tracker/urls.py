@@ -1,5 +1,23 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+sync_library_views = [
+    path("", views.LibraryListView.as_view(), name="library_list"),
+    path("library/add/", views.LibraryCreateView.as_view(), name="library_add"),
+    path("library/<int:pk>/edit/", views.LibraryUpdateView.as_view(), name="library_edit"),
+    path("library/<int:pk>/delete/", views.LibraryDeleteView.as_view(), name="library_delete"),
+]
+
+# Served instead under ASGI when settings.TRACKER_ASYNC_VIEWS is on
+async_library_views = [
+    path("", async_views.library_list, name="library_list"),
+    path("library/add/", async_views.library_create, name="library_add"),
+    path("library/<int:pk>/edit/", async_views.library_update, name="library_edit"),
+    path("library/<int:pk>/delete/", async_views.library_delete, name="library_delete"),
+]
+
+library_views = async_library_views if settings.TRACKER_ASYNC_VIEWS else sync_library_views
 
 urlpatterns = [
     
@@ -9,8 +27,19 @@ urlpatterns = [
 
     # Library Views
 
-    path("", views.LibraryListView.as_view(), name="library_list"),
-    path("library/add/", views.LibraryCreateView.as_view(), name="library_add"),
-    path("library/<int:pk>/edit/", views.LibraryUpdateView.as_view(), name="library_edit"),
-    path("library/<int:pk>/delete/", views.LibraryDeleteView.as_view(), name="library_delete"),
-]
\ No newline at end of file
+    *library_views,
+    path("library/bulk-edit/", views.library_bulk_edit, name="library_bulk_edit"),
+    path("library/import/", views.library_import, name="library_import"),
+    path("library/export/", views.library_export, name="library_export"),
+    path("library/stats/", views.library_stats, name="library_stats"),
+
+    # API
+
+    path("api/library/", views.library_api, name="library_api"),
+    path("api/titles/", views.title_suggestions, name="title_suggestions"),
+
+    # Staff
+
+    path("staff/page-cache/", views.page_cache_stats, name="page_cache_stats"),
+    path("staff/request-metrics/", views.request_metrics, name="request_metrics"),
+]
@@ -1,12 +1,32 @@
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
 from multiprocessing import context
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.urls import reverse_lazy
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.urls import reverse, reverse_lazy
 from django.shortcuts import render, redirect
+from django.db.models import Exists, OuterRef
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.template.loader import get_template, render_to_string
 from django.contrib.auth import login
-
-from .models import Library, Platform, Status, Game, Edition
-from .forms import LibraryForm, RegistrationForm
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.contrib.auth.decorators import login_required
+from django.conf import settings
+
+from . import autocomplete, bulkedit, caching, catalog, exporter, facets, metrics, readmodel, reference, stats
+from .replicas import replica_reads
+from .models import Library, LibraryRow
+from .forms import LibraryBulkEditForm, LibraryForm, LibraryImportForm, RegistrationForm
+from .pagination import (
+    CachedCountPaginator, InvalidCursor, KeysetPage, encode_cursor, keyset_page, sort_key,
+)
+from .importer import ImportFileError, detect_format, import_file
+from .search import filter_by_title
 
 
 # Authentication Views
@@ -27,129 +47,319 @@ def register(request):
     return render(request, "tracker/register.html", {"form": form})
 
 
-# Library Views
+# Staff Views
 
-class LibraryListView(LoginRequiredMixin, ListView):
-    model = Library
-    template_name = "library_list.html"
-    context_object_name = "libraries"
+@staff_member_required
+def page_cache_stats(request):
+    return JsonResponse(caching.page_cache_stats())
 
-    def get_paginate_by(self, queryset):
-        page_size = self.request.GET.get("page_size")
-        if page_size and page_size.isdigit():
-            return int(page_size)
-        return 20  # default
 
-    def get_queryset(self):
-        queryset = Library.objects.filter(user=self.request.user)
+@staff_member_required
+def request_metrics(request):
+    return JsonResponse(metrics.snapshot())
 
-        # --- filtering ---
-        platform = self.request.GET.get("platform")
-        status = self.request.GET.get("status")
-        priority = self.request.GET.get("priority")
-        selected_mediums = self.request.GET.getlist("medium")
-        selected_subservices = self.request.GET.getlist("subservice")
 
-        if platform:
-            queryset = queryset.filter(platform__id=platform)
+# Library Views
 
-        if status:
-            queryset = queryset.filter(status__id=status)
+# sort= value -> ORDER BY on LibraryRow. Each ordering ends with "pk" so
+# it is a total order, which keyset (cursor) pagination relies on.
+DEFAULT_ORDERING = ("status_order", "priority", "game_title", "pk")
+
+SORT_ORDERINGS = {
+    "name": ("game_title", "pk"),
+    "name_desc": ("-game_title", "-pk"),
+    "platform": ("platform_name", "game_title", "pk"),
+    "platform_desc": ("-platform_name", "game_title", "pk"),
+    "status": ("status_order", "priority", "game_title", "pk"),
+    "status_desc": ("-status_order", "priority", "game_title", "pk"),
+    "priority": ("priority", "game_title", "pk"),
+    "priority_desc": ("-priority", "game_title", "pk"),
+}
+
+
+def filter_related(queryset, through, field, ids, match_all=False):
+    """
+    Filter Library (or LibraryRow, whose pk is the Library id) rows on an
+    M2M relation with EXISTS subqueries rather
+    than a join, so rows never multiply and no DISTINCT is needed.
+    With `match_all`, a row must be linked to every id; otherwise any one.
+    """
+    links = through.objects.filter(library_id=OuterRef("pk"))
+    if match_all:
+        for pk in set(ids):
+            queryset = queryset.filter(Exists(links.filter(**{f"{field}_id": pk})))
+        return queryset
+    return queryset.filter(Exists(links.filter(**{f"{field}_id__in": ids})))
 
-        if priority:
-            queryset = queryset.filter(priority=priority)
 
-        if selected_mediums:
-            queryset = queryset.filter(mediums__id__in=selected_mediums).distinct()
+def library_ordering(params):
+    return SORT_ORDERINGS.get(params.get("sort"), DEFAULT_ORDERING)
 
-        if selected_subservices:
-            queryset = queryset.filter(subscription_services__id__in=selected_subservices).distinct()
 
-        # --- search ---
-        search = self.request.GET.get("search")
-        if search:
-            queryset = queryset.filter(
-                edition__game__title__icontains=search
-            )
+def library_rows(user, params):
+    """
+    The user's LibraryRows filtered and sorted by the list's querystring
+    parameters (platform, status, priority, medium, subservice, search,
+    sort). Shared by the list page, the export and the JSON API.
 
-        # --- sorting ---
-        sort = self.request.GET.get("sort")
+    LibraryRow holds every filter, sort and displayed column, so a page is
+    one indexed query with no joins. Medium/service names come from
+    tracker.reference.
+    """
+    queryset = LibraryRow.objects.filter(user=user)
 
-        if sort == "name":
-            queryset = queryset.order_by("edition__game__title")
+    # --- filtering ---
+    platform = params.get("platform")
+    status = params.get("status")
+    priority = params.get("priority")
+    selected_mediums = params.getlist("medium")
+    selected_subservices = params.getlist("subservice")
 
-        elif sort == "name_desc":
-            queryset = queryset.order_by("-edition__game__title")
+    if platform:
+        queryset = queryset.filter(platform_id=platform)
 
-        elif sort == "platform":
-            queryset = queryset.order_by("platform__name", "edition__game__title")
+    if status:
+        queryset = queryset.filter(status_id=status)
 
-        elif sort == "platform_desc":
-            queryset = queryset.order_by("-platform__name", "edition__game__title")
+    if priority:
+        queryset = queryset.filter(priority=priority)
 
-        elif sort == "status":
-            queryset = queryset.order_by("status__order", "priority", "edition__game__title")
+    if selected_mediums:
+        queryset = filter_related(
+            queryset, Library.mediums.through, "medium",
+            selected_mediums, params.get("medium_match") == "all",
+        )
 
-        elif sort == "status_desc":
-            queryset = queryset.order_by("-status__order", "priority", "edition__game__title")
+    if selected_subservices:
+        queryset = filter_related(
+            queryset, Library.subscription_services.through, "subscriptionservice",
+            selected_subservices, params.get("subservice_match") == "all",
+        )
 
-        elif sort == "priority":
-            queryset = queryset.order_by("priority", "edition__game__title")
+    # --- search ---
+    search = params.get("search")
+    if search:
+        queryset = filter_by_title(queryset, search, game_field="game")
+
+    # --- sorting ---
+    return queryset.order_by(*library_ordering(params))
+
+
+MAX_PAGE_SIZE = 100
+
+
+def requested_page_size(params, default=20):
+    page_size = params.get("page_size")
+    if page_size and page_size.isdigit():
+        return max(1, min(int(page_size), MAX_PAGE_SIZE))
+    return default
+
+def library_paginator(request, queryset, per_page, **kwargs):
+    """
+    Paginator for the list, with its total cached until the user's data
+    changes and shared by every page and sort order of the same filters.
+    """
+    return CachedCountPaginator(
+        queryset, per_page,
+        count_key=caching.filter_key("tracker:count", request.user.pk, request.GET),
+        estimate_above=settings.TRACKER_COUNT_ESTIMATE_ABOVE,
+        **kwargs,
+    )
+
+
+# page_size values that switch the list to streamed "All" mode
+# ("9999" is what the page size dropdown used to send)
+STREAM_PAGE_SIZES = ("all", "9999")
+STREAM_CHUNK_SIZE = 500
+STREAM_ROWS_MARKER = "<!-- streamed rows -->"
+
+
+def library_list_context(request, page, ordering):
+    """
+    Template context for library_list.html besides the rows themselves:
+    filter choices with their counts and selections, querystrings and the
+    next-page cursor. Shared by LibraryListView and its async counterpart.
+    """
+    context = {}
+
+    # sorting
+    context["current_sort"] = request.GET.get("sort", "")
+
+    # filtering (lookup tables come from the reference-data cache)
+    context["platforms"] = reference.platforms()
+    context["statuses"] = reference.statuses()
+    context["priorities"] = range(1, 11)
+
+    context["selected_platform"] = request.GET.get("platform", "")
+    context["selected_status"] = request.GET.get("status", "")
+    context["selected_priority"] = request.GET.get("priority", "")
+
+    # Medium + Subscription filter data
+    context["mediums"] = reference.mediums()
+    context["subscription_services"] = reference.subscription_services()
+
+    context["selected_mediums"] = request.GET.getlist("medium")
+    context["selected_subservices"] = request.GET.getlist("subservice")
+    context["medium_match"] = request.GET.get("medium_match", "any")
+    context["subservice_match"] = request.GET.get("subservice_match", "any")
+
+    # How many entries each option matches, given the other filters
+    facet_counts = facets.counts(request.user, request.GET)
+    for name, dimension, options in (
+        ("platform_options", "platform", [(p.pk, p) for p in context["platforms"]]),
+        ("status_options", "status", [(s.pk, s) for s in context["statuses"]]),
+        ("priority_options", "priority", [(p, p) for p in context["priorities"]]),
+        ("medium_options", "medium", [(m.pk, m) for m in context["mediums"]]),
+        ("subservice_options", "subservice", [(s.pk, s) for s in context["subscription_services"]]),
+    ):
+        counts = facet_counts[dimension]
+        context[name] = [(option, counts.get(pk, 0)) for pk, option in options]
+
+    # Count how many filters are active
+    filter_count = 0
+    if context["selected_platform"]: filter_count += 1
+    if context["selected_status"]: filter_count += 1
+    if context["selected_priority"]: filter_count += 1
+    if context["selected_mediums"]: filter_count += 1
+    if context["selected_subservices"]: filter_count += 1
+    context["filter_count"] = filter_count
+
+    # Build clean querystring for sorting
+    params_for_sort = request.GET.copy()
+    params_for_sort.pop("sort", None)
+    context["query_params"] = params_for_sort.urlencode()
+
+    # pagination: preserve querystring
+    params = request.GET.copy()
+    for key in ("page", "after", "before"):
+        params.pop(key, None)
+
+    context["preserved_querystring"] = "&" + params.urlencode() if params else ""
+
+    context["bulk_form"] = LibraryBulkEditForm(initial={"query": request.GET.urlencode()})
+
+    # "Next" always continues from the last row shown (keyset), so deep
+    # pages cost the same as the first one.
+    context["keyset_page"] = isinstance(page, KeysetPage)
+    if context["keyset_page"]:
+        context["next_cursor"] = page.next_cursor
+    elif page and page.has_next():
+        rows = list(page.object_list)
+        context["next_cursor"] = encode_cursor(sort_key(rows[-1], ordering))
+    context["stream_rows_marker"] = STREAM_ROWS_MARKER
+
+    return context
+
+
+@method_decorator(replica_reads, name="dispatch")
+class LibraryListView(LoginRequiredMixin, ListView):
+    model = Library
+    template_name = "library_list.html"
+    context_object_name = "libraries"
 
-        elif sort == "priority_desc":
-            queryset = queryset.order_by("-priority", "edition__game__title")
+    def get(self, request, *args, **kwargs):
+        if self.request.GET.get("page_size") in STREAM_PAGE_SIZES:
+            return self.stream_all_rows()
+
+        # Serve a page rendered earlier from the same data, if there is one
+        key = caching.page_key(request)
+        content = cache.get(key)
+        if content is not None:
+            caching.record_hit()
+            response = HttpResponse(content)
+            response["X-Page-Cache"] = "hit"
+            return response
+
+        caching.record_miss()
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        if response.status_code == 200:
+            cache.set(key, response.content, caching.PAGE_CACHE_TIMEOUT)
+        response["X-Page-Cache"] = "miss"
+        return response
 
-        # --- Default multi-column sort ---
-        else:
-            queryset = queryset.order_by("status__order", "priority", "edition__game__title")
+    def get_paginate_by(self, queryset):
+        if self.request.GET.get("page_size") in STREAM_PAGE_SIZES:
+            return None  # streamed, not paged
+        return requested_page_size(self.request.GET)
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return library_paginator(self.request, queryset, per_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        after = self.request.GET.get("after")
+        before = self.request.GET.get("before")
+        if not (after or before):
+            return super().paginate_queryset(queryset, page_size)
+
+        # Cursor pages: WHERE on the sort key instead of OFFSET, no COUNT
+        try:
+            page = keyset_page(
+                queryset, self.get_ordering(), page_size, after=after, before=before
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+        return None, page, page.object_list, page.has_next or page.has_previous
+
+    def stream_all_rows(self):
+        """
+        "All" mode: render the page around an empty table, then stream the
+        rows in chunks so the full result set is never held in memory.
+        """
+        queryset = self.get_queryset()
+        self.object_list = queryset.none()
+        context = self.get_context_data(streaming=True)
+        head, tail = render_to_string(
+            self.template_name, context, self.request
+        ).split(STREAM_ROWS_MARKER, 1)
+
+        def rows():
+            yield head
+            template = get_template("library_rows.html")
+            chunk = []
+            for library in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE):
+                chunk.append(library)
+                if len(chunk) == STREAM_CHUNK_SIZE:
+                    yield template.render({"libraries": chunk})
+                    chunk = []
+            if chunk:
+                yield template.render({"libraries": chunk})
+            yield tail
+
+        return StreamingHttpResponse(rows(), content_type="text/html; charset=utf-8")
 
-        return queryset
+    def get_queryset(self):
+        return library_rows(self.request.user, self.request.GET)
+
+    def get_ordering(self):
+        return library_ordering(self.request.GET)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(library_list_context(
+            self.request, context.get("page_obj"), self.get_ordering()
+        ))
+        return context
 
-        # sorting
-        context["current_sort"] = self.request.GET.get("sort", "")
-
-        # filtering
-        context["platforms"] = Platform.objects.all()
-        context["statuses"] = Status.objects.all()
-        context["priorities"] = range(1, 6)
-
-        context["selected_platform"] = self.request.GET.get("platform", "")
-        context["selected_status"] = self.request.GET.get("status", "")
-        context["selected_priority"] = self.request.GET.get("priority", "")
-
-        # Medium + Subscription filter data
-        from .models import Medium, SubscriptionService
-        context["mediums"] = Medium.objects.all()
-        context["subscription_services"] = SubscriptionService.objects.all()
-
-        context["selected_mediums"] = self.request.GET.getlist("medium")
-        context["selected_subservices"] = self.request.GET.getlist("subservice")
-
-        # Count how many filters are active
-        filter_count = 0
-        if context["selected_platform"]: filter_count += 1
-        if context["selected_status"]: filter_count += 1
-        if context["selected_priority"]: filter_count += 1
-        if context["selected_mediums"]: filter_count += 1
-        if context["selected_subservices"]: filter_count += 1
-        context["filter_count"] = filter_count
 
-        # Build clean querystring for sorting
-        params_for_sort = self.request.GET.copy()
-        params_for_sort.pop("sort", None)
-        context["query_params"] = params_for_sort.urlencode()
+def attach_edition(form, user):
+    """
+    Point a valid LibraryForm's entry at the Game/Edition named in the
+    form, creating them if needed, and at its owner.
+    """
+    # Extract user input
+    title = form.cleaned_data["title"]
+    edition_name = form.cleaned_data["edition_name"] or "Standard"
+    release_date = form.cleaned_data["release_date"]
 
-        # pagination: preserve querystring
-        params = self.request.GET.copy()
-        if "page" in params:
-            params.pop("page")
+    # Create or get the Game and Edition, matching them on their normalized
+    # keys; a new Edition takes the release date
+    game, _ = catalog.get_or_create_game(title)
+    edition, _ = catalog.get_or_create_edition(game, edition_name, release_date=release_date)
 
-        context["preserved_querystring"] = "&" + params.urlencode() if params else ""
-
-        return context
+    # Attach Edition + User to the Library entry
+    form.instance.edition = edition
+    form.instance.user = user
 
 
 class LibraryCreateView(LoginRequiredMixin, CreateView):
@@ -159,38 +369,31 @@ class LibraryCreateView(LoginRequiredMixin, CreateView):
     success_url = reverse_lazy("library_list")
 
     def form_valid(self, form):
-        # Extract user input
-        title = form.cleaned_data["title"]
-        edition_name = form.cleaned_data["edition_name"] or "Standard"
-        release_date = form.cleaned_data["release_date"]
-
-        # Create or get the Game
-        game, _ = Game.objects.get_or_create(title=title)
-
-        # Create or get the Edition
-        edition, created = Edition.objects.get_or_create(
-            game=game,
-            name=edition_name,
-        )
-
-        # If newly created, set release_date
-        if created:
-            edition.release_date = release_date
-            edition.save()
+        # the entry and its links are saved separately: build its row once
+        with readmodel.deferred():
+            attach_edition(form, self.request.user)
+            return super().form_valid(form)
 
-        # Attach Edition + User to the Library entry
-        form.instance.edition = edition
-        form.instance.user = self.request.user
 
-        return super().form_valid(form)
+def own_entries(user):
+    """
+    The user's library entries, with the game, edition and platform the
+    edit and delete pages show. Fetching through this makes ownership
+    part of the query: someone else's entry is simply not found.
+    """
+    return Library.objects.filter(user=user).select_related("edition__game", "platform")
 
 
-class LibraryUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class LibraryUpdateView(LoginRequiredMixin, UpdateView):
     model = Library
     form_class = LibraryForm
     template_name = "library_form.html"
     success_url = reverse_lazy("library_list")
 
+    def get_queryset(self):
+        # the form's initial data includes the entry's links
+        return own_entries(self.request.user).prefetch_related("mediums", "subscription_services")
+
     def get_initial(self):
         initial = super().get_initial()
         edition = self.object.edition
@@ -206,40 +409,198 @@ class LibraryUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return initial
 
     def form_valid(self, form):
-        # Extract user input
-        title = form.cleaned_data["title"]
-        edition_name = form.cleaned_data["edition_name"] or "Standard"
-        release_date = form.cleaned_data["release_date"]
-
-        # Create or get the Game
-        game, _ = Game.objects.get_or_create(title=title)
-
-        # Create or get the Edition
-        edition, created = Edition.objects.get_or_create(
-            game=game,
-            name=edition_name,
-        )
-
-        # Update release_date if needed
-        if created:
-            edition.release_date = release_date
-            edition.save()
-
-        # Attach Edition + User to the Library entry
-        form.instance.edition = edition
-        form.instance.user = self.request.user
+        # the entry and its links are saved separately: rebuild its row once
+        with readmodel.deferred():
+            attach_edition(form, self.request.user)
+            return super().form_valid(form)
 
-        return super().form_valid(form)
 
-    def test_func(self):
-        return self.get_object().user == self.request.user
-
-
-class LibraryDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class LibraryDeleteView(LoginRequiredMixin, DeleteView):
     model = Library
     template_name = "library_confirm_delete.html"
     success_url = reverse_lazy("library_list")
 
-    def test_func(self):
-        library = self.get_object()
-        return library.user == self.request.user
\ No newline at end of file
+    def get_queryset(self):
+        return own_entries(self.request.user)
+
+
+@login_required
+@replica_reads
+def library_export(request):
+    """
+    Stream the user's library, filtered and sorted like the list page.
+    ?format=csv|json|ndjson, and ?gzip=1 for a compressed download.
+    """
+    fmt = request.GET.get("format", "csv")
+    if fmt not in exporter.FORMATS:
+        raise Http404("Unknown export format.")
+    compress = request.GET.get("gzip") == "1"
+
+    queryset = library_rows(request.user, request.GET)
+    response = StreamingHttpResponse(
+        exporter.export(queryset, fmt, compress),
+        content_type="application/gzip" if compress else exporter.CONTENT_TYPES[fmt],
+    )
+    name = exporter.filename(fmt, compress, today=timezone.localdate())
+    response["Content-Disposition"] = f'attachment; filename="{name}"'
+    return response
+
+
+@login_required
+def library_import(request):
+    result = None
+    if request.method == "POST":
+        form = LibraryImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                fmt = form.cleaned_data["format"] or detect_format(upload.name)
+                result = import_file(request.user, upload, fmt)
+            except ImportFileError as exc:
+                form.add_error("file", str(exc))
+    else:
+        form = LibraryImportForm()
+
+    return render(request, "library_import.html", {"form": form, "result": result})
+
+
+@login_required
+@require_POST
+def library_bulk_edit(request):
+    """
+    Change status, platform or priority, or add mediums / subscription
+    services, for the selected entries or every entry matching the list's
+    filters; then back to the list as it was.
+    """
+    form = LibraryBulkEditForm(request.POST)
+    if not form.is_valid():
+        return render(request, "library_bulk_edit.html", {"form": form}, status=400)
+
+    data = form.cleaned_data
+    if data["scope"] == LibraryBulkEditForm.FILTER:
+        library_ids = library_rows(request.user, QueryDict(data["query"])).values("pk")
+    else:
+        library_ids = data["ids"]
+    bulkedit.bulk_edit(
+        request.user, library_ids,
+        status=data["status"],
+        platform=data["platform"],
+        priority=data["priority"],
+        add_mediums=data["add_mediums"],
+        add_services=data["add_subscription_services"],
+    )
+
+    # Back to the first page: the entries may no longer match or sort the same
+    params = QueryDict(data["query"], mutable=True)
+    for key in ("page", "after", "before"):
+        params.pop(key, None)
+    url = reverse("library_list")
+    return redirect(f"{url}?{params.urlencode()}" if params else url)
+
+
+@login_required
+@replica_reads
+def library_stats(request):
+    """Totals by status, platform, medium and priority, from the user's rollups."""
+    return render(request, "library_stats.html", {"stats": stats.summary(request.user)})
+
+
+# API Views
+
+def api_login_required(view):
+    """Like login_required, but answers 401 JSON instead of redirecting."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"detail": "Authentication required."}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def library_etag(request):
+    # Changes whenever the user's library or the reference tables change;
+    # both versions live in the cache, so no library table is read.
+    return "{}.{}.{}".format(
+        request.user.pk,
+        caching.user_version(request.user.pk),
+        reference.current_version(),
+    )
+
+
+def library_last_modified(request):
+    changed = max(caching.user_version(request.user.pk), reference.current_version())
+    return datetime.fromtimestamp(changed / 1e9, tz=dt_timezone.utc)
+
+
+def row_json(row, mediums, services):
+    medium_ids = row.unpack_ids(row.medium_ids)
+    service_ids = row.unpack_ids(row.service_ids)
+    return {
+        "id": row.library_id,
+        "title": row.game_title,
+        "edition": row.edition_name,
+        "platform": {"id": row.platform_id, "name": row.platform_name},
+        "status": {"id": row.status_id, "key": row.status_key, "label": row.status_label},
+        "priority": row.priority,
+        "hours_played": row.hours_played,
+        "mediums": [name for pk, name in mediums.items() if pk in medium_ids],
+        "subscription_services": [name for pk, name in services.items() if pk in service_ids],
+    }
+
+
+@require_GET
+@api_login_required
+@replica_reads
+@condition(etag_func=library_etag, last_modified_func=library_last_modified)
+def library_api(request):
+    """
+    The library list as JSON: same filter and sort parameters as the list
+    page, cursor pagination with ?after= / ?before= and ?page_size=.
+    Answers 304 to a matching If-None-Match / If-Modified-Since.
+    """
+    ordering = library_ordering(request.GET)
+    try:
+        page = keyset_page(
+            library_rows(request.user, request.GET), ordering,
+            requested_page_size(request.GET),
+            after=request.GET.get("after"), before=request.GET.get("before"),
+        )
+    except InvalidCursor:
+        return JsonResponse({"detail": "Invalid page cursor."}, status=400)
+
+    mediums = {m.pk: m.name for m in reference.mediums()}
+    services = {s.pk: s.name for s in reference.subscription_services()}
+
+    def link(**cursor):
+        params = request.GET.copy()
+        for key in ("after", "before"):
+            params.pop(key, None)
+        params.update(cursor)
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    response = JsonResponse({
+        "results": [row_json(row, mediums, services) for row in page],
+        "next": link(after=page.next_cursor) if page.has_next else None,
+        "previous": link(before=page.previous_cursor) if page.has_previous else None,
+    })
+    # Let clients keep the response but revalidate it every time
+    response["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+@require_GET
+@api_login_required
+def title_suggestions(request):
+    """
+    Game titles (with their editions) matching ?q= as the user types, for
+    the add/edit form. ?limit= caps the count.
+    """
+    limit = request.GET.get("limit", "")
+    limit = max(1, min(int(limit), autocomplete.MAX_LIMIT)) if limit.isdigit() else autocomplete.DEFAULT_LIMIT
+
+    response = JsonResponse({"results": autocomplete.suggest(request.GET.get("q", ""), limit)})
+    # The same text gets the same answer for a while: let the browser reuse it
+    response["Cache-Control"] = "private, max-age=60"
+    patch_vary_headers(response, ["Cookie"])
+    return response